@@ -1,11 +1,21 @@
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
 from dotenv import load_dotenv
+import asyncio
 import os
+import threading
 
 from routers.calls import router as calls_router
 from routers.evaluations import router as evaluations_router
 from routers.agent import router as agent_router
+from services.lakebase import Lakebase
+from services.index_advisor import run_startup_check
+from services.result_cache import ResultCache
+from services.static_assets import StaticAssets, StaticAsset, etag_matches
+from services.columnar_index import ColumnarCallIndex, refresh_columnar_index
+from services.snapshot import start_snapshot, snapshot_dir
+from services.search_service import build_search_index_if_missing
+from services.rep_trend_service import build_rep_rollups_if_missing
 
 # Load environment variables from .env file
 load_dotenv()
@@ -22,20 +32,104 @@ app.include_router(evaluations_router)
 app.include_router(agent_router)
 
 
+@app.on_event("startup")
+async def warm_up_lakebase():
+    """Open the Lakebase pool in the background so no request pays for credential generation."""
+    threading.Thread(target=Lakebase().warm_up, name="lakebase-warm-up", daemon=True).start()
+
+
+@app.on_event("startup")
+async def check_indexes():
+    """Report (or create) missing indexes in the background when INDEX_ADVISOR_ON_STARTUP is set."""
+    threading.Thread(target=run_startup_check, name="index-advisor", daemon=True).start()
+
+
+@app.on_event("startup")
+async def warm_start_from_snapshot():
+    """Serve the CCR list, rep stats and columnar index from the local snapshot when SNAPSHOT_DIR is set and it is current."""
+    await start_snapshot()
+
+
+@app.on_event("startup")
+async def load_columnar_index():
+    """
+    Start loading the optional columnar call index in the background when CALLS_COLUMNAR_INDEX=on.
+    With SNAPSHOT_DIR set, start_snapshot does this after trying to seed the index from the snapshot.
+    """
+    if snapshot_dir() is None:
+        asyncio.get_running_loop().create_task(refresh_columnar_index())
+
+
+@app.on_event("startup")
+async def build_search_index():
+    """Build the transcript search documents in the background if they do not exist yet."""
+    asyncio.get_running_loop().create_task(build_search_index_if_missing())
+
+
+@app.on_event("startup")
+async def build_rep_rollups():
+    """Build the daily trend rollups in the background if they do not exist yet."""
+    asyncio.get_running_loop().create_task(build_rep_rollups_if_missing())
+
+
+@app.on_event("startup")
+async def load_static_assets():
+    """Fingerprint and pre-compress the frontend once, instead of per request."""
+    StaticAssets().load()
+
+
+def _asset_response(asset: StaticAsset, request: Request, cache_control: str) -> Response:
+    """
+    Serve a pre-compressed asset in the best encoding the client accepts.
+    The ETag is that encoding's, so a 304 always refers to the bytes the client would get.
+    """
+    encoding = asset.select(request.headers.get("accept-encoding", ""))
+    headers = {"ETag": asset.etags[encoding], "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+    if etag_matches(request.headers.get("if-none-match"), asset.etags[encoding]):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=asset.variants[encoding], media_type=asset.content_type, headers=headers)
+
+
 @app.get("/")
-async def read_root():
-    """Serve the index.html file."""
+async def read_root(request: Request):
+    """Serve the HTML shell, which links fingerprinted CSS/JS assets."""
     try:
-        return FileResponse("frontend/index.html")
+        return _asset_response(StaticAssets().index(), request, "no-cache")
     except Exception as e:
         return {"error": str(e)}
 
 
+@app.get("/static/{asset_name}")
+async def read_static_asset(asset_name: str, request: Request):
+    """Serve a fingerprinted static asset with long-lived immutable caching."""
+    try:
+        asset = StaticAssets().get(asset_name)
+
+        if asset is None:
+            raise HTTPException(status_code=404, detail="Asset not found")
+
+        return _asset_response(asset, request, "public, max-age=31536000, immutable")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Health check endpoint. Includes Lakebase pool, result cache and columnar index metrics."""
     try:
-        return {"status": "healthy"}
+        return {
+            "status": "healthy",
+            "lakebase_pool": Lakebase().pool_stats(),
+            "result_cache": ResultCache().stats(),
+            "columnar_index": ColumnarCallIndex().stats()
+        }
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
 
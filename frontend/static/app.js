@@ -0,0 +1,1488 @@
+// SUMMARY: Application state and initialization
+// Tracks current filters, view mode, and loads initial data on page load
+let currentFilters = {};
+let currentView = 'allCalls'; // Track which view we're in: 'allCalls' or 'ccr'
+let currentCallData = null; // Store current call data for editing
+let selectedCallIds = new Set(); // Track selected calls for comparison
+let currentCCRId = null; // Track current CCR being viewed
+const CALLS_PAGE_SIZE = 100; // Calls fetched per page from /api/calls
+let callsNextCursor = null; // Cursor for the next All Calls page
+let callsLoadedCount = 0; // Calls rendered so far in All Calls view
+let ccrCallsNextCursor = null; // Cursor for the next CCR calls page
+let ccrCallsLoadedCount = 0; // Calls rendered so far in CCR view
+
+// Load calls and CCRs on page load
+window.addEventListener('DOMContentLoaded', () => {
+    loadCalls();
+    loadCCRList();
+
+    // Auto-calculate total score when individual scores change
+    const scoreInputs = document.querySelectorAll('#evaluationForm input[type="number"]:not(#totalScore)');
+    scoreInputs.forEach(input => {
+        input.addEventListener('input', calculateTotalScore);
+    });
+});
+
+// SUMMARY: View switching functionality
+// Handles switching between All Calls View and CCR View
+function showView(viewName) {
+    currentView = viewName;
+
+    // Update button states
+    document.querySelectorAll('.view-btn').forEach(btn => {
+        btn.classList.remove('active');
+    });
+    event.target.classList.add('active');
+
+    // Show/hide appropriate views
+    if (viewName === 'allCalls') {
+        // Clear CCR-specific state when switching to All Calls
+        clearCCRState();
+
+        document.getElementById('allCallsView').style.display = 'block';
+        document.getElementById('ccrView').style.display = 'none';
+        document.getElementById('callDetailView').style.display = 'none';
+        document.getElementById('comparisonView').style.display = 'none';
+        loadCalls();
+    } else if (viewName === 'ccr') {
+        document.getElementById('allCallsView').style.display = 'none';
+        document.getElementById('ccrView').style.display = 'block';
+        document.getElementById('callDetailView').style.display = 'none';
+        document.getElementById('comparisonView').style.display = 'none';
+        // CCR data will load when user selects a CCR
+    }
+}
+
+// SUMMARY: Clear CCR-specific state
+// Resets all CCR drill-down state when exiting CCR view
+function clearCCRState() {
+    // Reset CCR selection
+    const ccrSelect = document.getElementById('ccrSelect');
+    if (ccrSelect) {
+        ccrSelect.value = '';
+    }
+
+    // Clear selected calls for comparison
+    selectedCallIds.clear();
+    currentCCRId = null;
+
+    // Clear CCR data containers
+    document.getElementById('ccrStatsContainer').innerHTML = '';
+    document.getElementById('ccrCallsContainer').innerHTML = '';
+    document.getElementById('comparisonControls').style.display = 'none';
+
+    // Reset comparison button
+    updateComparisonButton();
+}
+
+function returnToPreviousView() {
+    document.getElementById('callDetailView').style.display = 'none';
+    if (currentView === 'allCalls') {
+        document.getElementById('allCallsView').style.display = 'block';
+    } else if (currentView === 'ccr') {
+        document.getElementById('ccrView').style.display = 'block';
+    }
+}
+
+function returnToCCRView() {
+    document.getElementById('comparisonView').style.display = 'none';
+    document.getElementById('ccrView').style.display = 'block';
+}
+
+// SUMMARY: Load CCR list for dropdown
+// Fetches the rep directory (ID, name, call count) and populates the select dropdown
+async function loadCCRList() {
+    try {
+        const response = await fetch('/api/ccrs');
+        const data = await response.json();
+
+        if (!response.ok) {
+            throw new Error(data.detail || 'Failed to load CCRs');
+        }
+
+        const select = document.getElementById('ccrSelect');
+        select.innerHTML = '<option value="">-- Select a CCR --</option>';
+
+        data.ccrs.forEach(ccr => {
+            const option = document.createElement('option');
+            option.value = ccr.call_center_rep_id;
+            option.textContent = ccr.rep_name
+                ? `${ccr.call_center_rep_id} - ${ccr.rep_name} (${ccr.call_count} calls)`
+                : `${ccr.call_center_rep_id} (${ccr.call_count} calls)`;
+            select.appendChild(option);
+        });
+    } catch (error) {
+        console.error('Error loading CCRs:', error);
+        const select = document.getElementById('ccrSelect');
+        select.innerHTML = '<option value="">Error loading CCRs</option>';
+    }
+}
+
+// SUMMARY: Load CCR aggregate stats and calls
+// Fetches performance statistics and all calls for the selected CCR
+async function loadCCRData() {
+    const ccrId = document.getElementById('ccrSelect').value;
+    const statsContainer = document.getElementById('ccrStatsContainer');
+    const callsContainer = document.getElementById('ccrCallsContainer');
+    const comparisonControls = document.getElementById('comparisonControls');
+
+    // Reset selection when changing CCR
+    selectedCallIds.clear();
+    updateComparisonButton();
+
+    if (!ccrId) {
+        statsContainer.innerHTML = '';
+        callsContainer.innerHTML = '';
+        comparisonControls.style.display = 'none';
+        return;
+    }
+
+    currentCCRId = ccrId;
+
+    statsContainer.innerHTML = '<div class="loading">Loading CCR statistics...</div>';
+    callsContainer.innerHTML = '';
+
+    try {
+        // Load aggregate stats
+        const statsResponse = await fetch(`/api/ccrs/${ccrId}/stats`);
+        const stats = await statsResponse.json();
+
+        if (!statsResponse.ok) {
+            throw new Error(stats.detail || 'Failed to load CCR stats');
+        }
+
+        // Display stats
+        statsContainer.innerHTML = `
+            <div class="ccr-stats-grid">
+                <div class="ccr-stat-card">
+                    <div class="ccr-stat-label">Total Calls</div>
+                    <div class="ccr-stat-value">${stats.total_calls}</div>
+                </div>
+                <div class="ccr-stat-card highlight">
+                    <div class="ccr-stat-label">Average Score</div>
+                    <div class="ccr-stat-value">${stats.avg_score}/60</div>
+                </div>
+                <div class="ccr-stat-card">
+                    <div class="ccr-stat-label">Min Score</div>
+                    <div class="ccr-stat-value">${stats.min_score}/60</div>
+                </div>
+                <div class="ccr-stat-card">
+                    <div class="ccr-stat-label">Max Score</div>
+                    <div class="ccr-stat-value">${stats.max_score}/60</div>
+                </div>
+            </div>
+        `;
+
+        // Load first page of calls for this CCR
+        callsContainer.innerHTML = '<div class="loading">Loading calls...</div>';
+        ccrCallsNextCursor = null;
+        ccrCallsLoadedCount = 0;
+
+        const callsData = await fetchCallsPage({ call_center_rep_id: ccrId }, null);
+
+        if (callsData.calls.length === 0) {
+            callsContainer.innerHTML = `
+                <div class="empty-state">
+                    <div class="empty-state-icon">📭</div>
+                    <h3>No calls found</h3>
+                </div>
+            `;
+            return;
+        }
+
+        // Build calls table with selection checkboxes
+        comparisonControls.style.display = 'block';
+
+        callsContainer.innerHTML = `
+            <h3 class="section-title" id="ccrCallsTitle"></h3>
+            <table class="calls-table">
+                <thead>
+                    <tr>
+                        <th class="checkbox-cell">
+                            <input type="checkbox" id="selectAllCheckbox" onchange="toggleSelectAll()">
+                        </th>
+                        <th>Call ID</th>
+                        <th>Member ID</th>
+                        <th>Call Date</th>
+                        <th>Total Score</th>
+                    </tr>
+                </thead>
+                <tbody id="ccrCallsTableBody"></tbody>
+            </table>
+            <div class="load-more-container" id="ccrLoadMore"></div>
+        `;
+
+        appendCCRCallsPage(callsData);
+
+    } catch (error) {
+        statsContainer.innerHTML = `
+            <div class="error">
+                <strong>Error:</strong> ${error.message}
+            </div>
+        `;
+        callsContainer.innerHTML = '';
+    }
+}
+
+// SUMMARY: Fetch one page of calls
+// Calls /api/calls with the given filters and keyset cursor, returns the parsed page
+async function fetchCallsPage(filters, cursor) {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => {
+        if (value) params.append(key, value);
+    });
+    params.append('page_size', CALLS_PAGE_SIZE);
+    if (cursor) params.append('cursor', cursor);
+
+    const response = await fetch(`/api/calls?${params}`);
+    const data = await response.json();
+
+    if (!response.ok) {
+        throw new Error(data.detail || 'Failed to load calls');
+    }
+
+    return data;
+}
+
+// SUMMARY: Render a "Load more" button (or nothing on the last page)
+function renderLoadMore(container, nextCursor, onClickName) {
+    container.innerHTML = nextCursor
+        ? `<button class="btn-secondary" onclick="${onClickName}(this)">Load more calls</button>`
+        : '';
+}
+
+// SUMMARY: Load and display all calls with filters
+// Fetches the first page of calls with current filter parameters and displays them in a table
+async function loadCalls() {
+    const container = document.getElementById('callsTableContainer');
+    const countElement = document.getElementById('callCount');
+
+    container.innerHTML = '<div class="loading">Loading calls...</div>';
+    callsNextCursor = null;
+    callsLoadedCount = 0;
+
+    try {
+        const data = await fetchCallsPage(currentFilters, null);
+
+        if (data.calls.length === 0) {
+            countElement.textContent = '0 Calls';
+            container.innerHTML = `
+                <div class="empty-state">
+                    <div class="empty-state-icon">📭</div>
+                    <h3>No calls found</h3>
+                    <p>Try adjusting your filters</p>
+                </div>
+            `;
+            return;
+        }
+
+        // Build table shell; rows are appended page by page
+        container.innerHTML = `
+            <table class="calls-table">
+                <thead>
+                    <tr>
+                        <th>Call ID</th>
+                        <th>Member ID</th>
+                        <th>Call Date</th>
+                        <th>CCR ID</th>
+                        <th>Total Score</th>
+                    </tr>
+                </thead>
+                <tbody id="callsTableBody"></tbody>
+            </table>
+            <div class="load-more-container" id="callsLoadMore"></div>
+        `;
+
+        appendCallsPage(data);
+
+    } catch (error) {
+        container.innerHTML = `
+            <div class="error">
+                <strong>Error:</strong> ${error.message}
+            </div>
+        `;
+    }
+}
+
+// SUMMARY: Append a page of calls to the All Calls table
+function appendCallsPage(data) {
+    const countElement = document.getElementById('callCount');
+    let rowsHTML = '';
+
+    data.calls.forEach(call => {
+        const scoreClass = getScoreClass(call.total_score);
+        const formattedDate = formatDate(call.call_date);
+        const ccrId = call.call_center_rep_id || 'N/A';
+        const overrideBadge = call.has_human_override ? '<span class="human-override-badge">✏️ REVIEWED</span>' : '';
+
+        rowsHTML += `
+            <tr onclick="viewCall('${call.call_id}')">
+                <td><strong>${call.call_id}</strong>${overrideBadge}</td>
+                <td>${call.member_id}</td>
+                <td>${formattedDate}</td>
+                <td>${ccrId}</td>
+                <td><span class="score-badge ${scoreClass}">${call.total_score}/60</span></td>
+            </tr>
+        `;
+    });
+
+    document.getElementById('callsTableBody').insertAdjacentHTML('beforeend', rowsHTML);
+
+    callsLoadedCount += data.count;
+    callsNextCursor = data.next_cursor;
+    const more = callsNextCursor ? '+' : '';
+    countElement.textContent = `${callsLoadedCount}${more} Call${callsLoadedCount !== 1 || more ? 's' : ''}`;
+    renderLoadMore(document.getElementById('callsLoadMore'), callsNextCursor, 'loadMoreCalls');
+}
+
+// SUMMARY: Fetch and append the next page of calls in All Calls view
+async function loadMoreCalls(button) {
+    if (!callsNextCursor) return;
+    button.disabled = true;
+    button.textContent = 'Loading...';
+
+    try {
+        const data = await fetchCallsPage(currentFilters, callsNextCursor);
+        appendCallsPage(data);
+    } catch (error) {
+        button.disabled = false;
+        button.textContent = 'Load more calls';
+        alert(`Error: ${error.message}`);
+    }
+}
+
+// SUMMARY: Append a page of calls to the CCR calls table
+function appendCCRCallsPage(callsData) {
+    let rowsHTML = '';
+
+    callsData.calls.forEach(call => {
+        const scoreClass = getScoreClass(call.total_score);
+        const formattedDate = formatDate(call.call_date);
+        const overrideBadge = call.has_human_override ? '<span class="human-override-badge">✏️ REVIEWED</span>' : '';
+        const isChecked = selectedCallIds.has(call.call_id) ? 'checked' : '';
+
+        rowsHTML += `
+            <tr>
+                <td class="checkbox-cell">
+                    <input type="checkbox" 
+                           class="call-checkbox" 
+                           value="${call.call_id}" 
+                           ${isChecked}
+                           onchange="toggleCallSelection('${call.call_id}')">
+                </td>
+                <td onclick="viewCall('${call.call_id}')"><strong>${call.call_id}</strong>${overrideBadge}</td>
+                <td onclick="viewCall('${call.call_id}')">${call.member_id}</td>
+                <td onclick="viewCall('${call.call_id}')">${formattedDate}</td>
+                <td onclick="viewCall('${call.call_id}')"><span class="score-badge ${scoreClass}">${call.total_score}/60</span></td>
+            </tr>
+        `;
+    });
+
+    document.getElementById('ccrCallsTableBody').insertAdjacentHTML('beforeend', rowsHTML);
+
+    ccrCallsLoadedCount += callsData.count;
+    ccrCallsNextCursor = callsData.next_cursor;
+    const more = ccrCallsNextCursor ? '+' : '';
+    document.getElementById('ccrCallsTitle').textContent =
+        `All Calls (${ccrCallsLoadedCount}${more}) - Select up to 4 to compare`;
+    renderLoadMore(document.getElementById('ccrLoadMore'), ccrCallsNextCursor, 'loadMoreCCRCalls');
+}
+
+// SUMMARY: Fetch and append the next page of calls in CCR view
+async function loadMoreCCRCalls(button) {
+    if (!ccrCallsNextCursor || !currentCCRId) return;
+    const ccrId = currentCCRId;
+    button.disabled = true;
+    button.textContent = 'Loading...';
+
+    try {
+        const data = await fetchCallsPage({ call_center_rep_id: ccrId }, ccrCallsNextCursor);
+        // Ignore the page if the user switched CCRs meanwhile
+        if (ccrId === currentCCRId) {
+            appendCCRCallsPage(data);
+        }
+    } catch (error) {
+        button.disabled = false;
+        button.textContent = 'Load more calls';
+        alert(`Error: ${error.message}`);
+    }
+}
+
+// SUMMARY: View call details
+// Fetches and displays full call information including transcript and scorecard
+async function viewCall(callId) {
+    const detailView = document.getElementById('callDetailView');
+    const allCallsView = document.getElementById('allCallsView');
+    const ccrView = document.getElementById('ccrView');
+    const contentDiv = document.getElementById('callDetailContent');
+
+    contentDiv.innerHTML = '<div class="loading">Loading call details...</div>';
+    allCallsView.style.display = 'none';
+    ccrView.style.display = 'none';
+    detailView.style.display = 'block';
+
+    try {
+        const response = await fetch(`/api/calls/${callId}`);
+        const call = await response.json();
+
+        if (!response.ok) {
+            throw new Error(call.detail || 'Failed to load call details');
+        }
+
+        // Store current call data for editing
+        currentCallData = call;
+
+        const scoreClass = getScoreClass(call.total_score);
+        const formattedDate = formatDate(call.call_date);
+
+        // Format the transcript as a conversation
+        const formattedTranscript = formatTranscriptAsConversation(call.transcript);
+
+        // Check if there's a human evaluation
+        const hasOverride = call.has_human_override || false;
+        const humanEval = call.human_evaluation || null;
+
+        let detailHTML = `
+            <div class="call-header">
+                <h2>Call Details ${hasOverride ? '<span class="human-override-badge">✏️ REVIEWED</span>' : ''}</h2>
+                <div class="call-metadata">
+                    <div class="metadata-item">
+                        <span class="metadata-label">Call ID</span>
+                        <span class="metadata-value">${call.call_id}</span>
+                    </div>
+                    <div class="metadata-item">
+                        <span class="metadata-label">Member ID</span>
+                        <span class="metadata-value">${call.member_id}</span>
+                    </div>
+                    <div class="metadata-item">
+                        <span class="metadata-label">Call Date</span>
+                        <span class="metadata-value">${formattedDate}</span>
+                    </div>
+                    <div class="metadata-item">
+                        <span class="metadata-label">CCR ID</span>
+                        <span class="metadata-value">${call.call_center_rep_id || 'N/A'}</span>
+                    </div>
+                </div>
+            </div>`;
+
+        // Show human evaluation metadata if exists
+        if (hasOverride && humanEval) {
+            detailHTML += `
+                <div class="evaluation-metadata">
+                    <h4>👤 Human Evaluation</h4>
+                    <p><strong>Reviewed by:</strong> ${humanEval.evaluator_name || 'N/A'}</p>
+                    <p><strong>Review Date:</strong> ${formatDate(humanEval.evaluation_date)}</p>
+                    ${humanEval.feedback_text ? `
+                        <p><strong>Feedback:</strong></p>
+                        <div class="feedback-box">${escapeHtml(humanEval.feedback_text)}</div>
+                    ` : ''}
+                </div>
+            `;
+        }
+
+        detailHTML += `
+            <div class="total-score-section">
+                <h3>Total Quality Score ${hasOverride ? '(Human Reviewed)' : '(AI Generated)'}</h3>
+                <div class="total-score-value">${call.total_score}/60</div>
+                <button class="edit-evaluation-btn" onclick="openEvaluationModal()">
+                    ${hasOverride ? '✏️ Edit Evaluation' : '✏️ Override & Review'}
+                </button>
+            </div>`;
+
+        // Display transcript summary if available
+        if (call.transcript_summary) {
+            detailHTML += `
+                <div class="section">
+                    <h3 class="section-title">📋 Call Summary</h3>
+                    <div class="call-header" style="margin-bottom: 0;">
+                        <p style="line-height: 1.8; color: #333; font-size: 1rem;">${escapeHtml(call.transcript_summary)}</p>
+                    </div>
+                </div>
+            `;
+        }
+
+        detailHTML += `
+            <div class="section">
+                <h3 class="section-title">💬 Call Transcript</h3>
+                <div class="transcript-box">
+                    <div class="conversation">
+                        ${formattedTranscript}
+                    </div>
+                </div>
+            </div>
+
+            <div class="section">
+                <h3 class="section-title">📊 Quality Scorecard</h3>
+                <div class="scorecard">
+        `;
+
+        // Criteria 1: Technical Aspects
+        if (call.scorecard.criteria_1) {
+            const technical = call.scorecard.criteria_1.technical_aspects;
+            detailHTML += `
+                <div class="criteria-section">
+                    <div class="criteria-header" onclick="toggleCriteria(this)">
+                        <span>Criteria 1: Technical Aspects</span>
+                        <span class="criteria-toggle">−</span>
+                    </div>
+                    <div class="criteria-content">
+                        <div class="score-item">
+                            <span class="score-name">Recording Disclosure</span>
+                            <span class="score-value ${getScoreClass(technical.recording_disclosure.score * 6)}">${technical.recording_disclosure.score}/10</span>
+                        </div>
+                        <div class="score-item">
+                            <span class="score-name">Member Authentication</span>
+                            <span class="score-value ${getScoreClass(technical.member_authentication.score * 6)}">${technical.member_authentication.score}/10</span>
+                        </div>
+                        <div class="score-item">
+                            <span class="score-name">Call Closing</span>
+                            <span class="score-value ${getScoreClass(technical.call_closing.score * 6)}">${technical.call_closing.score}/10</span>
+                        </div>
+                    </div>
+                </div>
+            `;
+        }
+
+        // Criteria 2: Quality of Service
+        if (call.scorecard.criteria_2) {
+            const quality = call.scorecard.criteria_2.quality_of_service;
+            detailHTML += `
+                <div class="criteria-section">
+                    <div class="criteria-header" onclick="toggleCriteria(this)">
+                        <span>Criteria 2: Quality of Service</span>
+                        <span class="criteria-toggle">−</span>
+                    </div>
+                    <div class="criteria-content">
+                        <div class="score-item">
+                            <span class="score-name">Professionalism</span>
+                            <span class="score-value ${getScoreClass(quality.professionalism.score * 6)}">${quality.professionalism.score}/10</span>
+                        </div>
+                        <div class="score-item">
+                            <span class="score-name">Program Information</span>
+                            <span class="score-value ${getScoreClass(quality.program_information.score * 6)}">${quality.program_information.score}/10</span>
+                        </div>
+                        <div class="score-item">
+                            <span class="score-name">Demeanor</span>
+                            <span class="score-value ${getScoreClass(quality.demeanor.score * 6)}">${quality.demeanor.score}/10</span>
+                        </div>
+                    </div>
+                </div>
+            `;
+        }
+
+        detailHTML += `
+                </div>
+            </div>
+        `;
+
+        contentDiv.innerHTML = detailHTML;
+
+    } catch (error) {
+        contentDiv.innerHTML = `
+            <div class="error">
+                <strong>Error:</strong> ${error.message}
+            </div>
+        `;
+    }
+}
+
+// SUMMARY: Apply filters to All Calls View
+// Collects filter values from form inputs and reloads the calls list
+function applyFilters() {
+    currentFilters = {
+        member_id: document.getElementById('memberIdFilter').value,
+        min_score: document.getElementById('minScoreFilter').value,
+        start_date: document.getElementById('startDateFilter').value,
+        end_date: document.getElementById('endDateFilter').value,
+        call_center_rep_id: document.getElementById('ccrFilter').value
+    };
+
+    // Remove empty values
+    Object.keys(currentFilters).forEach(key => {
+        if (!currentFilters[key]) delete currentFilters[key];
+    });
+
+    loadCalls();
+}
+
+// SUMMARY: Clear all filters
+// Resets all filter inputs and reloads the full calls list
+function clearFilters() {
+    document.getElementById('memberIdFilter').value = '';
+    document.getElementById('minScoreFilter').value = '';
+    document.getElementById('startDateFilter').value = '';
+    document.getElementById('endDateFilter').value = '';
+    document.getElementById('ccrFilter').value = '';
+    currentFilters = {};
+    loadCalls();
+}
+
+function toggleCriteria(header) {
+    const content = header.nextElementSibling;
+    const toggle = header.querySelector('.criteria-toggle');
+
+    if (content.classList.contains('collapsed')) {
+        content.classList.remove('collapsed');
+        toggle.textContent = '−';
+    } else {
+        content.classList.add('collapsed');
+        toggle.textContent = '+';
+    }
+}
+
+function getScoreClass(score) {
+    // For total score out of 60
+    const percentage = (score / 60) * 100;
+    if (percentage >= 70) return 'score-high';
+    if (percentage >= 50) return 'score-medium';
+    return 'score-low';
+}
+
+function formatDate(dateString) {
+    if (!dateString) return 'N/A';
+    const date = new Date(dateString);
+    return date.toLocaleString('en-US', {
+        year: 'numeric',
+        month: 'short',
+        day: 'numeric',
+        hour: '2-digit',
+        minute: '2-digit'
+    });
+}
+
+/**
+ * Format transcript as an iMessage-style conversation
+ * Parses bracketed format: [Rep: message] [Customer: message]
+ */
+function formatTranscriptAsConversation(transcript) {
+    if (!transcript) return '<p>No transcript available</p>';
+
+    let messages = [];
+
+    // Parse bracketed format: [Rep: ...] [Customer: ...]
+    // Match all bracketed messages with speaker labels
+    const bracketPattern = /\[(Rep|Customer|Agent|Representative|Member|Caller|CSR):\s*([^\]]+)\]/gi;
+    const matches = [...transcript.matchAll(bracketPattern)];
+
+    if (matches.length > 0) {
+        // Found bracketed format - use it
+        matches.forEach(match => {
+            const speaker = match[1].toLowerCase();
+            const text = match[2].trim();
+
+            // Determine speaker type (agent vs customer)
+            const speakerType = (speaker === 'agent' || speaker === 'representative' || speaker === 'rep' || speaker === 'csr') 
+                ? 'agent' 
+                : 'customer';
+
+            if (text) {
+                messages.push({
+                    speaker: speakerType,
+                    text: text
+                });
+            }
+        });
+    } else {
+        // Fallback: Try line-based parsing for non-bracketed format
+        const lines = transcript.split('\n').filter(line => line.trim());
+        let currentSpeaker = null;
+        let currentMessage = '';
+
+        lines.forEach(line => {
+            line = line.trim();
+
+            // Try to detect speaker changes (common patterns)
+            const speakerMatch = line.match(/^(Agent|Customer|Representative|Member|Caller|Rep|CSR)[\s:]/i);
+
+            if (speakerMatch) {
+                // Save previous message if exists
+                if (currentMessage && currentSpeaker) {
+                    messages.push({
+                        speaker: currentSpeaker,
+                        text: currentMessage.trim()
+                    });
+                }
+
+                // Determine speaker type
+                const speaker = speakerMatch[1].toLowerCase();
+                currentSpeaker = (speaker === 'agent' || speaker === 'representative' || speaker === 'rep' || speaker === 'csr') 
+                    ? 'agent' 
+                    : 'customer';
+
+                // Remove speaker label from line
+                currentMessage = line.replace(/^(Agent|Customer|Representative|Member|Caller|Rep|CSR)[\s:]+/i, '');
+            } else if (currentSpeaker) {
+                // Continue current speaker's message
+                currentMessage += ' ' + line;
+            } else {
+                // No speaker identified yet, start with agent
+                if (messages.length === 0) {
+                    currentSpeaker = 'agent';
+                    currentMessage = line;
+                }
+            }
+        });
+
+        // Add final message
+        if (currentMessage && currentSpeaker) {
+            messages.push({
+                speaker: currentSpeaker,
+                text: currentMessage.trim()
+            });
+        }
+    }
+
+    // If still no messages, use simple alternating split
+    if (messages.length === 0) {
+        const sentences = transcript.match(/[^.!?]+[.!?]+/g) || [transcript];
+        sentences.forEach((sentence, index) => {
+            messages.push({
+                speaker: index % 2 === 0 ? 'agent' : 'customer',
+                text: sentence.trim()
+            });
+        });
+    }
+
+    // Build HTML for messages
+    let html = '';
+    messages.forEach(msg => {
+        if (msg.text) {
+            const speakerLabel = msg.speaker === 'agent' ? 'Agent' : 'Customer';
+            html += `
+                <div class="message ${msg.speaker}">
+                    <div class="message-header">${speakerLabel}</div>
+                    <div class="message-bubble">${escapeHtml(msg.text)}</div>
+                </div>
+            `;
+        }
+    });
+
+    return html || '<p>No transcript available</p>';
+}
+
+/**
+ * Escape HTML to prevent XSS
+ */
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+// SUMMARY: Human Evaluation Modal Functions
+// Functions to handle opening, closing, saving, and deleting human evaluations
+
+function openEvaluationModal() {
+    if (!currentCallData) return;
+
+    const modal = document.getElementById('evaluationModal');
+    const deleteBtn = document.getElementById('deleteBtn');
+
+    // Check if there's an existing human evaluation
+    const humanEval = currentCallData.human_evaluation;
+
+    if (humanEval) {
+        // Populate form with existing evaluation
+        document.getElementById('evaluatorName').value = humanEval.evaluator_name || '';
+        document.getElementById('feedbackText').value = humanEval.feedback_text || '';
+
+        // Populate scores from override
+        const overrides = humanEval.scorecard_overrides || {};
+        if (overrides.criteria_1 && overrides.criteria_1.technical_aspects) {
+            const tech = overrides.criteria_1.technical_aspects;
+            document.getElementById('score_recording_disclosure').value = tech.recording_disclosure?.score || 0;
+            document.getElementById('score_member_authentication').value = tech.member_authentication?.score || 0;
+            document.getElementById('score_call_closing').value = tech.call_closing?.score || 0;
+        }
+        if (overrides.criteria_2 && overrides.criteria_2.quality_of_service) {
+            const qual = overrides.criteria_2.quality_of_service;
+            document.getElementById('score_professionalism').value = qual.professionalism?.score || 0;
+            document.getElementById('score_program_information').value = qual.program_information?.score || 0;
+            document.getElementById('score_demeanor').value = qual.demeanor?.score || 0;
+        }
+
+        deleteBtn.style.display = 'block';
+    } else {
+        // Populate form with AI scores as starting point
+        const scorecard = currentCallData.scorecard || {};
+
+        document.getElementById('evaluatorName').value = '';
+        document.getElementById('feedbackText').value = '';
+
+        if (scorecard.criteria_1 && scorecard.criteria_1.technical_aspects) {
+            const tech = scorecard.criteria_1.technical_aspects;
+            document.getElementById('score_recording_disclosure').value = tech.recording_disclosure?.score || 0;
+            document.getElementById('score_member_authentication').value = tech.member_authentication?.score || 0;
+            document.getElementById('score_call_closing').value = tech.call_closing?.score || 0;
+        }
+        if (scorecard.criteria_2 && scorecard.criteria_2.quality_of_service) {
+            const qual = scorecard.criteria_2.quality_of_service;
+            document.getElementById('score_professionalism').value = qual.professionalism?.score || 0;
+            document.getElementById('score_program_information').value = qual.program_information?.score || 0;
+            document.getElementById('score_demeanor').value = qual.demeanor?.score || 0;
+        }
+
+        deleteBtn.style.display = 'none';
+    }
+
+    calculateTotalScore();
+    modal.classList.add('active');
+}
+
+function closeEvaluationModal() {
+    const modal = document.getElementById('evaluationModal');
+    modal.classList.remove('active');
+}
+
+function calculateTotalScore() {
+    const scores = [
+        parseInt(document.getElementById('score_recording_disclosure').value) || 0,
+        parseInt(document.getElementById('score_member_authentication').value) || 0,
+        parseInt(document.getElementById('score_call_closing').value) || 0,
+        parseInt(document.getElementById('score_professionalism').value) || 0,
+        parseInt(document.getElementById('score_program_information').value) || 0,
+        parseInt(document.getElementById('score_demeanor').value) || 0
+    ];
+
+    const total = scores.reduce((a, b) => a + b, 0);
+    document.getElementById('totalScore').value = total;
+}
+
+async function saveEvaluation(event) {
+    event.preventDefault();
+
+    if (!currentCallData) return;
+
+    const evaluatorName = document.getElementById('evaluatorName').value;
+    const feedbackText = document.getElementById('feedbackText').value;
+
+    const scorecardOverrides = {
+        criteria_1: {
+            technical_aspects: {
+                recording_disclosure: { score: parseInt(document.getElementById('score_recording_disclosure').value) },
+                member_authentication: { score: parseInt(document.getElementById('score_member_authentication').value) },
+                call_closing: { score: parseInt(document.getElementById('score_call_closing').value) }
+            }
+        },
+        criteria_2: {
+            quality_of_service: {
+                professionalism: { score: parseInt(document.getElementById('score_professionalism').value) },
+                program_information: { score: parseInt(document.getElementById('score_program_information').value) },
+                demeanor: { score: parseInt(document.getElementById('score_demeanor').value) }
+            }
+        }
+    };
+
+    const totalScore = parseInt(document.getElementById('totalScore').value);
+
+    try {
+        const response = await fetch(`/api/evaluations/${currentCallData.call_id}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                evaluator_name: evaluatorName,
+                scorecard_overrides: scorecardOverrides,
+                total_score_override: totalScore,
+                feedback_text: feedbackText
+            })
+        });
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || 'Failed to save evaluation');
+        }
+
+        // Close modal and reload call details
+        closeEvaluationModal();
+        viewCall(currentCallData.call_id);
+
+        // Show success message
+        alert('Evaluation saved successfully!');
+
+    } catch (error) {
+        alert('Error saving evaluation: ' + error.message);
+    }
+}
+
+async function deleteEvaluation() {
+    if (!currentCallData) return;
+
+    if (!confirm('Are you sure you want to delete this evaluation and revert to AI scores?')) {
+        return;
+    }
+
+    try {
+        const response = await fetch(`/api/evaluations/${currentCallData.call_id}`, {
+            method: 'DELETE'
+        });
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || 'Failed to delete evaluation');
+        }
+
+        // Close modal and reload call details
+        closeEvaluationModal();
+        viewCall(currentCallData.call_id);
+
+        // Show success message
+        alert('Evaluation deleted successfully!');
+
+    } catch (error) {
+        alert('Error deleting evaluation: ' + error.message);
+    }
+}
+
+// Close modal when clicking outside
+window.onclick = function(event) {
+    const modal = document.getElementById('evaluationModal');
+    if (event.target === modal) {
+        closeEvaluationModal();
+    }
+}
+
+// SUMMARY: Agent Assistant Functions
+// Handle AI agent sidebar and chat functionality
+
+let agentMessages = [];
+let isAgentPanelOpen = false;
+
+function toggleAgentPanel() {
+    const panel = document.getElementById('agentPanel');
+    const mainContent = document.getElementById('mainContent');
+    const agentBtn = document.getElementById('agentBtn');
+
+    isAgentPanelOpen = !isAgentPanelOpen;
+
+    if (isAgentPanelOpen) {
+        panel.classList.add('open');
+        mainContent.classList.add('split');
+        agentBtn.classList.add('active');
+        // Focus on input
+        setTimeout(() => {
+            document.getElementById('agentInput').focus();
+        }, 300);
+    } else {
+        panel.classList.remove('open');
+        mainContent.classList.remove('split');
+        agentBtn.classList.remove('active');
+    }
+}
+
+async function sendAgentMessage(event) {
+    event.preventDefault();
+
+    const input = document.getElementById('agentInput');
+    const sendBtn = document.getElementById('agentSendBtn');
+    const chatContainer = document.getElementById('agentChatContainer');
+    const message = input.value.trim();
+
+    if (!message) return;
+
+    // Remove welcome message if it exists
+    const welcomeMsg = chatContainer.querySelector('.agent-welcome');
+    if (welcomeMsg) {
+        welcomeMsg.remove();
+    }
+
+    // Add user message to UI
+    addAgentMessage('user', message);
+    agentMessages.push({ role: 'user', content: message });
+
+    // Clear input and disable send button
+    input.value = '';
+    sendBtn.disabled = true;
+
+    // Add typing indicator
+    const typingDiv = document.createElement('div');
+    typingDiv.className = 'agent-message assistant';
+    typingDiv.id = 'typing-indicator';
+    typingDiv.innerHTML = `
+        <div class="agent-message-bubble">
+            <div class="agent-typing">
+                <div class="agent-typing-dot"></div>
+                <div class="agent-typing-dot"></div>
+                <div class="agent-typing-dot"></div>
+            </div>
+        </div>
+    `;
+    chatContainer.appendChild(typingDiv);
+    chatContainer.scrollTop = chatContainer.scrollHeight;
+
+    try {
+        // Call agent endpoint, asking for a streamed response
+        const response = await fetch('/api/agent/chat', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                messages: agentMessages,
+                stream: true
+            })
+        });
+
+        if (!response.ok) {
+            typingDiv.remove();
+            const error = await response.json();
+            throw new Error(error.detail || 'Failed to get response from agent');
+        }
+
+        let assistantMessage = '';
+        const contentType = response.headers.get('Content-Type') || '';
+
+        if (contentType.includes('text/event-stream') && response.body) {
+            // Render tokens as they arrive
+            assistantMessage = await readAgentStream(response, typingDiv);
+        } else {
+            // Endpoint answered with a single JSON document
+            typingDiv.remove();
+            const data = await response.json();
+            console.log('Agent response:', data);
+            assistantMessage = extractAgentText(data);
+
+            // Fallback to pretty JSON if we couldn't extract text
+            if (!assistantMessage) {
+                console.error('Could not extract text from response, showing full object:', data);
+                assistantMessage = 'Response received but could not extract text. Full response:\n\n```json\n' + 
+                                 JSON.stringify(data, null, 2) + 
+                                 '\n```';
+            }
+            addAgentMessage('assistant', assistantMessage);
+        }
+
+        console.log('Extracted message:', assistantMessage);
+        agentMessages.push({ role: 'assistant', content: assistantMessage });
+
+    } catch (error) {
+        // Remove typing indicator
+        const typing = document.getElementById('typing-indicator');
+        if (typing) typing.remove();
+
+        // Show error message
+        addAgentMessage('assistant', `Sorry, I encountered an error: ${error.message}`);
+    } finally {
+        // Re-enable send button
+        sendBtn.disabled = false;
+        input.focus();
+    }
+}
+
+// SUMMARY: Extract assistant text from an agent response object
+// Recursively searches common text fields, preferring the latest item in arrays
+function extractAgentText(obj, depth = 0) {
+    if (depth > 5) return null; // Prevent infinite recursion
+
+    if (typeof obj === 'string') {
+        return obj;
+    }
+
+    if (!obj || typeof obj !== 'object') {
+        return null;
+    }
+
+    // Common field names for text content
+    const textFields = ['content', 'text', 'message', 'response', 'answer', 'output'];
+    for (const field of textFields) {
+        if (obj[field]) {
+            const extracted = extractAgentText(obj[field], depth + 1);
+            if (extracted) return extracted;
+        }
+    }
+
+    // Check if it's an array
+    if (Array.isArray(obj) && obj.length > 0) {
+        // Try to get the last item (usually the latest message)
+        const lastItem = obj[obj.length - 1];
+        const extracted = extractAgentText(lastItem, depth + 1);
+        if (extracted) return extracted;
+    }
+
+    return null;
+}
+
+// SUMMARY: Read a server-sent event stream from the agent
+// Appends text deltas to an assistant bubble as they arrive and returns the full text
+async function readAgentStream(response, typingDiv) {
+    const chatContainer = document.getElementById('agentChatContainer');
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+    let finalText = null;
+    let bubble = null;
+
+    const render = () => {
+        if (!bubble) {
+            typingDiv.remove();
+            bubble = addAgentMessage('assistant', '');
+        }
+        try {
+            bubble.innerHTML = typeof marked !== 'undefined' ? marked.parse(text) : escapeHtml(text);
+        } catch (e) {
+            bubble.textContent = text;
+        }
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+    };
+
+    const handleEvent = (rawEvent) => {
+        let eventName = 'message';
+        const dataLines = [];
+        rawEvent.split('\n').forEach(line => {
+            if (line.startsWith('event:')) eventName = line.slice(6).trim();
+            else if (line.startsWith('data:')) dataLines.push(line.slice(5).trimStart());
+        });
+        const payload = dataLines.join('\n');
+        if (!payload || payload === '[DONE]') return;
+
+        let event;
+        try {
+            event = JSON.parse(payload);
+        } catch (e) {
+            return;
+        }
+
+        if (eventName === 'error') {
+            throw new Error(event.detail || 'Agent stream failed');
+        }
+
+        // Responses-style deltas, then chat-completions-style deltas
+        let delta = null;
+        if (typeof event.delta === 'string') {
+            delta = event.delta;
+        } else if (event.choices && event.choices[0] && event.choices[0].delta) {
+            delta = event.choices[0].delta.content || null;
+        }
+
+        if (delta) {
+            text += delta;
+            render();
+        } else if (event.item || event.response) {
+            // Completed item/response events carry the full text
+            const extracted = extractAgentText(event.item || event.response);
+            if (extracted) finalText = extracted;
+        }
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, '\n');
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            handleEvent(buffer.slice(0, boundary));
+            buffer = buffer.slice(boundary + 2);
+        }
+    }
+    if (buffer.trim()) handleEvent(buffer);
+
+    // No deltas streamed: show the completed text in one go
+    if (!text && finalText) {
+        text = finalText;
+        render();
+    }
+    if (!text) {
+        typingDiv.remove();
+        text = 'Response received but could not extract text.';
+        render();
+    }
+
+    return text;
+}
+
+function addAgentMessage(role, content) {
+    const chatContainer = document.getElementById('agentChatContainer');
+
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `agent-message ${role}`;
+
+    const bubbleDiv = document.createElement('div');
+    bubbleDiv.className = 'agent-message-bubble';
+
+    // For assistant messages, parse markdown and render as HTML
+    if (role === 'assistant' && typeof marked !== 'undefined') {
+        try {
+            bubbleDiv.innerHTML = marked.parse(content);
+        } catch (e) {
+            console.error('Error parsing markdown:', e);
+            bubbleDiv.textContent = content;
+        }
+    } else {
+        // For user messages, use plain text
+        bubbleDiv.textContent = content;
+    }
+
+    messageDiv.appendChild(bubbleDiv);
+    chatContainer.appendChild(messageDiv);
+
+    // Scroll to bottom
+    chatContainer.scrollTop = chatContainer.scrollHeight;
+
+    return bubbleDiv;
+}
+
+// Clear chat history when closing panel (optional)
+document.getElementById('agentPanel').addEventListener('transitionend', function() {
+    if (!isAgentPanelOpen) {
+        // Optional: clear chat history when closing
+        // agentMessages = [];
+        // const chatContainer = document.getElementById('agentChatContainer');
+        // chatContainer.innerHTML = `
+        //     <div class="agent-welcome">
+        //         <div class="agent-welcome-icon">👋</div>
+        //         <h4>Hello! I'm your AI Assistant</h4>
+        //         <p>Ask me anything about call center analytics, quality scores, or specific calls.</p>
+        //     </div>
+        // `;
+    }
+});
+
+// SUMMARY: Call Selection and Comparison Functions
+// Handle selecting calls for side-by-side comparison
+
+function toggleCallSelection(callId) {
+    if (selectedCallIds.has(callId)) {
+        selectedCallIds.delete(callId);
+    } else {
+        if (selectedCallIds.size >= 4) {
+            alert('You can only compare up to 4 calls at a time.');
+            // Uncheck the checkbox
+            const checkbox = document.querySelector(`input[value="${callId}"]`);
+            if (checkbox) checkbox.checked = false;
+            return;
+        }
+        selectedCallIds.add(callId);
+    }
+    updateComparisonButton();
+}
+
+function toggleSelectAll() {
+    const selectAllCheckbox = document.getElementById('selectAllCheckbox');
+    const checkboxes = document.querySelectorAll('.call-checkbox');
+
+    if (selectAllCheckbox.checked) {
+        // Select up to 4 calls
+        selectedCallIds.clear();
+        let count = 0;
+        checkboxes.forEach(cb => {
+            if (count < 4) {
+                cb.checked = true;
+                selectedCallIds.add(cb.value);
+                count++;
+            } else {
+                cb.checked = false;
+            }
+        });
+    } else {
+        // Deselect all
+        selectedCallIds.clear();
+        checkboxes.forEach(cb => cb.checked = false);
+    }
+
+    updateComparisonButton();
+}
+
+function updateComparisonButton() {
+    const countDisplay = document.getElementById('selectedCount');
+    const compareBtn = document.getElementById('compareBtn');
+
+    const count = selectedCallIds.size;
+    countDisplay.textContent = `${count} call${count !== 1 ? 's' : ''} selected`;
+
+    compareBtn.disabled = count < 2;
+}
+
+// SUMMARY: Show side-by-side comparison
+// Fetches full details for selected calls and displays them in a comparison grid
+async function showComparison() {
+    if (selectedCallIds.size < 2) {
+        alert('Please select at least 2 calls to compare.');
+        return;
+    }
+
+    const comparisonView = document.getElementById('comparisonView');
+    const ccrView = document.getElementById('ccrView');
+    const contentDiv = document.getElementById('comparisonContent');
+
+    ccrView.style.display = 'none';
+    comparisonView.style.display = 'block';
+    contentDiv.innerHTML = '<div class="loading">Loading comparison data...</div>';
+
+    try {
+        // Fetch all selected calls in one batch request
+        const response = await fetch('/api/calls/batch', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                call_ids: Array.from(selectedCallIds),
+                include_summary: true
+            })
+        });
+        const data = await response.json();
+
+        if (!response.ok) {
+            throw new Error(data.detail || 'Failed to load comparison data');
+        }
+
+        const calls = data.calls;
+
+        // Build comparison grid
+        let html = '<div class="comparison-grid">';
+
+        calls.forEach(call => {
+            const scoreClass = getScoreClass(call.total_score);
+            const formattedDate = formatDate(call.call_date);
+            const overrideBadge = call.has_human_override ? '<span class="human-override-badge">✏️ REVIEWED</span>' : '';
+
+            // Get scores
+            const scorecard = call.scorecard || {};
+            const tech = scorecard.criteria_1?.technical_aspects || {};
+            const qual = scorecard.criteria_2?.quality_of_service || {};
+
+            html += `
+                <div class="comparison-card">
+                    <div class="comparison-card-header">
+                        <h3>${call.call_id}${overrideBadge}</h3>
+                        <div class="date">${formattedDate}</div>
+                    </div>
+                    <div class="comparison-card-body">
+                        <div class="comparison-score-display">
+                            <div class="label">Total Score</div>
+                            <div class="value ${scoreClass}">${call.total_score}/60</div>
+                        </div>
+
+                        <div class="comparison-criteria">
+                            <div class="comparison-criteria-title">Technical Aspects</div>
+                            <div class="comparison-score-row">
+                                <span class="name">Recording Disclosure</span>
+                                <span class="score">${tech.recording_disclosure?.score || 0}/10</span>
+                            </div>
+                            <div class="comparison-score-row">
+                                <span class="name">Member Authentication</span>
+                                <span class="score">${tech.member_authentication?.score || 0}/10</span>
+                            </div>
+                            <div class="comparison-score-row">
+                                <span class="name">Call Closing</span>
+                                <span class="score">${tech.call_closing?.score || 0}/10</span>
+                            </div>
+                        </div>
+
+                        <div class="comparison-criteria">
+                            <div class="comparison-criteria-title">Quality of Service</div>
+                            <div class="comparison-score-row">
+                                <span class="name">Professionalism</span>
+                                <span class="score">${qual.professionalism?.score || 0}/10</span>
+                            </div>
+                            <div class="comparison-score-row">
+                                <span class="name">Program Information</span>
+                                <span class="score">${qual.program_information?.score || 0}/10</span>
+                            </div>
+                            <div class="comparison-score-row">
+                                <span class="name">Demeanor</span>
+                                <span class="score">${qual.demeanor?.score || 0}/10</span>
+                            </div>
+                        </div>
+            `;
+
+            // Add transcript summary if available
+            if (call.transcript_summary) {
+                html += `
+                        <div style="margin-top: 20px; flex: 1;">
+                            <div class="comparison-transcript-title">Call Summary</div>
+                            <div class="comparison-transcript">
+                                ${escapeHtml(call.transcript_summary)}
+                            </div>
+                        </div>
+                `;
+            }
+
+            html += `
+                        <div class="comparison-card-footer">
+                            <button class="btn-primary" style="width: 100%;" onclick="viewCall('${call.call_id}')">
+                                View Full Details
+                            </button>
+                        </div>
+                    </div>
+                </div>
+            `;
+        });
+
+        html += '</div>';
+
+        // Add insights section
+        html += generateComparisonInsights(calls);
+
+        contentDiv.innerHTML = html;
+
+    } catch (error) {
+        contentDiv.innerHTML = `
+            <div class="error">
+                <strong>Error:</strong> ${error.message}
+            </div>
+        `;
+    }
+}
+
+// SUMMARY: Generate insights from comparison
+// Analyzes the compared calls and provides insights on trends and patterns
+function generateComparisonInsights(calls) {
+    const scores = calls.map(c => c.total_score);
+    const avgScore = (scores.reduce((a, b) => a + b, 0) / scores.length).toFixed(1);
+    const minScore = Math.min(...scores);
+    const maxScore = Math.max(...scores);
+    const scoreRange = maxScore - minScore;
+
+    // Find which criteria have the most variation
+    const criteria = [
+        { name: 'Recording Disclosure', path: c => c.scorecard?.criteria_1?.technical_aspects?.recording_disclosure?.score },
+        { name: 'Member Authentication', path: c => c.scorecard?.criteria_1?.technical_aspects?.member_authentication?.score },
+        { name: 'Call Closing', path: c => c.scorecard?.criteria_1?.technical_aspects?.call_closing?.score },
+        { name: 'Professionalism', path: c => c.scorecard?.criteria_2?.quality_of_service?.professionalism?.score },
+        { name: 'Program Information', path: c => c.scorecard?.criteria_2?.quality_of_service?.program_information?.score },
+        { name: 'Demeanor', path: c => c.scorecard?.criteria_2?.quality_of_service?.demeanor?.score }
+    ];
+
+    let insights = '<div class="section" style="margin-top: 30px;">';
+    insights += '<h3 class="section-title">📈 Insights & Trends</h3>';
+    insights += '<div class="ccr-stats-grid">';
+    insights += `
+        <div class="ccr-stat-card">
+            <div class="ccr-stat-label">Average Score</div>
+            <div class="ccr-stat-value">${avgScore}/60</div>
+        </div>
+        <div class="ccr-stat-card">
+            <div class="ccr-stat-label">Score Range</div>
+            <div class="ccr-stat-value">${scoreRange}</div>
+        </div>
+        <div class="ccr-stat-card">
+            <div class="ccr-stat-label">Lowest Score</div>
+            <div class="ccr-stat-value">${minScore}/60</div>
+        </div>
+        <div class="ccr-stat-card">
+            <div class="ccr-stat-label">Highest Score</div>
+            <div class="ccr-stat-value">${maxScore}/60</div>
+        </div>
+    `;
+    insights += '</div>';
+
+    // Add trend analysis
+    insights += '<div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin-top: 20px;">';
+    insights += '<h4 style="margin-bottom: 15px; color: #667eea;">Performance Patterns</h4>';
+
+    if (scoreRange <= 5) {
+        insights += '<p>✅ <strong>Consistent Performance:</strong> Scores are very consistent across calls (range: ' + scoreRange + ' points).</p>';
+    } else if (scoreRange <= 15) {
+        insights += '<p>⚠️ <strong>Moderate Variation:</strong> Some variation in performance (range: ' + scoreRange + ' points). Review lower-scoring calls for improvement areas.</p>';
+    } else {
+        insights += '<p>🔴 <strong>High Variation:</strong> Significant variation in performance (range: ' + scoreRange + ' points). This indicates inconsistent service quality.</p>';
+    }
+
+    insights += '</div></div>';
+
+    return insights;
+}
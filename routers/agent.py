@@ -1,14 +1,58 @@
 """
 Router for Databricks Agent Assistant integration.
+
+Agent calls go through one module-level requests.Session, so TCP/TLS connections
+to the serving endpoint are pooled and reused across chats. The blocking HTTP
+calls run in the threadpool to keep the event loop free, and streamed agent
+output is relayed to the browser chunk by chunk.
+
+A streamed chat occupies a threadpool thread for as long as it waits on the
+agent, and AnyIO's default threadpool has 40 threads shared by the whole app.
+Chats are therefore capped at AGENT_MAX_CONCURRENT at a time, below that
+limit; further chats get 503 with Retry-After instead of starving other
+endpoints. The HTTP pool keeps one keep-alive connection per chat slot.
+
+Optional environment variables:
+    AGENT_MAX_CONCURRENT     chats (streamed or not) in progress at once (default 32)
+    AGENT_HTTP_POOL_SIZE     keep-alive connections kept per host (default AGENT_MAX_CONCURRENT)
+    AGENT_CONNECT_TIMEOUT    seconds to establish a connection (default 10)
+    AGENT_READ_TIMEOUT       seconds to wait between bytes from the agent (default 120)
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
+from starlette.types import Receive, Scope, Send
 from pydantic import BaseModel
-from typing import List, Optional
+from requests.adapters import HTTPAdapter
+from typing import List, Optional, AsyncIterator
+import asyncio
+import json
+import logging
 import os
 import requests
 
+from services.token_provider import DatabricksTokenProvider, TokenProviderError
+
 router = APIRouter(prefix="/api/agent", tags=["agent"])
 
+logger = logging.getLogger(__name__)
+
+_max_concurrent = max(1, int(os.getenv("AGENT_MAX_CONCURRENT", "32")))
+_chat_slots = asyncio.Semaphore(_max_concurrent)
+
+_pool_size = int(os.getenv("AGENT_HTTP_POOL_SIZE", str(_max_concurrent)))
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=_pool_size, pool_maxsize=_pool_size))
+_session.mount("http://", HTTPAdapter(pool_connections=_pool_size, pool_maxsize=_pool_size))
+
+
+def _timeout() -> tuple:
+    """(connect, read) timeout for agent calls. The read timeout applies between chunks."""
+    return (
+        float(os.getenv("AGENT_CONNECT_TIMEOUT", "10")),
+        float(os.getenv("AGENT_READ_TIMEOUT", "120")),
+    )
+
 
 class Message(BaseModel):
     role: str
@@ -17,6 +61,69 @@ class Message(BaseModel):
 
 class AgentRequest(BaseModel):
     messages: List[Message]
+    stream: Optional[bool] = False
+
+
+def _get_databricks_token() -> str:
+    """
+    Resolve the bearer token for the agent endpoint from the shared provider.
+
+    The provider uses DATABRICKS_TOKEN when set, otherwise a cached OAuth
+    client-credentials token.
+    """
+    try:
+        return DatabricksTokenProvider().get_token()
+    except TokenProviderError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _relay_stream(response: requests.Response) -> AsyncIterator[bytes]:
+    """
+    Relay an upstream streaming response chunk by chunk.
+
+    The upstream response is closed as soon as the stream ends or fails;
+    _RelayResponse closes it and releases the chat slot in every other case.
+    """
+    try:
+        async for chunk in iterate_in_threadpool(response.iter_content(chunk_size=None)):
+            if chunk:
+                yield chunk
+    except requests.RequestException as e:
+        logger.error(f"Agent stream interrupted: {e}")
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n".encode("utf-8")
+    finally:
+        response.close()
+
+
+class _RelayResponse(StreamingResponse):
+    """
+    Streamed chat response that owns the chat slot and the upstream response.
+
+    Both are released when the ASGI call ends, however it ends: the stream
+    finished or failed, the request was cancelled, or the client disconnected
+    before the body generator ever started (its finally block then never
+    runs), so an abandoned chat does not keep the agent connection, a thread
+    or a slot busy.
+    """
+
+    def __init__(self, upstream: requests.Response, **kwargs):
+        self._upstream = upstream
+        self._released = False
+        super().__init__(_relay_stream(upstream), **kwargs)
+
+    def release(self) -> None:
+        """Close the upstream response and release the chat slot, once."""
+        if self._released:
+            return
+        self._released = True
+        self._upstream.close()
+        _chat_slots.release()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
 
 
 @router.post("/chat")
@@ -24,85 +131,86 @@ async def chat_with_agent(request: AgentRequest):
     """
     Proxy requests to the Databricks Agent endpoint.
     Uses Databricks Agent format with input array.
+    With "stream": true the agent's server-sent events are relayed as they arrive.
+    Returns 503 when AGENT_MAX_CONCURRENT chats are already in progress.
     """
-    import logging
-    logger = logging.getLogger(__name__)
+    if _chat_slots.locked():
+        raise HTTPException(
+            status_code=503,
+            detail="Too many agent chats in progress, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    await _chat_slots.acquire()
+    # A streamed response hands its slot to _RelayResponse, which releases it
+    relayed = False
+
     try:
         agent_endpoint = os.getenv("DATABRICKS_AGENT_ENDPOINT")
-        databricks_token = os.getenv("DATABRICKS_TOKEN")
-        
+
         if not agent_endpoint:
             raise HTTPException(
-                status_code=500, 
+                status_code=500,
                 detail="DATABRICKS_AGENT_ENDPOINT not configured"
             )
-        
-        # For development, we'll use client credentials to get a token
-        # In production (Databricks Apps), this would use the app's identity
-        if not databricks_token:
-            # Get token using OAuth client credentials
-            client_id = os.getenv("DATABRICKS_CLIENT_ID")
-            client_secret = os.getenv("DATABRICKS_CLIENT_SECRET")
-            databricks_host = os.getenv("DATABRICKS_HOST")
-            
-            if not all([client_id, client_secret, databricks_host]):
-                raise HTTPException(
-                    status_code=500,
-                    detail="Databricks credentials not configured"
-                )
-            
-            # Get OAuth token
-            token_url = f"{databricks_host}/oidc/v1/token"
-            token_response = requests.post(
-                token_url,
-                data={
-                    "grant_type": "client_credentials",
-                    "scope": "all-apis"
-                },
-                auth=(client_id, client_secret)
-            )
-            
-            if token_response.status_code != 200:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Failed to get auth token: {token_response.text}"
-                )
-            
-            databricks_token = token_response.json().get("access_token")
-        
+
+        databricks_token = await run_in_threadpool(_get_databricks_token)
+
         # Prepare request in Databricks Agent format
         # Convert messages to input array format
         agent_request = {
             "input": [{"role": msg.role, "content": msg.content} for msg in request.messages]
         }
-        
+        if request.stream:
+            agent_request["stream"] = True
+
         logger.info(f"Sending request to agent: {agent_request}")
-        
+
         # Call agent endpoint
         headers = {
             "Authorization": f"Bearer {databricks_token}",
             "Content-Type": "application/json"
         }
-        
-        response = requests.post(
+
+        response = await run_in_threadpool(
+            _session.post,
             agent_endpoint,
             headers=headers,
             json=agent_request,
-            timeout=120  # Increased timeout to 2 minutes for complex agent queries
+            timeout=_timeout(),
+            stream=bool(request.stream)
         )
-        
+
         if response.status_code != 200:
-            logger.error(f"Agent request failed: {response.status_code} - {response.text}")
+            detail = response.text
+            response.close()
+            if response.status_code == 401:
+                # Force a fresh token on the next request
+                DatabricksTokenProvider().invalidate()
+            logger.error(f"Agent request failed: {response.status_code} - {detail}")
             raise HTTPException(
                 status_code=response.status_code,
-                detail=f"Agent request failed: {response.text}"
+                detail=f"Agent request failed: {detail}"
+            )
+
+        if request.stream:
+            media_type = response.headers.get("Content-Type", "text/event-stream")
+            relayed = True
+            return _RelayResponse(
+                response,
+                media_type=media_type,
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
             )
-        
+
         result = response.json()
         logger.info(f"Agent response: {result}")
         return result
-        
+
     except HTTPException:
         raise
+    except requests.Timeout as e:
+        raise HTTPException(status_code=504, detail=f"Agent request timed out: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if not relayed:
+            _chat_slots.release()
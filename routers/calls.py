@@ -1,82 +1,312 @@
 """
 Router for call center analytics endpoints.
 """
-from fastapi import APIRouter, Query, HTTPException
-from typing import Optional
+from fastapi import APIRouter, Query, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Optional, Any, AsyncIterator, List, Dict
+import csv
+import hashlib
+import io
 import json
 
-from services.calls_service import list_calls, get_call_by_id, get_all_ccr_ids, get_ccr_aggregate_stats, merge_ai_and_human_scores
-from services.human_evaluations_service import get_human_evaluation
+from services.calls_service import (
+    list_calls,
+    stream_calls,
+    get_call_by_id,
+    get_call_scorecard_by_id,
+    get_call_scorecards_by_ids,
+    get_transcript,
+    get_ccr_aggregate_stats,
+    merge_ai_and_human_scores,
+    apply_human_evaluation,
+    encode_page_cursor,
+    decode_page_cursor
+)
+from services.human_evaluations_service import get_human_evaluations
+from services.data_version_service import get_data_version
+from services.rep_stats_service import refresh_all_rep_stats, SCORECARD_CRITERIA
+from services.rep_directory_service import search_reps, refresh_rep_directory
+from services.search_service import search_calls, refresh_search_index, SearchIndexNotReady
+from services.rep_trend_service import get_rep_trend, refresh_rep_rollups, parse_day, RollupsNotReady
+from services.snapshot import refresh_snapshot
 
 router = APIRouter(prefix="/api", tags=["calls"])
 
+# Characters per chunk when streaming a transcript
+TRANSCRIPT_CHUNK_SIZE = 64 * 1024
+
+# Maximum call IDs accepted by POST /calls/batch
+MAX_BATCH_CALLS = 100
+
+# Column order of GET /calls/export?format=csv
+EXPORT_CSV_COLUMNS = [
+    "call_id", "member_id", "call_date", "total_score", "call_center_rep_id", "has_human_override"
+]
+
+
+class CallBatchRequest(BaseModel):
+    """Request model for fetching several call scorecards at once."""
+    call_ids: List[str]
+    include_summary: Optional[bool] = False
+
+
+async def _current_etag(request: Request) -> Optional[str]:
+    """
+    Strong ETag for this URL at the current data version.
+    Returns None when the data version is unknown (no validators are sent then).
+    """
+    version = await get_data_version()
+    if version is None:
+        return None
+    
+    digest = hashlib.sha256(f"{version}|{request.url.path}?{request.url.query}".encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    """Check the request's If-None-Match header against the current ETag."""
+    header = request.headers.get("if-none-match")
+    if not etag or not header:
+        return False
+    
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _validator_headers(etag: Optional[str]) -> Dict[str, str]:
+    """ETag plus no-cache, so browsers revalidate with If-None-Match on every use."""
+    if not etag:
+        return {}
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def _parse_scorecard(scorecard_json: Any, call_id: str) -> dict:
+    """Parse a scorecard_json value; JSONB columns are already parsed by psycopg2."""
+    if isinstance(scorecard_json, str):
+        try:
+            return json.loads(scorecard_json)
+        except json.JSONDecodeError as e:
+            print(f"JSON decode error for call {call_id}: {e}")
+            print(f"Raw scorecard_json: {scorecard_json[:200] if scorecard_json else 'None'}")
+            return {}
+    if scorecard_json is None:
+        return {}
+    return scorecard_json
+
+
+def _call_row_to_dict(row: tuple) -> Dict[str, Any]:
+    """Convert a list_calls/stream_calls row to the call summary returned by the API."""
+    # row[4] already prefers the human override score (joined in the query)
+    total_score = row[4]
+    has_override = bool(row[6]) if len(row) > 6 else False
+    
+    # Combine call_date and call_time if both exist
+    call_datetime = row[2]  # call_date
+    if row[3]:  # call_time
+        call_datetime = f"{row[2]} {row[3]}" if row[2] else row[3]
+    
+    return {
+        "call_id": row[0],
+        "member_id": row[1],
+        "call_date": str(call_datetime) if call_datetime else None,
+        "total_score": total_score,
+        "call_center_rep_id": row[5] if len(row) > 5 else None,  # rep_id
+        "has_human_override": has_override
+    }
+
+
+async def _export_ndjson(batches: AsyncIterator[List[tuple]]) -> AsyncIterator[bytes]:
+    """Encode streamed call rows as newline-delimited JSON, one chunk per batch."""
+    async for batch in batches:
+        yield "".join(
+            json.dumps(_call_row_to_dict(row), default=str) + "\n" for row in batch
+        ).encode("utf-8")
+
+
+async def _export_csv(batches: AsyncIterator[List[tuple]]) -> AsyncIterator[bytes]:
+    """Encode streamed call rows as CSV with a header row, one chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_COLUMNS)
+    writer.writeheader()
+    yield buffer.getvalue().encode("utf-8")
+    
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_call_row_to_dict(row) for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+
 
 @router.get("/calls")
 async def get_calls(
+    request: Request,
+    response: Response,
     member_id: Optional[str] = Query(None, description="Filter by member ID"),
     min_score: Optional[int] = Query(None, description="Minimum total score"),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    call_center_rep_id: Optional[str] = Query(None, description="Filter by call center rep ID")
+    call_center_rep_id: Optional[str] = Query(None, description="Filter by call center rep ID"),
+    page_size: Optional[int] = Query(None, ge=1, le=1000, description="Maximum calls per page (all calls if omitted)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor")
 ):
     """
     List all calls with optional filtering.
     Includes indicator if call has human evaluation override.
+    When page_size is set, next_cursor points at the following page (None on the last page).
+    Sends a strong ETag and answers a matching If-None-Match with 304.
     """
     try:
-        rows = list_calls(
+        etag = await _current_etag(request)
+        if _is_not_modified(request, etag):
+            return Response(status_code=304, headers=_validator_headers(etag))
+        response.headers.update(_validator_headers(etag))
+        
+        try:
+            after = decode_page_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # Fetch one extra row to learn whether another page exists
+        rows = await list_calls(
             member_id=member_id,
             min_score=min_score,
             start_date=start_date,
             end_date=end_date,
-            call_center_rep_id=call_center_rep_id
+            call_center_rep_id=call_center_rep_id,
+            limit=page_size + 1 if page_size else None,
+            after=after
         )
         
+        next_cursor = None
+        if page_size and len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = encode_page_cursor(last[2], last[3], last[0])
+        
         # Convert rows to list of dicts
+        calls = [_call_row_to_dict(row) for row in rows]
+        
+        return {
+            "count": len(calls),
+            "calls": calls,
+            "next_cursor": next_cursor
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/calls/export")
+async def export_calls(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Export format: ndjson or csv"),
+    member_id: Optional[str] = Query(None, description="Filter by member ID"),
+    min_score: Optional[int] = Query(None, description="Minimum total score"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    call_center_rep_id: Optional[str] = Query(None, description="Filter by call center rep ID")
+):
+    """
+    Export every matching call as NDJSON or CSV.
+    Rows are read through a server-side cursor and written as they arrive,
+    so memory use does not grow with the size of the export.
+    Uses the same filters and row fields as GET /calls.
+    """
+    try:
+        batches = stream_calls(
+            member_id=member_id,
+            min_score=min_score,
+            start_date=start_date,
+            end_date=end_date,
+            call_center_rep_id=call_center_rep_id
+        )
+        
+        if format == "csv":
+            return StreamingResponse(
+                _export_csv(batches),
+                media_type="text/csv; charset=utf-8",
+                headers={"Content-Disposition": 'attachment; filename="calls.csv"'}
+            )
+        
+        return StreamingResponse(
+            _export_ndjson(batches),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="calls.ndjson"'}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/calls/search")
+async def search_transcripts(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500, description='Search text; "quoted text" is a phrase, or separates alternatives, -word excludes'),
+    member_id: Optional[str] = Query(None, description="Filter by member ID"),
+    min_score: Optional[int] = Query(None, description="Minimum total score"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    call_center_rep_id: Optional[str] = Query(None, description="Filter by call center rep ID"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum calls to return")
+):
+    """
+    Full-text search over call summaries and transcripts.
+    Returns the best-ranked matching calls with a highlighted snippet,
+    using the same filters and call fields as GET /calls.
+    Sends a strong ETag and answers a matching If-None-Match with 304.
+    Answers 503 until the search index has been built at startup or by a refresh.
+    """
+    try:
+        etag = await _current_etag(request)
+        if _is_not_modified(request, etag):
+            return Response(status_code=304, headers=_validator_headers(etag))
+        response.headers.update(_validator_headers(etag))
+        
+        rows = await search_calls(
+            q,
+            member_id=member_id,
+            min_score=min_score,
+            start_date=start_date,
+            end_date=end_date,
+            call_center_rep_id=call_center_rep_id,
+            limit=limit
+        )
+        
         calls = []
         for row in rows:
-            call_id = row[0]
-            
-            # Check if this call has a human evaluation
-            human_eval = get_human_evaluation(call_id)
-            has_override = human_eval is not None
-            
-            # Use human override score if it exists
-            # New schema: row[4] = total_score
-            total_score = row[4]
-            if has_override and len(human_eval) > 5 and human_eval[5] is not None:
-                total_score = human_eval[5]
-            
-            # Combine call_date and call_time if both exist
-            call_datetime = row[2]  # call_date
-            if row[3]:  # call_time
-                call_datetime = f"{row[2]} {row[3]}" if row[2] else row[3]
-            
-            calls.append({
-                "call_id": call_id,
-                "member_id": row[1],
-                "call_date": str(call_datetime) if call_datetime else None,
-                "total_score": total_score,
-                "call_center_rep_id": row[5] if len(row) > 5 else None,  # rep_id
-                "has_human_override": has_override
-            })
+            call = _call_row_to_dict(row)
+            call["rank"] = float(row[7]) if row[7] is not None else None
+            call["snippet"] = row[8]
+            calls.append(call)
         
         return {
+            "query": q,
             "count": len(calls),
             "calls": calls
         }
+    except HTTPException:
+        raise
+    except SearchIndexNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/calls/{call_id}")
-async def get_call(call_id: str):
+async def get_call(call_id: str, request: Request, response: Response):
     """
     Get full details of a specific call including transcript and scorecard.
     Merges AI scores with human overrides if they exist.
+    Sends a strong ETag and answers a matching If-None-Match with 304.
     """
     try:
-        row = get_call_by_id(call_id)
+        etag = await _current_etag(request)
+        if _is_not_modified(request, etag):
+            return Response(status_code=304, headers=_validator_headers(etag))
+        response.headers.update(_validator_headers(etag))
+        
+        row = await get_call_by_id(call_id)
         
         if row is None:
             raise HTTPException(status_code=404, detail="Call not found")
@@ -87,18 +317,7 @@ async def get_call(call_id: str):
         # 10=scorecard_json, 11=total_score, 12=transcript_summary
         
         # Parse the scorecard JSON
-        scorecard_json = row[10] if len(row) > 10 else {}
-        
-        # Handle different types - JSONB columns are already parsed by psycopg2
-        if isinstance(scorecard_json, str):
-            try:
-                scorecard_json = json.loads(scorecard_json)
-            except json.JSONDecodeError as e:
-                print(f"JSON decode error for call {call_id}: {e}")
-                print(f"Raw scorecard_json: {scorecard_json[:200] if scorecard_json else 'None'}")
-                scorecard_json = {}
-        elif scorecard_json is None:
-            scorecard_json = {}
+        scorecard_json = _parse_scorecard(row[10] if len(row) > 10 else {}, call_id)
         
         # Combine call_date and call_time
         call_datetime = row[4] if len(row) > 4 else None
@@ -118,7 +337,7 @@ async def get_call(call_id: str):
         }
         
         # Merge with human evaluation if it exists
-        call_data = merge_ai_and_human_scores(call_data)
+        call_data = await merge_ai_and_human_scores(call_data)
         
         return call_data
     except HTTPException:
@@ -129,44 +348,296 @@ async def get_call(call_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _scorecard_row_to_dict(row: tuple, include_summary: bool) -> dict:
+    """
+    Convert a get_call_scorecard_by_id row into the API's call dictionary.
+    
+    Columns: 0=call_id, 1=member_id, 2=rep_id, 3=call_date, 4=call_time,
+    5=scorecard_json, 6=total_score[, 7=transcript_summary]
+    """
+    call_datetime = row[3]
+    if call_datetime and row[4]:
+        call_datetime = f"{call_datetime} {row[4]}"
+    
+    call_data = {
+        "call_id": row[0],
+        "member_id": row[1],
+        "call_date": call_datetime,
+        "scorecard": _parse_scorecard(row[5], row[0]),
+        "total_score": row[6],
+        "call_center_rep_id": row[2]
+    }
+    if include_summary:
+        call_data["transcript_summary"] = row[7] if len(row) > 7 else None
+    
+    return call_data
+
+
+@router.post("/calls/batch")
+async def get_calls_batch(request: CallBatchRequest):
+    """
+    Get merged scorecards for several calls at once (no transcripts).
+    Uses one query for the calls and one for their human evaluations.
+    Calls are returned in request order; unknown IDs are listed in "missing".
+    """
+    try:
+        # De-duplicate while keeping request order
+        call_ids = list(dict.fromkeys(request.call_ids))
+        
+        if len(call_ids) > MAX_BATCH_CALLS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {MAX_BATCH_CALLS} call IDs can be requested at once"
+            )
+        
+        rows = await get_call_scorecards_by_ids(call_ids, include_summary=bool(request.include_summary))
+        human_evals = await get_human_evaluations(call_ids)
+        
+        rows_by_id = {row[0]: row for row in rows}
+        calls = []
+        missing = []
+        for call_id in call_ids:
+            row = rows_by_id.get(call_id)
+            if row is None:
+                missing.append(call_id)
+                continue
+            call_data = _scorecard_row_to_dict(row, bool(request.include_summary))
+            calls.append(apply_human_evaluation(call_data, human_evals.get(call_id)))
+        
+        return {
+            "count": len(calls),
+            "calls": calls,
+            "missing": missing
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/calls/{call_id}/scorecard")
+async def get_call_scorecard(
+    call_id: str,
+    request: Request,
+    response: Response,
+    include_summary: bool = Query(False, description="Include transcript_summary")
+):
+    """
+    Get the merged scorecard of a call without transcript bytes.
+    Used by listing and comparison views.
+    Sends a strong ETag and answers a matching If-None-Match with 304.
+    """
+    try:
+        etag = await _current_etag(request)
+        if _is_not_modified(request, etag):
+            return Response(status_code=304, headers=_validator_headers(etag))
+        response.headers.update(_validator_headers(etag))
+        
+        row = await get_call_scorecard_by_id(call_id, include_summary=include_summary)
+        
+        if row is None:
+            raise HTTPException(status_code=404, detail="Call not found")
+        
+        call_data = _scorecard_row_to_dict(row, include_summary)
+        
+        return await merge_ai_and_human_scores(call_data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/calls/{call_id}/transcript")
+async def get_call_transcript(call_id: str):
+    """
+    Stream the full transcript of a call as plain text.
+    The transcript is read with one query and sent in fixed-size chunks.
+    """
+    try:
+        row = await get_transcript(call_id)
+        
+        if row is None:
+            raise HTTPException(status_code=404, detail="Call not found")
+        
+        transcript = row[0] or ""
+        
+        async def transcript_body() -> AsyncIterator[str]:
+            for offset in range(0, len(transcript), TRANSCRIPT_CHUNK_SIZE):
+                yield transcript[offset:offset + TRANSCRIPT_CHUNK_SIZE]
+        
+        return StreamingResponse(transcript_body(), media_type="text/plain; charset=utf-8")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/ccrs")
-async def get_ccrs():
+async def get_ccrs(
+    request: Request,
+    response: Response,
+    q: Optional[str] = Query(None, description="Type-ahead prefix matched against rep ID and name"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum reps to return (all if omitted)")
+):
     """
-    Get list of all call center representative IDs.
+    Get call center representatives from the rep directory.
+    Each rep includes name, call count and last call date.
+    Sends a strong ETag and answers a matching If-None-Match with 304.
     """
     try:
-        rows = get_all_ccr_ids()
+        etag = await _current_etag(request)
+        if _is_not_modified(request, etag):
+            return Response(status_code=304, headers=_validator_headers(etag))
+        response.headers.update(_validator_headers(etag))
+        
+        rows = await search_reps(q, limit)
         
-        # Convert rows to list of CCR IDs
-        ccr_ids = [row[0] for row in rows if row[0] is not None]
+        ccrs = [
+            {
+                "call_center_rep_id": row[0],
+                "rep_name": row[1],
+                "call_count": row[2],
+                "last_call_date": str(row[3]) if row[3] else None
+            }
+            for row in rows
+        ]
         
         return {
-            "count": len(ccr_ids),
-            "ccr_ids": ccr_ids
+            "count": len(ccrs),
+            "ccr_ids": [ccr["call_center_rep_id"] for ccr in ccrs],
+            "ccrs": ccrs
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/ccrs/{ccr_id}/stats")
-async def get_ccr_stats(ccr_id: str):
+async def get_ccr_stats(ccr_id: str, request: Request, response: Response):
     """
     Get aggregate performance statistics for a specific call center representative.
+    Sends a strong ETag and answers a matching If-None-Match with 304.
     """
     try:
-        row = get_ccr_aggregate_stats(ccr_id)
+        etag = await _current_etag(request)
+        if _is_not_modified(request, etag):
+            return Response(status_code=304, headers=_validator_headers(etag))
+        response.headers.update(_validator_headers(etag))
+        
+        row = await get_ccr_aggregate_stats(ccr_id)
         
         if row is None:
             raise HTTPException(status_code=404, detail="CCR not found or has no calls")
         
+        criteria_averages = row[6] if len(row) > 6 and row[6] else {}
+        if isinstance(criteria_averages, str):
+            criteria_averages = json.loads(criteria_averages)
+        score_histogram = row[5] if len(row) > 5 and row[5] else {}
+        if isinstance(score_histogram, str):
+            score_histogram = json.loads(score_histogram)
+        
         return {
             "call_center_rep_id": row[0],
             "total_calls": row[1],
             "avg_score": float(row[2]) if row[2] is not None else None,
             "min_score": row[3],
-            "max_score": row[4]
+            "max_score": row[4],
+            "score_histogram": score_histogram,
+            "criteria_averages": {
+                name: float(value) if value is not None else None
+                for name, value in criteria_averages.items()
+            }
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/ccrs/{ccr_id}/trend")
+async def get_ccr_trend(
+    ccr_id: str,
+    request: Request,
+    response: Response,
+    granularity: str = Query("day", pattern="^(day|week|month)$", description="Period length: day, week or month"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+):
+    """
+    Get a call center representative's effective score trend per day, week or month.
+    Answered from the daily rollups, including human overrides.
+    Sends a strong ETag and answers a matching If-None-Match with 304.
+    Answers 503 until the rollups have been built at startup or by a refresh.
+    """
+    try:
+        try:
+            for value in (start_date, end_date):
+                if value:
+                    parse_day(value)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        etag = await _current_etag(request)
+        if _is_not_modified(request, etag):
+            return Response(status_code=304, headers=_validator_headers(etag))
+        response.headers.update(_validator_headers(etag))
+        
+        rows = await get_rep_trend(ccr_id, granularity, start_date=start_date, end_date=end_date)
+        
+        points = []
+        for row in rows:
+            criteria = row[4:4 + len(SCORECARD_CRITERIA)]
+            points.append({
+                "period_start": str(row[0]),
+                "call_count": int(row[1]),
+                "scored_calls": int(row[2]),
+                "avg_score": float(row[3]) if row[3] is not None else None,
+                "criteria_averages": {
+                    name: float(value) if value is not None else None
+                    for name, value in zip(SCORECARD_CRITERIA, criteria)
+                }
+            })
+        
+        return {
+            "call_center_rep_id": ccr_id,
+            "granularity": granularity,
+            "count": len(points),
+            "points": points
         }
     except HTTPException:
         raise
+    except RollupsNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/ccrs/stats/refresh")
+async def refresh_ccr_stats(
+    full: bool = Query(False, description="Rebuild trend rollups for every day instead of only the days of changed calls")
+):
+    """
+    Recompute the precomputed statistics for every call center representative
+    and bring the rep directory, transcript search index and daily trend
+    rollups up to date, then write a new local snapshot (when enabled).
+    Run once during setup and after each sync of call_center_scores_sync.
+    """
+    try:
+        directory_changed, directory_removed = await refresh_rep_directory()
+        search_indexed, search_removed = await refresh_search_index()
+        rollups_changed, rollups_removed = await refresh_rep_rollups(full=full)
+        # Last, because it clears the result cache once everything above is current
+        refreshed = await refresh_all_rep_stats()
+        await refresh_snapshot()
+        
+        return {
+            "status": "success",
+            "refreshed_reps": refreshed,
+            "directory_changed": directory_changed,
+            "directory_removed": directory_removed,
+            "search_indexed": search_indexed,
+            "search_removed": search_removed,
+            "rollups_changed": rollups_changed,
+            "rollups_removed": rollups_removed
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,7 +1,7 @@
 """
 Router for human evaluation endpoints.
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel
 from typing import Optional
 import json
@@ -11,8 +11,10 @@ from services.human_evaluations_service import (
     save_human_evaluation,
     delete_human_evaluation,
     get_all_evaluated_call_ids,
-    ensure_human_evaluations_table
+    ensure_human_evaluations_table,
+    import_human_evaluations
 )
+from services.evaluation_import import parse_import
 
 router = APIRouter(prefix="/api/evaluations", tags=["evaluations"])
 
@@ -32,12 +34,54 @@ async def initialize_table():
     This endpoint should be called once during setup.
     """
     try:
-        ensure_human_evaluations_table()
+        await ensure_human_evaluations_table()
         return {"status": "success", "message": "Human evaluations table initialized"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/import")
+async def import_evaluations(
+    request: Request,
+    format: Optional[str] = Query(None, description="jsonl or csv (default: from Content-Type, else jsonl)"),
+    evaluator_name: Optional[str] = Query(None, description="Evaluator for rows that do not name one")
+):
+    """
+    Save or update human evaluations in bulk from a JSON lines or CSV body.
+    
+    Every row is validated against the scorecard first; invalid rows and rows
+    for unknown calls are reported with their row number and skipped, the
+    rest are saved together.
+    """
+    try:
+        if format is None:
+            content_type = request.headers.get("content-type", "")
+            format = "csv" if "csv" in content_type else "jsonl"
+        
+        body = (await request.body()).decode("utf-8-sig")
+        
+        try:
+            records, errors = parse_import(body, format, evaluator_name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        received = len(records) + len(errors)
+        result = await import_human_evaluations(records)
+        errors = sorted(errors + result["errors"], key=lambda error: error["row"])
+        
+        return {
+            "received": received,
+            "imported": result["imported"],
+            "inserted": result["inserted"],
+            "updated": result["updated"],
+            "errors": errors
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{call_id}")
 async def get_evaluation(call_id: str):
     """
@@ -45,7 +89,7 @@ async def get_evaluation(call_id: str):
     Returns 404 if no evaluation exists.
     """
     try:
-        row = get_human_evaluation(call_id)
+        row = await get_human_evaluation(call_id)
         
         if row is None:
             raise HTTPException(status_code=404, detail="No human evaluation found for this call")
@@ -76,7 +120,7 @@ async def save_evaluation(call_id: str, evaluation: HumanEvaluationRequest):
     Save or update a human evaluation for a call.
     """
     try:
-        row = save_human_evaluation(
+        row = await save_human_evaluation(
             call_id=call_id,
             evaluator_name=evaluation.evaluator_name,
             scorecard_overrides=evaluation.scorecard_overrides,
@@ -113,7 +157,7 @@ async def delete_evaluation(call_id: str):
     Delete a human evaluation for a call.
     """
     try:
-        deleted = delete_human_evaluation(call_id)
+        deleted = await delete_human_evaluation(call_id)
         
         if not deleted:
             raise HTTPException(status_code=404, detail="No evaluation found to delete")
@@ -131,7 +175,7 @@ async def get_evaluated_calls():
     Get list of all call IDs that have human evaluations.
     """
     try:
-        call_ids = get_all_evaluated_call_ids()
+        call_ids = await get_all_evaluated_call_ids()
         
         return {
             "count": len(call_ids),
@@ -1,26 +1,190 @@
 """
 Service for managing call center data queries.
 
-⚠️ SECURITY WARNING ⚠️
-THIS SERVICE USES F-STRING SQL QUERIES INSTEAD OF PARAMETERIZED QUERIES.
-THIS IS A SECURITY RISK AND MAKES THE APPLICATION VULNERABLE TO SQL INJECTION.
-THIS IS ACCEPTABLE ONLY FOR DEMO PURPOSES - NEVER USE IN PRODUCTION!
+Queries are named prepared statements executed with bound parameters
+(see services/prepared_statements.py).
 """
-from typing import List, Tuple, Any, Optional
-from services.lakebase import Lakebase
+from typing import List, Tuple, Any, Optional, AsyncIterator
+from psycopg2.errors import UndefinedTable
+from services.prepared_statements import PreparedStatement
 from services.human_evaluations_service import get_human_evaluation
+from services.rep_stats_service import get_rep_stats, compute_rep_stats
+from services.result_cache import cached
+from services.scorecard import compact_overrides, apply_compact_overrides
+from services.columnar_index import columnar_list_calls
+import base64
 import json
 
 
-def list_calls(
+_GET_CALL_BY_ID = PreparedStatement(
+    "get_call_by_id",
+    "SELECT * FROM public.telco_call_center_analytics.call_center_scores_sync WHERE call_id = %s"
+)
+
+
+def _scorecard_statement(name: str, where_clause: str, include_summary: bool) -> PreparedStatement:
+    """Build a scorecard lookup shape; include_summary adds transcript_summary."""
+    summary_column = ", transcript_summary" if include_summary else ""
+    return PreparedStatement(f"{name}{'_with_summary' if include_summary else ''}", f"""
+        SELECT call_id, member_id, rep_id, call_date, call_time, scorecard_json, total_score{summary_column}
+        FROM public.telco_call_center_analytics.call_center_scores_sync
+        WHERE {where_clause}
+    """)
+
+
+_GET_CALL_SCORECARD = {
+    include_summary: _scorecard_statement("get_call_scorecard", "call_id = %s", include_summary)
+    for include_summary in (False, True)
+}
+
+_GET_CALL_SCORECARDS = {
+    include_summary: _scorecard_statement("get_call_scorecards", "call_id = ANY(%s::text[])", include_summary)
+    for include_summary in (False, True)
+}
+
+_GET_TRANSCRIPT = PreparedStatement("get_transcript", """
+        SELECT transcript
+        FROM public.telco_call_center_analytics.call_center_scores_sync
+        WHERE call_id = %s
+""")
+
+def encode_page_cursor(call_date: Any, call_time: Any, call_id: str) -> str:
+    """
+    Build an opaque keyset cursor from the last row of a page.
+    
+    Args:
+        call_date: call_date of the last row returned
+        call_time: call_time of the last row returned
+        call_id: call_id of the last row returned
+    
+    Returns:
+        URL-safe cursor string
+    """
+    key = [str(call_date) if call_date is not None else "", str(call_time) if call_time is not None else "", call_id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def decode_page_cursor(cursor: str) -> Tuple[str, str, str]:
+    """
+    Decode a cursor produced by encode_page_cursor.
+    
+    Args:
+        cursor: Opaque cursor string from a previous page
+    
+    Returns:
+        Tuple of (call_date, call_time, call_id)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    
+    if not isinstance(key, list) or len(key) != 3 or not all(isinstance(k, str) for k in key):
+        raise ValueError("Invalid cursor")
+    
+    return key[0], key[1], key[2]
+
+
+def _list_calls_statement(by_member: bool, by_rep: bool, keyset: bool) -> PreparedStatement:
+    """
+    Build one prepared shape of the call listing query.
+    
+    Equality filters and the keyset condition are part of the shape; the
+    optional score and date bounds are always present and disabled with NULL,
+    and LIMIT NULL means no limit. That keeps the listing to eight shapes.
+    Date bounds compare COALESCE(call_date, '') like the ORDER BY, so they
+    match the listing indexes' leading key; calls without a date never
+    match a bound.
+    """
+    sql = """
+        SELECT 
+            s.call_id, 
+            s.member_id, 
+            s.call_date,
+            s.call_time,
+            COALESCE(h.total_score_override, s.total_score) AS total_score,
+            s.rep_id,
+            h.call_id IS NOT NULL AS has_human_override
+        FROM public.telco_call_center_analytics.call_center_scores_sync s
+        LEFT JOIN public.telco_call_center_analytics.human_evaluations h
+            ON h.call_id = s.call_id
+        WHERE (%s::integer IS NULL OR s.total_score >= %s)
+            AND (%s::text IS NULL OR COALESCE(s.call_date, '') >= %s)
+            AND (%s::text IS NULL OR (COALESCE(s.call_date, '') <= %s AND s.call_date IS NOT NULL))
+    """
+    
+    if by_member:
+        sql += " AND s.member_id = %s"
+    
+    if by_rep:
+        sql += " AND s.rep_id = %s"
+    
+    if keyset:
+        sql += " AND (COALESCE(s.call_date, ''), COALESCE(s.call_time, ''), s.call_id) < (%s, %s, %s)"
+    
+    # Order by most recent first; call_id breaks ties so the keyset is unique
+    sql += " ORDER BY COALESCE(s.call_date, '') DESC, COALESCE(s.call_time, '') DESC, s.call_id DESC"
+    sql += " LIMIT %s"
+    
+    name = f"list_calls{'_member' if by_member else ''}{'_rep' if by_rep else ''}{'_after' if keyset else ''}"
+    return PreparedStatement(name, sql)
+
+
+_LIST_CALLS_STATEMENTS = {
+    (by_member, by_rep, keyset): _list_calls_statement(by_member, by_rep, keyset)
+    for by_member in (False, True)
+    for by_rep in (False, True)
+    for keyset in (False, True)
+}
+
+
+def _list_calls_query(
+    member_id: Optional[str],
+    min_score: Optional[int],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    call_center_rep_id: Optional[str],
+    limit: Optional[int],
+    after: Optional[Tuple[str, str, str]]
+) -> Tuple[PreparedStatement, Tuple[Any, ...]]:
+    """Pick the listing shape for the given filters and build its parameters (shared by list_calls and stream_calls)."""
+    end_bound = f"{end_date} 23:59:59" if end_date else None
+    params = [
+        min_score, min_score,
+        start_date or None, start_date or None,
+        end_bound, end_bound,
+    ]
+    
+    if member_id:
+        params.append(member_id)
+    
+    if call_center_rep_id:
+        params.append(call_center_rep_id)
+    
+    if after is not None:
+        params.extend(after)
+    
+    params.append(int(limit) if limit is not None else None)
+    
+    statement = _LIST_CALLS_STATEMENTS[(bool(member_id), bool(call_center_rep_id), after is not None)]
+    return statement, tuple(params)
+
+
+@cached("calls", tags=lambda rows, **_: {f"rep:{row[5]}" for row in rows if row[5]})
+async def list_calls(
     member_id: Optional[str] = None,
     min_score: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    call_center_rep_id: Optional[str] = None
+    call_center_rep_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[str, str, str]] = None
 ) -> List[Tuple[Any, ...]]:
     """
-    List all calls with optional filtering.
+    List all calls with optional filtering and keyset pagination.
     
     Args:
         member_id: Filter by member ID
@@ -28,53 +192,78 @@ def list_calls(
         start_date: Filter calls on or after this date (YYYY-MM-DD)
         end_date: Filter calls on or before this date (YYYY-MM-DD)
         call_center_rep_id: Filter by call center representative ID
+        limit: Maximum number of rows to return (all rows if None)
+        after: Keyset (call_date, call_time, call_id) of the last row of the
+               previous page; only rows sorting after it are returned
     
-    Returns:
-        List of tuples containing (call_id, member_id, call_date, total_score, rep_id)
-    """
-    # Base query
-    sql = """
-        SELECT 
-            call_id, 
-            member_id, 
-            call_date,
-            call_time,
-            total_score,
-            rep_id
-        FROM public.telco_call_center_analytics.call_center_scores_sync
-    """
+    Rows are ordered by (call_date, call_time, call_id) descending, so a page
+    starting from a cursor costs the same as the first page.
     
-    # Build WHERE clauses
-    where_clauses = []
+    Human overrides are joined in the same query, so the listing costs a
+    single query regardless of how many calls match, and identical
+    concurrent listings share it. Without a limit the rows are fetched in
+    batches from a server-side cursor. When the optional
+    columnar index is enabled and current, it answers without a query.
     
-    if member_id:
-        where_clauses.append(f"member_id = '{member_id}'")
+    Returns:
+        List of tuples containing (call_id, member_id, call_date, call_time,
+        total_score, rep_id, has_human_override), where total_score is the
+        human override when one exists, otherwise the AI score
+    """
+    rows = await columnar_list_calls(
+        member_id, min_score, start_date, end_date, call_center_rep_id, limit, after
+    )
+    if rows is not None:
+        return rows
     
-    if min_score is not None:
-        where_clauses.append(f"total_score >= {min_score}")
+    statement, params = _list_calls_query(
+        member_id, min_score, start_date, end_date, call_center_rep_id, limit, after
+    )
     
-    if start_date:
-        where_clauses.append(f"call_date >= '{start_date}'")
+    # Execute query
+    if limit is not None:
+        return await statement.fetch(*params)
     
-    if end_date:
-        where_clauses.append(f"call_date <= '{end_date} 23:59:59'")
+    # Unpaged listings can cover every call: read them through a server-side
+    # cursor so the driver never buffers the whole result next to the rows
+    return await statement.fetch_batched(*params)
+
+
+async def stream_calls(
+    member_id: Optional[str] = None,
+    min_score: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    call_center_rep_id: Optional[str] = None
+) -> AsyncIterator[List[Tuple[Any, ...]]]:
+    """
+    Stream every call matching the filters in batches, for exports.
     
-    if call_center_rep_id:
-        where_clauses.append(f"rep_id = '{call_center_rep_id}'")
+    Uses the same query and row shape as list_calls, but reads it through a
+    server-side cursor, so memory stays bounded by one batch however many
+    calls match. Results are not cached.
     
-    # Add WHERE clause if any filters
-    if where_clauses:
-        sql += " WHERE " + " AND ".join(where_clauses)
+    Args:
+        member_id: Filter by member ID
+        min_score: Filter calls with total_score >= min_score
+        start_date: Filter calls on or after this date (YYYY-MM-DD)
+        end_date: Filter calls on or before this date (YYYY-MM-DD)
+        call_center_rep_id: Filter by call center representative ID
     
-    # Order by most recent first
-    sql += " ORDER BY call_date DESC"
+    Yields:
+        Lists of (call_id, member_id, call_date, call_time, total_score,
+        rep_id, has_human_override) tuples
+    """
+    statement, params = _list_calls_query(
+        member_id, min_score, start_date, end_date, call_center_rep_id, None, None
+    )
     
-    # Execute query
-    lakebase = Lakebase()
-    return lakebase.query(sql)
+    async for batch in statement.stream(*params):
+        yield batch
 
 
-def get_call_by_id(call_id: str) -> Optional[Tuple[Any, ...]]:
+@cached("call", tags=lambda row, call_id: [f"call:{call_id}"])
+async def get_call_by_id(call_id: str) -> Optional[Tuple[Any, ...]]:
     """
     Get full details of a specific call.
     
@@ -85,66 +274,92 @@ def get_call_by_id(call_id: str) -> Optional[Tuple[Any, ...]]:
         Tuple containing (call_id, member_id, call_date, transcript, scorecard)
         or None if call not found
     """
-    sql = f"SELECT * FROM public.telco_call_center_analytics.call_center_scores_sync WHERE call_id = '{call_id}'"
+    return await _GET_CALL_BY_ID.fetch_one(call_id)
+
+
+@cached("call", tags=lambda row, call_id, **_: [f"call:{call_id}"])
+async def get_call_scorecard_by_id(call_id: str, include_summary: bool = False) -> Optional[Tuple[Any, ...]]:
+    """
+    Get the scoring fields of a specific call without the transcript.
     
-    lakebase = Lakebase()
-    rows = lakebase.query(sql)
+    Args:
+        call_id: The call ID to retrieve
+        include_summary: Also return transcript_summary
     
-    if rows and len(rows) > 0:
-        return rows[0]
-    return None
+    Returns:
+        Tuple containing (call_id, member_id, rep_id, call_date, call_time,
+        scorecard_json, total_score[, transcript_summary])
+        or None if call not found
+    """
+    return await _GET_CALL_SCORECARD[bool(include_summary)].fetch_one(call_id)
 
 
-def get_all_ccr_ids() -> List[Tuple[Any, ...]]:
+async def get_call_scorecards_by_ids(call_ids: List[str], include_summary: bool = False) -> List[Tuple[Any, ...]]:
     """
-    Get list of all unique call center representative IDs.
+    Get the scoring fields of several calls in one query, without transcripts.
+    
+    Args:
+        call_ids: The call IDs to retrieve
+        include_summary: Also return transcript_summary
     
     Returns:
-        List of tuples containing (rep_id,)
+        List of tuples with the same columns as get_call_scorecard_by_id,
+        in no particular order; unknown call IDs are simply absent
     """
-    sql = """
-        SELECT DISTINCT rep_id 
-        FROM public.telco_call_center_analytics.call_center_scores_sync 
-        WHERE rep_id IS NOT NULL
-        ORDER BY rep_id
+    if not call_ids:
+        return []
+    
+    return await _GET_CALL_SCORECARDS[bool(include_summary)].fetch(list(call_ids))
+
+
+async def get_transcript(call_id: str) -> Optional[Tuple[Any, ...]]:
     """
+    Get a call's transcript and nothing else, in one read.
     
-    lakebase = Lakebase()
-    return lakebase.query(sql)
+    A compressed TOAST value is decompressed from its start on every read,
+    so reading a long transcript slice by slice would cost quadratic time;
+    it is read once and sliced by the caller. Not cached: transcripts are
+    the largest values in the table.
+    
+    Args:
+        call_id: The call ID to retrieve
+    
+    Returns:
+        Tuple containing (transcript,) or None if call not found
+    """
+    return await _GET_TRANSCRIPT.fetch_one(call_id)
 
 
-def get_ccr_aggregate_stats(call_center_rep_id: str) -> Optional[Tuple[Any, ...]]:
+@cached("ccr_stats", tags=lambda row, call_center_rep_id: [f"rep:{call_center_rep_id}"])
+async def get_ccr_aggregate_stats(call_center_rep_id: str) -> Optional[Tuple[Any, ...]]:
     """
     Get aggregate performance statistics for a specific call center representative.
     
+    Reads the precomputed row from rep_score_stats (effective scores, human
+    overrides included). A rep without a stored row (new since the last
+    refresh, or no refresh has built the table yet) is computed with a
+    read-only query; reads never write stats.
+    
     Args:
         call_center_rep_id: The call center rep ID to get stats for
     
     Returns:
-        Tuple containing (rep_id, total_calls, avg_score, min_score, max_score)
+        Tuple containing (rep_id, total_calls, avg_score, min_score, max_score,
+                         score_histogram, criteria_averages)
         or None if no data found
     """
-    sql = f"""
-        SELECT 
-            rep_id,
-            COUNT(*) as total_calls,
-            ROUND(AVG(total_score)::numeric, 2) as avg_score,
-            MIN(total_score) as min_score,
-            MAX(total_score) as max_score
-        FROM public.telco_call_center_analytics.call_center_scores_sync
-        WHERE rep_id = '{call_center_rep_id}'
-        GROUP BY rep_id
-    """
+    try:
+        row = await get_rep_stats(call_center_rep_id)
+    except UndefinedTable:
+        row = None
     
-    lakebase = Lakebase()
-    rows = lakebase.query(sql)
+    if row is None:
+        row = await compute_rep_stats(call_center_rep_id)
     
-    if rows and len(rows) > 0:
-        return rows[0]
-    return None
+    return row
 
 
-def merge_ai_and_human_scores(call_data: dict) -> dict:
+async def merge_ai_and_human_scores(call_data: dict) -> dict:
     """
     Merge AI scores with human overrides (if they exist).
     
@@ -164,8 +379,22 @@ def merge_ai_and_human_scores(call_data: dict) -> dict:
         return call_data
     
     # Try to get human evaluation
-    human_eval = get_human_evaluation(call_id)
+    human_eval = await get_human_evaluation(call_id)
+    
+    return apply_human_evaluation(call_data, human_eval)
+
+
+def apply_human_evaluation(call_data: dict, human_eval: Optional[Tuple[Any, ...]]) -> dict:
+    """
+    Merge an already-fetched human evaluation row into call data.
     
+    Args:
+        call_data: Dictionary containing call information with AI scores
+        human_eval: Row from human_evaluations, or None if the call has none
+    
+    Returns:
+        Dictionary with merged scores and evaluation metadata
+    """
     if human_eval is None:
         # No human evaluation, return AI scores as-is
         call_data["has_human_override"] = False
@@ -183,9 +412,15 @@ def merge_ai_and_human_scores(call_data: dict) -> dict:
     
     # Merge scores: human overrides take precedence
     if scorecard_overrides:
-        # Deep merge the scorecard
         ai_scorecard = call_data.get("scorecard", {})
-        merged_scorecard = deep_merge_scorecards(ai_scorecard, scorecard_overrides)
+        # Rows from the evaluation service carry the compact overrides at index 7
+        compact = human_eval[7] if len(human_eval) > 7 else compact_overrides(scorecard_overrides)
+        if compact is not None:
+            # Criterion scores only: copy just the overridden paths
+            merged_scorecard = apply_compact_overrides(ai_scorecard, compact)
+        else:
+            # Deep merge the scorecard
+            merged_scorecard = deep_merge_scorecards(ai_scorecard, scorecard_overrides)
         call_data["scorecard"] = merged_scorecard
     
     # Override total score if provided
@@ -0,0 +1,511 @@
+"""
+Optional in-process columnar index of the call listing columns.
+
+The listing columns of call_center_scores_sync (call_id, member_id, rep_id,
+call_date, call_time, AI total_score) plus the human override scores are
+loaded into NumPy arrays, with rep and member IDs dictionary-encoded and the
+rows kept in the listing's sort order as returned by Lakebase (call_date,
+call_time, call_id descending). list_calls filters are then answered with
+vectorized masks over those arrays instead of a database round trip.
+
+The index is labeled with the data watermark it was loaded at (see
+data_version_service). When the watermark moves, requests fall back to SQL
+while the index refreshes in a background thread: when the sync marker moved
+every column is reloaded; otherwise (human evaluation changes, rep stats
+refreshes) only the override columns are.
+Requests the index cannot answer exactly (a cursor row it does not hold) also
+fall back to SQL.
+
+Date bounds are compared in code point order, which matches Postgres for the
+ISO dates the sync writes. Check a deployment with:
+    python -m services.columnar_index --verify
+
+Optional environment variables:
+    CALLS_COLUMNAR_INDEX    set to "on" to enable the index (default off; requires numpy)
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import List, Tuple, Any, Optional, Dict, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optional; list_calls always has the SQL path
+    np = None
+
+from services.lakebase import Lakebase
+from services.data_version_service import get_data_watermark
+
+logger = logging.getLogger(__name__)
+
+_LOAD_CALLS_SQL = """
+    SELECT s.call_id, s.member_id, s.call_date, s.call_time, s.total_score, s.rep_id
+    FROM public.telco_call_center_analytics.call_center_scores_sync s
+    ORDER BY COALESCE(s.call_date, '') DESC, COALESCE(s.call_time, '') DESC, s.call_id DESC
+"""
+
+_LOAD_OVERRIDES_SQL = """
+    SELECT call_id, total_score_override
+    FROM public.telco_call_center_analytics.human_evaluations
+"""
+
+
+def watermark_label(watermark: Sequence[Any]) -> Tuple[str, ...]:
+    """Watermark as strings, so one read from the database and one stored in a file compare equal."""
+    return tuple(str(part) for part in watermark)
+
+
+def _sync_marker(label: Sequence[str]) -> Optional[str]:
+    """The sync marker of a watermark label, or None for labels written before it was added."""
+    return label[3] if len(label) > 3 else None
+
+
+class _Dictionary:
+    """Dictionary encoding of a text column: value -> code, with NULL as code -1."""
+
+    __slots__ = ("codes", "lookup", "values")
+
+    def __init__(self, column: List[Optional[str]]):
+        lookup: Dict[str, int] = {}
+        codes = np.empty(len(column), dtype=np.int32)
+        for i, value in enumerate(column):
+            codes[i] = -1 if value is None else lookup.setdefault(value, len(lookup))
+
+        self.codes = codes
+        self.lookup = lookup
+        # Code -1 indexes the trailing None, so decoding needs no special case
+        self.values = np.array(list(lookup) + [None], dtype=object)
+
+    def decode(self, rows: "np.ndarray") -> list:
+        """Decode the values at the given row positions."""
+        return self.values[self.codes[rows]].tolist()
+
+
+class _CallColumns:
+    """One immutable snapshot of the listing columns, in listing order."""
+
+    def __init__(self, columns: Sequence[Sequence[Any]]):
+        call_ids, member_ids, call_dates, call_times, scores, rep_ids = [list(column) for column in columns]
+
+        self.size = len(call_ids)
+        self.call_ids = np.array(call_ids, dtype=object)
+        self.positions = {call_id: i for i, call_id in enumerate(call_ids)}
+        self.members = _Dictionary(member_ids)
+        self.reps = _Dictionary(rep_ids)
+        self.call_dates = np.array(call_dates, dtype=object)
+        self.call_times = np.array(call_times, dtype=object)
+        # COALESCE(call_date, '') as a string array, for vectorized range masks
+        self.date_keys = np.array([value or "" for value in call_dates], dtype=str)
+        self.date_null = np.array([value is None for value in call_dates], dtype=bool)
+        self.ai_scores = np.array(scores, dtype=object)
+        self.ai_score_values = np.array(
+            [np.nan if score is None else score for score in scores], dtype=np.float64
+        )
+        self.total_scores = self.ai_scores
+        self.has_override = np.zeros(self.size, dtype=bool)
+
+    def with_overrides(self, overrides: List[Tuple[Any, ...]]) -> "_CallColumns":
+        """
+        Copy of this snapshot with new human override columns.
+
+        Args:
+            overrides: Rows of (call_id, total_score_override)
+
+        Returns:
+            New snapshot sharing every other column with this one
+        """
+        columns = object.__new__(_CallColumns)
+        columns.__dict__.update(self.__dict__)
+
+        total_scores = self.ai_scores.copy()
+        has_override = np.zeros(self.size, dtype=bool)
+        for call_id, total_score_override in overrides:
+            position = self.positions.get(call_id)
+            if position is None:
+                continue
+            has_override[position] = True
+            if total_score_override is not None:
+                total_scores[position] = total_score_override
+
+        columns.total_scores = total_scores
+        columns.has_override = has_override
+        return columns
+
+
+class ColumnarCallIndex:
+    """Singleton holding the columnar snapshot and its watermark."""
+
+    _instance: Optional['ColumnarCallIndex'] = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._enabled = np is not None and os.getenv("CALLS_COLUMNAR_INDEX", "off").lower() == "on"
+                    instance._columns = None
+                    instance._watermark = None
+                    instance._refreshing = False
+                    instance._lock = threading.Lock()
+                    instance._loaded_at = None
+                    instance._load_seconds = None
+                    instance._hits = 0
+                    instance._fallbacks = 0
+                    cls._instance = instance
+        return cls._instance
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def is_current(self, watermark: Tuple[Any, ...]) -> bool:
+        """Check whether the loaded snapshot was taken at this watermark."""
+        return self._columns is not None and self._watermark == watermark_label(watermark)
+
+    def load_rows(
+        self,
+        rows: List[Tuple[Any, ...]],
+        overrides: List[Tuple[Any, ...]],
+        watermark: Tuple[Any, ...]
+    ) -> None:
+        """
+        Replace the snapshot with already-fetched rows.
+
+        Args:
+            rows: (call_id, member_id, call_date, call_time, total_score, rep_id)
+                  tuples in listing order
+            overrides: (call_id, total_score_override) tuples
+            watermark: Data watermark the rows were read at
+        """
+        self.load_columns(list(zip(*rows)) if rows else [[] for _ in range(6)], overrides, watermark)
+
+    def load_columns(
+        self,
+        columns: Sequence[Sequence[Any]],
+        overrides: List[Tuple[Any, ...]],
+        watermark: Tuple[Any, ...]
+    ) -> None:
+        """
+        Replace the snapshot with already-fetched columns, e.g. from an Arrow table.
+
+        Args:
+            columns: The call_id, member_id, call_date, call_time, total_score
+                     and rep_id columns, each in listing order
+            overrides: (call_id, total_score_override) tuples
+            watermark: Data watermark the columns were read at
+        """
+        columns = _CallColumns(columns).with_overrides(overrides)
+
+        with self._lock:
+            self._columns = columns
+            self._watermark = watermark_label(watermark)
+            self._loaded_at = time.time()
+
+    def load(self, watermark: Tuple[Any, ...]) -> None:
+        """
+        Load every listing column (blocking). The watermark must be read
+        before the load starts, so the snapshot is never older than its label.
+
+        Args:
+            watermark: Data watermark from get_data_watermark()
+        """
+        started = time.monotonic()
+        lakebase = Lakebase()
+
+        rows = []
+        for batch in lakebase.stream(_LOAD_CALLS_SQL):
+            rows.extend(batch)
+
+        self.load_rows(rows, lakebase.query(_LOAD_OVERRIDES_SQL), watermark)
+        self._load_seconds = round(time.monotonic() - started, 3)
+        logger.info(f"Columnar call index loaded {len(rows)} calls in {self._load_seconds}s")
+
+    def load_overrides(self, watermark: Tuple[Any, ...]) -> None:
+        """
+        Reload only the human override columns (blocking); used when only
+        evaluations changed since the snapshot.
+
+        Args:
+            watermark: Data watermark from get_data_watermark()
+        """
+        columns = self._columns
+        if columns is None:
+            return self.load(watermark)
+
+        columns = columns.with_overrides(Lakebase().query(_LOAD_OVERRIDES_SQL))
+
+        with self._lock:
+            self._columns = columns
+            self._watermark = watermark_label(watermark)
+
+    def _refresh(self, watermark: Tuple[Any, ...]) -> None:
+        """
+        Background refresh: a full load when call_center_scores_sync was
+        written since the snapshot, otherwise just the overrides. The rep
+        stats timestamp is not a sync signal: saving an evaluation bumps it.
+        """
+        try:
+            if (
+                self._columns is None
+                or self._watermark is None
+                or _sync_marker(self._watermark) != _sync_marker(watermark_label(watermark))
+            ):
+                self.load(watermark)
+            else:
+                self.load_overrides(watermark)
+        except Exception as e:
+            logger.warning(f"Columnar call index refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def schedule_refresh(self, watermark: Tuple[Any, ...]) -> None:
+        """
+        Refresh the snapshot to the watermark in a background thread, unless
+        a refresh is already running.
+
+        Args:
+            watermark: Data watermark from get_data_watermark()
+        """
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        threading.Thread(
+            target=self._refresh, args=(tuple(watermark),), name="columnar-call-index", daemon=True
+        ).start()
+
+    def list_calls(
+        self,
+        member_id: Optional[str] = None,
+        min_score: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        call_center_rep_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, str, str]] = None
+    ) -> Optional[List[Tuple[Any, ...]]]:
+        """
+        Answer a list_calls request from the snapshot.
+
+        Arguments and rows are the same as calls_service.list_calls.
+
+        Returns:
+            List of (call_id, member_id, call_date, call_time, total_score,
+            rep_id, has_human_override) tuples, or None if the snapshot cannot
+            answer exactly (not loaded, or the cursor row is unknown)
+        """
+        columns = self._columns
+        if columns is None:
+            return None
+
+        start = 0
+        if after is not None:
+            # The rows are in listing order, so a cursor is the position after its row
+            position = columns.positions.get(after[2])
+            if position is None:
+                return None
+            if ((columns.call_dates[position] or ""), (columns.call_times[position] or "")) != (after[0], after[1]):
+                return None
+            start = position + 1
+
+        mask = np.ones(columns.size - start, dtype=bool)
+
+        if member_id:
+            code = columns.members.lookup.get(member_id)
+            if code is None:
+                return []
+            mask &= columns.members.codes[start:] == code
+
+        if call_center_rep_id:
+            code = columns.reps.lookup.get(call_center_rep_id)
+            if code is None:
+                return []
+            mask &= columns.reps.codes[start:] == code
+
+        if min_score is not None:
+            # NaN (no AI score) compares False, like NULL >= n in SQL
+            mask &= columns.ai_score_values[start:] >= min_score
+
+        if start_date:
+            mask &= ~columns.date_null[start:] & (columns.date_keys[start:] >= start_date)
+
+        if end_date:
+            mask &= ~columns.date_null[start:] & (columns.date_keys[start:] <= f"{end_date} 23:59:59")
+
+        rows = np.flatnonzero(mask) + start
+        if limit is not None:
+            rows = rows[:int(limit)]
+
+        self._hits += 1
+        return list(zip(
+            columns.call_ids[rows].tolist(),
+            columns.members.decode(rows),
+            columns.call_dates[rows].tolist(),
+            columns.call_times[rows].tolist(),
+            columns.total_scores[rows].tolist(),
+            columns.reps.decode(rows),
+            columns.has_override[rows].tolist()
+        ))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return whether the index is enabled and loaded, its size and hit/fallback counters."""
+        columns = self._columns
+        return {
+            "enabled": self._enabled,
+            "loaded": columns is not None,
+            "calls": columns.size if columns is not None else 0,
+            "reps": len(columns.reps.lookup) if columns is not None else 0,
+            "members": len(columns.members.lookup) if columns is not None else 0,
+            "watermark": list(self._watermark) if self._watermark else None,
+            "loaded_at": self._loaded_at,
+            "load_seconds": self._load_seconds,
+            "refreshing": self._refreshing,
+            "hits": self._hits,
+            "fallbacks": self._fallbacks,
+        }
+
+
+async def refresh_columnar_index() -> None:
+    """
+    Start loading the index in the background when it is enabled.
+    Called at startup; returns without waiting for the load.
+    """
+    index = ColumnarCallIndex()
+    if not index.enabled:
+        return
+
+    watermark = await get_data_watermark()
+    if watermark is not None and not index.is_current(watermark):
+        index.schedule_refresh(watermark)
+
+
+async def columnar_list_calls(
+    member_id: Optional[str] = None,
+    min_score: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    call_center_rep_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[str, str, str]] = None
+) -> Optional[List[Tuple[Any, ...]]]:
+    """
+    Answer list_calls from the columnar index when it is enabled and current.
+
+    A stale snapshot schedules a background refresh and is not used.
+
+    Returns:
+        Rows exactly as list_calls returns them, or None when the caller
+        should run the SQL query instead
+    """
+    index = ColumnarCallIndex()
+    if not index.enabled:
+        return None
+
+    watermark = await get_data_watermark()
+    if watermark is None:
+        return None
+
+    if not index.is_current(watermark):
+        index.schedule_refresh(watermark)
+        index._fallbacks += 1
+        return None
+
+    rows = index.list_calls(member_id, min_score, start_date, end_date, call_center_rep_id, limit, after)
+    if rows is None:
+        index._fallbacks += 1
+    return rows
+
+
+def _verification_cases(columns: _CallColumns, samples: int) -> List[Dict[str, Any]]:
+    """Filter combinations built from values present in the snapshot."""
+    step = max(1, columns.size // max(1, samples))
+    cases: List[Dict[str, Any]] = [{}, {"limit": 50}, {"min_score": 40}, {"min_score": 40, "limit": 25}]
+    for position in range(0, columns.size, step):
+        call_date = columns.call_dates[position]
+        day = str(call_date)[:10] if call_date else None
+        rep_id = columns.reps.values[columns.reps.codes[position]]
+        member_id = columns.members.values[columns.members.codes[position]]
+        after = ((call_date or ""), (columns.call_times[position] or ""), columns.call_ids[position])
+        cases.extend([
+            {"call_center_rep_id": rep_id},
+            {"call_center_rep_id": rep_id, "limit": 10, "after": after},
+            {"member_id": member_id},
+            {"start_date": day, "end_date": day},
+            {"start_date": day, "min_score": 30, "limit": 100},
+            {"limit": 20, "after": after},
+        ])
+    return cases
+
+
+async def verify_against_sql(samples: int = 20) -> Dict[str, Any]:
+    """
+    Differential check: run list_calls filter combinations through both the
+    snapshot and the SQL path (bypassing the result cache) and compare rows.
+
+    Args:
+        samples: Number of sample rows to build filter combinations from
+
+    Returns:
+        Dictionary with the number of cases checked and every mismatch
+    """
+    from services.calls_service import _list_calls_query
+
+    watermark = await get_data_watermark()
+    index = ColumnarCallIndex()
+    await asyncio.get_running_loop().run_in_executor(None, index.load, watermark)
+
+    checked = 0
+    mismatches = []
+    for case in _verification_cases(index._columns, samples):
+        case = {key: value for key, value in case.items() if value is not None}
+        expected_statement, params = _list_calls_query(
+            case.get("member_id"),
+            case.get("min_score"),
+            case.get("start_date"),
+            case.get("end_date"),
+            case.get("call_center_rep_id"),
+            case.get("limit"),
+            case.get("after")
+        )
+        expected = []
+        async for batch in expected_statement.stream(*params):
+            expected.extend(tuple(row) for row in batch)
+
+        actual = index.list_calls(**case)
+        checked += 1
+        if actual != expected:
+            mismatches.append({
+                "case": case,
+                "sql_rows": len(expected),
+                "index_rows": None if actual is None else len(actual),
+            })
+
+    return {"cases": checked, "mismatches": mismatches}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the columnar call index with the SQL listing.")
+    parser.add_argument("--verify", action="store_true", help="load the index and diff it against SQL")
+    parser.add_argument("--samples", type=int, default=20, help="sample rows to build filter combinations from")
+    args = parser.parse_args()
+
+    if np is None:
+        raise SystemExit("numpy is not installed; the columnar index is unavailable")
+
+    if args.verify:
+        print(json.dumps(asyncio.run(verify_against_sql(args.samples)), indent=2, default=str))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    main()
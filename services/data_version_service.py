@@ -0,0 +1,113 @@
+"""
+Service for computing the data version used as the basis of HTTP ETags.
+
+The data version changes whenever data served by the read endpoints can
+change: when the sync job writes call_center_scores_sync, when the rep stats
+are refreshed, or when a human evaluation is saved or deleted.
+It is cached briefly and invalidated on local writes, so validating a
+conditional GET usually costs no database round trip at all.
+
+The sync marker is the count of rows inserted, updated and deleted in
+call_center_scores_sync according to pg_stat_user_tables: a constant-time
+read that moves on every sync write, including a rewrite that leaves the row
+count and dates unchanged. Postgres publishes these counters when the
+writing transaction's backend next goes idle (at most about a second later),
+and a statistics reset or crash restart sets them back; both only change the
+version, which costs clients one full response.
+
+Cached read results are only as fresh as the version they were read at, so
+when the watermark moves they are dropped before the new version is used
+(the endpoints read the version before the data).
+"""
+from typing import Optional, Tuple, Any
+from psycopg2.errors import UndefinedTable
+from services.lakebase import Lakebase
+from services.result_cache import ResultCache, cached
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Result cache namespaces holding data served under the data version
+DATA_NAMESPACES = ("calls", "call", "ccrs", "ccr_stats", "human_evaluation")
+
+_WATERMARK_SQL = """
+    SELECT
+        {stats_refreshed_at},
+        (SELECT MAX(evaluation_date) FROM public.telco_call_center_analytics.human_evaluations),
+        (SELECT COUNT(*) FROM public.telco_call_center_analytics.human_evaluations),
+        (SELECT n_tup_ins + n_tup_upd + n_tup_del
+         FROM pg_stat_user_tables
+         WHERE relid = to_regclass('public.telco_call_center_analytics.call_center_scores_sync'))
+"""
+
+_STATS_REFRESHED_AT = "(SELECT MAX(updated_at) FROM public.telco_call_center_analytics.rep_score_stats)"
+
+# Watermark the cached results were last checked against
+_last_watermark: Optional[Tuple[Any, ...]] = None
+
+
+@cached("data_version", tags=lambda watermark: ["data_version"])
+async def _read_watermark() -> Tuple[Any, Any, int, Optional[int]]:
+    """
+    Read the data watermark. Failures raise, so they are never cached.
+    
+    Returns:
+        Tuple of (latest stats refresh timestamp, latest evaluation_date,
+        evaluation count, sync marker)
+    """
+    lakebase = Lakebase()
+    try:
+        rows = await lakebase.aquery(_WATERMARK_SQL.format(stats_refreshed_at=_STATS_REFRESHED_AT))
+    except UndefinedTable:
+        # rep_score_stats is created by the first stats refresh; until then it has no timestamp
+        rows = await lakebase.aquery(_WATERMARK_SQL.format(stats_refreshed_at="NULL::timestamp"))
+    
+    if not rows:
+        raise LookupError("watermark query returned no row")
+    return tuple(rows[0])
+
+
+async def get_data_watermark() -> Optional[Tuple[Any, Any, int, Optional[int]]]:
+    """
+    Get the components of the data version.
+    
+    When the watermark has moved since it was last read, every cached result
+    in DATA_NAMESPACES is dropped first, so a body read before the change is
+    never served under the new version's ETag.
+    
+    Returns:
+        Tuple of (latest stats refresh timestamp, latest evaluation_date,
+        evaluation count, sync marker), or None if they cannot be determined
+    """
+    global _last_watermark
+    
+    try:
+        watermark = await _read_watermark()
+    except Exception as e:
+        logger.warning(f"Could not determine data version: {e}")
+        return None
+    
+    if watermark != _last_watermark:
+        if _last_watermark is not None:
+            ResultCache().invalidate_namespaces(*DATA_NAMESPACES)
+        _last_watermark = watermark
+    
+    return watermark
+
+
+async def get_data_version() -> Optional[str]:
+    """
+    Get the current data version.
+    
+    Returns:
+        Version string built from the latest stats refresh timestamp, the
+        latest evaluation_date, the evaluation count and the sync marker,
+        or None if it cannot be determined
+    """
+    watermark = await get_data_watermark()
+    
+    if watermark is None:
+        return None
+    
+    stats_refreshed_at, evaluated_at, evaluation_count, sync_marker = watermark
+    return f"{stats_refreshed_at}|{evaluated_at}|{evaluation_count}|{sync_marker}"
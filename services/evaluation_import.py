@@ -0,0 +1,215 @@
+"""
+Parsing and validation of bulk human evaluation imports.
+
+QA teams score calibration batches offline and upload them as JSON lines or
+CSV. Every row is validated here against the scorecard structure before
+anything reaches the database; invalid rows are reported with their row
+number and skipped, valid rows are staged and upserted together (see
+human_evaluations_service.import_human_evaluations).
+
+JSON lines: one object per line with call_id, evaluator_name,
+scorecard_overrides (same structure as scorecard_json), total_score_override
+and optional feedback_text.
+
+CSV: a header row with call_id, evaluator_name, total_score_override and
+feedback_text, plus either a scorecard_overrides column holding JSON or one
+column per criterion (recording_disclosure, member_authentication, ...).
+
+total_score_override may be omitted when all six criteria are given; it is
+then the sum of the criterion scores.
+"""
+import csv
+import io
+import json
+from typing import List, Tuple, Any, Optional, Dict
+from services.scorecard import CRITERIA, CRITERIA_PATHS, compact_overrides
+
+IMPORT_FORMATS = ("jsonl", "csv")
+
+# Largest accepted batch
+MAX_IMPORT_ROWS = 20000
+
+MAX_CRITERION_SCORE = 10
+MAX_TOTAL_SCORE = 60
+
+
+class ImportRecord:
+    """One validated evaluation row."""
+
+    __slots__ = ("row_number", "call_id", "evaluator_name", "scorecard_overrides", "total_score_override", "feedback_text")
+
+    def __init__(
+        self,
+        row_number: int,
+        call_id: str,
+        evaluator_name: str,
+        scorecard_overrides: dict,
+        total_score_override: Optional[int],
+        feedback_text: str
+    ):
+        self.row_number = row_number
+        self.call_id = call_id
+        self.evaluator_name = evaluator_name
+        self.scorecard_overrides = scorecard_overrides
+        self.total_score_override = total_score_override
+        self.feedback_text = feedback_text
+
+
+def _overrides_from_columns(row: Dict[str, Any]) -> dict:
+    """Build scorecard_overrides from per-criterion CSV columns; blank cells are not overridden."""
+    overrides: dict = {}
+    for criterion, (group, section, name, _) in zip(CRITERIA, CRITERIA_PATHS):
+        value = row.get(criterion)
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == "":
+            continue
+        if isinstance(value, str):
+            try:
+                score: Any = int(value)
+            except ValueError:
+                try:
+                    score = float(value)
+                except ValueError:
+                    raise ValueError(f"{criterion} must be a number")
+        else:
+            score = value
+        overrides.setdefault(group, {}).setdefault(section, {})[name] = {"score": score}
+    return overrides
+
+
+def _integer(value: Any, field: str) -> Optional[int]:
+    """Read an optional integer field from JSON (int) or CSV (text)."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"{field} must be an integer")
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            raise ValueError(f"{field} must be an integer")
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if not isinstance(value, int):
+        raise ValueError(f"{field} must be an integer")
+    return value
+
+
+def _validate(row_number: int, row: Dict[str, Any], default_evaluator: Optional[str]) -> ImportRecord:
+    """
+    Validate one raw row.
+
+    Returns:
+        The record; a missing total is filled in from the criterion scores
+
+    Raises:
+        ValueError: Describing the first problem found
+    """
+    call_id = row.get("call_id")
+    if not isinstance(call_id, str) or not call_id.strip():
+        raise ValueError("call_id is required")
+
+    evaluator_name = row.get("evaluator_name") or default_evaluator
+    if not isinstance(evaluator_name, str) or not evaluator_name.strip():
+        raise ValueError("evaluator_name is required")
+
+    feedback_text = row.get("feedback_text") or ""
+    if not isinstance(feedback_text, str):
+        raise ValueError("feedback_text must be a string")
+
+    overrides = row.get("scorecard_overrides")
+    if isinstance(overrides, str):
+        try:
+            overrides = json.loads(overrides) if overrides.strip() else {}
+        except json.JSONDecodeError as e:
+            raise ValueError(f"scorecard_overrides is not valid JSON: {e}")
+    elif overrides is None:
+        overrides = _overrides_from_columns(row)
+    if not isinstance(overrides, dict):
+        raise ValueError("scorecard_overrides must be an object")
+
+    compact = compact_overrides(overrides)
+    if compact is None:
+        raise ValueError("scorecard_overrides may only contain criterion scores, e.g. criteria_1.technical_aspects.call_closing.score")
+    for criterion, score in compact.to_dict().items():
+        if score is not None and not 0 <= score <= MAX_CRITERION_SCORE:
+            raise ValueError(f"{criterion} score must be between 0 and {MAX_CRITERION_SCORE}")
+
+    total_score_override = _integer(row.get("total_score_override"), "total_score_override")
+    if total_score_override is None:
+        if any(score is None for score in compact.scores):
+            raise ValueError("total_score_override is required unless all six criteria are given")
+        total_score_override = int(round(sum(compact.scores)))
+    if total_score_override is not None and not 0 <= total_score_override <= MAX_TOTAL_SCORE:
+        raise ValueError(f"total_score_override must be between 0 and {MAX_TOTAL_SCORE}")
+
+    return ImportRecord(row_number, call_id.strip(), evaluator_name.strip(), overrides, total_score_override, feedback_text)
+
+
+def _raw_rows(body: str, format: str) -> List[Tuple[int, Any]]:
+    """Split the body into (row number, raw row); a row that cannot be parsed is an Exception."""
+    if format == "csv":
+        reader = csv.DictReader(io.StringIO(body))
+        if not reader.fieldnames or "call_id" not in reader.fieldnames:
+            raise ValueError("CSV header must include call_id")
+        # Row numbers count the header as row 1, like a spreadsheet
+        return [(index + 2, row) for index, row in enumerate(reader)]
+
+    rows = []
+    for index, line in enumerate(body.splitlines()):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("each line must be a JSON object")
+        except ValueError as e:
+            row = e
+        rows.append((index + 1, row))
+    return rows
+
+
+def parse_import(body: str, format: str, default_evaluator: Optional[str] = None) -> Tuple[List[ImportRecord], List[Dict[str, Any]]]:
+    """
+    Parse and validate a bulk import.
+
+    Args:
+        body: Uploaded text
+        format: jsonl or csv
+        default_evaluator: evaluator_name for rows that do not set one
+
+    Returns:
+        Tuple of (valid records, errors); each error has row, call_id and error
+
+    Raises:
+        ValueError: If the format is unknown, the CSV header is unusable or
+                    the batch has more than MAX_IMPORT_ROWS rows
+    """
+    if format not in IMPORT_FORMATS:
+        raise ValueError(f"Invalid import format: {format}")
+
+    raw_rows = _raw_rows(body, format)
+    if len(raw_rows) > MAX_IMPORT_ROWS:
+        raise ValueError(f"Import has {len(raw_rows)} rows; at most {MAX_IMPORT_ROWS} are accepted per batch")
+
+    records: List[ImportRecord] = []
+    errors: List[Dict[str, Any]] = []
+    first_row: Dict[str, int] = {}
+
+    for row_number, row in raw_rows:
+        call_id = row.get("call_id") if isinstance(row, dict) else None
+        try:
+            if isinstance(row, Exception):
+                raise ValueError(f"invalid JSON: {row}")
+            record = _validate(row_number, row, default_evaluator)
+            if record.call_id in first_row:
+                raise ValueError(f"duplicate call_id (first seen in row {first_row[record.call_id]})")
+        except ValueError as e:
+            errors.append({"row": row_number, "call_id": call_id, "error": str(e)})
+            continue
+
+        first_row[record.call_id] = row_number
+        records.append(record)
+
+    return records, errors
@@ -5,10 +5,13 @@ This service handles storing and retrieving human evaluations that override
 AI-generated scores. Human evaluations are stored separately to preserve the
 original AI scores while allowing reviewers to provide corrected assessments.
 
-⚠️ SECURITY WARNING ⚠️
-THIS SERVICE USES F-STRING SQL QUERIES INSTEAD OF PARAMETERIZED QUERIES.
-THIS IS A SECURITY RISK AND MAKES THE APPLICATION VULNERABLE TO SQL INJECTION.
-THIS IS ACCEPTABLE ONLY FOR DEMO PURPOSES - NEVER USE IN PRODUCTION!
+Queries are named prepared statements executed with bound parameters
+(see services/prepared_statements.py).
+
+Bulk imports (import_human_evaluations) COPY the validated rows into a
+temporary staging table and upsert them with one statement in the same
+transaction; rep stats, daily rollups and cached results are refreshed once
+per batch rather than once per row.
 
 Database Schema:
 ----------------
@@ -41,12 +44,176 @@ The scorecard_overrides JSONB follows the same structure as scorecard_json:
   }
 }
 """
-from typing import List, Tuple, Any, Optional
+from typing import List, Tuple, Any, Optional, Dict
 from services.lakebase import Lakebase
+from services.prepared_statements import PreparedStatement
+from services.evaluation_import import ImportRecord
+from services.rep_stats_service import refresh_rep_stats_for_call, refresh_rep_stats_for_calls
+from services.rep_trend_service import refresh_rep_rollups_for_call, refresh_rep_rollups_for_calls
+from services.result_cache import ResultCache, cached
+from services.scorecard import compact_overrides
+import csv
+import io
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+_EVALUATION_COLUMNS = """
+            evaluation_id, 
+            call_id, 
+            evaluator_name, 
+            evaluation_date,
+            scorecard_overrides, 
+            total_score_override, 
+            feedback_text"""
+
+_GET_HUMAN_EVALUATION = PreparedStatement("get_human_evaluation", f"""
+        SELECT {_EVALUATION_COLUMNS}
+        FROM public.telco_call_center_analytics.human_evaluations 
+        WHERE call_id = %s
+""")
+
+_GET_HUMAN_EVALUATIONS = PreparedStatement("get_human_evaluations", f"""
+        SELECT {_EVALUATION_COLUMNS}
+        FROM public.telco_call_center_analytics.human_evaluations 
+        WHERE call_id = ANY(%s::text[])
+""")
+
+_SAVE_HUMAN_EVALUATION = PreparedStatement("save_human_evaluation", """
+        INSERT INTO public.telco_call_center_analytics.human_evaluations 
+            (call_id, evaluator_name, scorecard_overrides, total_score_override, feedback_text)
+        VALUES 
+            (%s, %s, %s::jsonb, %s, %s)
+        ON CONFLICT (call_id) 
+        DO UPDATE SET
+            evaluator_name = EXCLUDED.evaluator_name,
+            evaluation_date = CURRENT_TIMESTAMP,
+            scorecard_overrides = EXCLUDED.scorecard_overrides,
+            total_score_override = EXCLUDED.total_score_override,
+            feedback_text = EXCLUDED.feedback_text
+        RETURNING *
+""")
+
+_DELETE_HUMAN_EVALUATION = PreparedStatement("delete_human_evaluation", """
+        DELETE FROM public.telco_call_center_analytics.human_evaluations 
+        WHERE call_id = %s
+        RETURNING *
+""")
+
+_GET_ALL_EVALUATED_CALL_IDS = PreparedStatement("get_all_evaluated_call_ids", """
+        SELECT call_id 
+        FROM public.telco_call_center_analytics.human_evaluations
+        ORDER BY evaluation_date DESC
+""")
+
+_IMPORT_STAGING_SETUP = """
+        CREATE TEMP TABLE evaluation_import (
+            row_number INTEGER,
+            call_id TEXT,
+            evaluator_name TEXT,
+            scorecard_overrides JSONB,
+            total_score_override INTEGER,
+            feedback_text TEXT
+        ) ON COMMIT DROP
+"""
+
+_IMPORT_STAGING_COPY = "COPY evaluation_import FROM STDIN WITH (FORMAT csv)"
+
+# Rows for calls that do not exist are left out of the upsert and reported
+_IMPORT_UPSERT = """
+        WITH upserted AS (
+            INSERT INTO public.telco_call_center_analytics.human_evaluations AS h
+                (call_id, evaluator_name, scorecard_overrides, total_score_override, feedback_text)
+            SELECT i.call_id, i.evaluator_name, i.scorecard_overrides, i.total_score_override, i.feedback_text
+            FROM evaluation_import i
+            WHERE EXISTS (
+                SELECT 1 FROM public.telco_call_center_analytics.call_center_scores_sync s
+                WHERE s.call_id = i.call_id
+            )
+            ON CONFLICT (call_id)
+            DO UPDATE SET
+                evaluator_name = EXCLUDED.evaluator_name,
+                evaluation_date = CURRENT_TIMESTAMP,
+                scorecard_overrides = EXCLUDED.scorecard_overrides,
+                total_score_override = EXCLUDED.total_score_override,
+                feedback_text = EXCLUDED.feedback_text
+            RETURNING h.call_id, (h.xmax = 0) AS inserted
+        )
+        SELECT i.row_number, i.call_id, u.inserted
+        FROM evaluation_import i
+        LEFT JOIN upserted u ON u.call_id = i.call_id
+        ORDER BY i.row_number
+"""
+
+
+def _with_compact_overrides(row: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    """
+    Append the compact form of the row's scorecard_overrides, so merges of
+    this (cached) row skip converting the overrides again.
+    """
+    overrides = row[4]
+    if isinstance(overrides, str):
+        overrides = json.loads(overrides)
+    compact = compact_overrides(overrides) if isinstance(overrides, dict) else None
+    return tuple(row) + (compact,)
+
+
+async def _refresh_derived_stats(call_id: str) -> None:
+    """
+    Recompute the affected rep's precomputed stats and the call's daily
+    rollup after an evaluation changes, then invalidate the cached results
+    for that call and rep.
+    """
+    cache = ResultCache()
+    try:
+        stats_row = await refresh_rep_stats_for_call(call_id)
+    except Exception as e:
+        logger.warning(f"Failed to refresh rep stats for call {call_id}: {e}")
+        stats_row = None
+    
+    try:
+        await refresh_rep_rollups_for_call(call_id)
+    except Exception as e:
+        logger.warning(f"Failed to refresh daily rollups for call {call_id}: {e}")
+    
+    if stats_row is not None:
+        cache.invalidate_tags(f"call:{call_id}", f"rep:{stats_row[0]}", "data_version")
+    else:
+        # Rep unknown: drop everything that may include this call's scores
+        cache.invalidate_tags(f"call:{call_id}", "data_version")
+        cache.invalidate_namespaces("calls", "ccr_stats")
+
+
+async def _refresh_derived_stats_for_calls(call_ids: List[str]) -> None:
+    """
+    Recompute the affected reps' stats and daily rollups once for a batch
+    of changed evaluations, then invalidate the cached results for those
+    calls and reps in one pass.
+    """
+    cache = ResultCache()
+    try:
+        stats_rows = await refresh_rep_stats_for_calls(call_ids)
+    except Exception as e:
+        logger.warning(f"Failed to refresh rep stats for {len(call_ids)} imported calls: {e}")
+        stats_rows = None
+    
+    try:
+        await refresh_rep_rollups_for_calls(call_ids)
+    except Exception as e:
+        logger.warning(f"Failed to refresh daily rollups for {len(call_ids)} imported calls: {e}")
+    
+    call_tags = [f"call:{call_id}" for call_id in call_ids]
+    if stats_rows is not None:
+        rep_tags = {f"rep:{row[0]}" for row in stats_rows}
+        cache.invalidate_tags(*call_tags, *rep_tags, "data_version")
+    else:
+        # Reps unknown: drop everything that may include these calls' scores
+        cache.invalidate_tags(*call_tags, "data_version")
+        cache.invalidate_namespaces("calls", "ccr_stats")
 
 
-def ensure_human_evaluations_table():
+async def ensure_human_evaluations_table() -> List[Tuple[Any, ...]]:
     """
     Ensure the human_evaluations table exists.
     This should be called on application startup.
@@ -61,14 +228,16 @@ def ensure_human_evaluations_table():
             total_score_override INTEGER,
             feedback_text TEXT,
             UNIQUE(call_id)
-        ) RETURNING *
+        );
+        SELECT to_regclass('public.telco_call_center_analytics.human_evaluations')::text
     """
     
     lakebase = Lakebase()
-    return lakebase.query(sql)
+    return await lakebase.aquery(sql)
 
 
-def get_human_evaluation(call_id: str) -> Optional[Tuple[Any, ...]]:
+@cached("human_evaluation", tags=lambda row, call_id: [f"call:{call_id}"])
+async def get_human_evaluation(call_id: str) -> Optional[Tuple[Any, ...]]:
     """
     Get human evaluation for a specific call.
     
@@ -77,31 +246,38 @@ def get_human_evaluation(call_id: str) -> Optional[Tuple[Any, ...]]:
     
     Returns:
         Tuple containing (evaluation_id, call_id, evaluator_name, evaluation_date,
-                         scorecard_overrides, total_score_override, feedback_text)
-        or None if no evaluation exists
+                         scorecard_overrides, total_score_override, feedback_text,
+                         compact_overrides)
+        or None if no evaluation exists; compact_overrides is a CompactScorecard,
+        or None when the overrides need the generic deep merge
     """
-    sql = f"""
-        SELECT 
-            evaluation_id, 
-            call_id, 
-            evaluator_name, 
-            evaluation_date,
-            scorecard_overrides, 
-            total_score_override, 
-            feedback_text
-        FROM public.telco_call_center_analytics.human_evaluations 
-        WHERE call_id = '{call_id}'
+    row = await _GET_HUMAN_EVALUATION.fetch_one(call_id)
+    
+    if row is None:
+        return None
+    return _with_compact_overrides(row)
+
+
+async def get_human_evaluations(call_ids: List[str]) -> Dict[str, Tuple[Any, ...]]:
     """
+    Get human evaluations for several calls in one query.
     
-    lakebase = Lakebase()
-    rows = lakebase.query(sql)
+    Args:
+        call_ids: The call IDs to retrieve evaluations for
     
-    if rows and len(rows) > 0:
-        return rows[0]
-    return None
+    Returns:
+        Dictionary mapping call_id to the same tuple get_human_evaluation returns;
+        calls without an evaluation are absent
+    """
+    if not call_ids:
+        return {}
+    
+    rows = await _GET_HUMAN_EVALUATIONS.fetch(list(call_ids))
+    
+    return {row[1]: _with_compact_overrides(row) for row in rows}
 
 
-def save_human_evaluation(
+async def save_human_evaluation(
     call_id: str,
     evaluator_name: str,
     scorecard_overrides: dict,
@@ -121,35 +297,22 @@ def save_human_evaluation(
     Returns:
         Tuple containing the saved evaluation row
     """
-    # Convert scorecard to JSON string
-    scorecard_json = json.dumps(scorecard_overrides).replace("'", "''")
-    feedback_escaped = feedback_text.replace("'", "''")
-    evaluator_escaped = evaluator_name.replace("'", "''")
-    
-    sql = f"""
-        INSERT INTO public.telco_call_center_analytics.human_evaluations 
-            (call_id, evaluator_name, scorecard_overrides, total_score_override, feedback_text)
-        VALUES 
-            ('{call_id}', '{evaluator_escaped}', '{scorecard_json}'::jsonb, {total_score_override}, '{feedback_escaped}')
-        ON CONFLICT (call_id) 
-        DO UPDATE SET
-            evaluator_name = EXCLUDED.evaluator_name,
-            evaluation_date = CURRENT_TIMESTAMP,
-            scorecard_overrides = EXCLUDED.scorecard_overrides,
-            total_score_override = EXCLUDED.total_score_override,
-            feedback_text = EXCLUDED.feedback_text
-        RETURNING *
-    """
+    rows = await _SAVE_HUMAN_EVALUATION.fetch(
+        call_id,
+        evaluator_name,
+        json.dumps(scorecard_overrides),
+        total_score_override,
+        feedback_text
+    )
     
-    lakebase = Lakebase()
-    rows = lakebase.query(sql)
+    await _refresh_derived_stats(call_id)
     
     if rows and len(rows) > 0:
         return rows[0]
     return None
 
 
-def delete_human_evaluation(call_id: str) -> bool:
+async def delete_human_evaluation(call_id: str) -> bool:
     """
     Delete a human evaluation for a call.
     
@@ -159,32 +322,75 @@ def delete_human_evaluation(call_id: str) -> bool:
     Returns:
         True if deleted, False if not found
     """
-    sql = f"""
-        DELETE FROM public.telco_call_center_analytics.human_evaluations 
-        WHERE call_id = '{call_id}'
-        RETURNING *
-    """
+    rows = await _DELETE_HUMAN_EVALUATION.fetch(call_id)
     
-    lakebase = Lakebase()
-    rows = lakebase.query(sql)
+    deleted = bool(rows and len(rows) > 0)
+    if deleted:
+        await _refresh_derived_stats(call_id)
     
-    return rows and len(rows) > 0
+    return deleted
 
 
-def get_all_evaluated_call_ids() -> List[str]:
+async def get_all_evaluated_call_ids() -> List[str]:
     """
     Get list of all call IDs that have human evaluations.
     
     Returns:
         List of call IDs
     """
-    sql = """
-        SELECT call_id 
-        FROM public.telco_call_center_analytics.human_evaluations
-        ORDER BY evaluation_date DESC
+    rows = await _GET_ALL_EVALUATED_CALL_IDS.fetch()
+    
+    return [row[0] for row in rows if row[0]]
+
+
+async def import_human_evaluations(records: List[ImportRecord]) -> Dict[str, Any]:
+    """
+    Save or update many validated human evaluations in one transaction.
+    
+    The rows are COPY'd into a temporary staging table and upserted with a
+    single statement; rows whose call does not exist are skipped. Derived
+    stats and caches are refreshed once for the whole batch.
+    
+    Args:
+        records: Validated rows from evaluation_import.parse_import
+    
+    Returns:
+        Dictionary with imported, inserted and updated counts and an errors
+        list (row, call_id, error) for rows that were not saved
     """
+    result: Dict[str, Any] = {"imported": 0, "inserted": 0, "updated": 0, "errors": []}
+    if not records:
+        return result
+    
+    await ensure_human_evaluations_table()
+    
+    data = io.StringIO()
+    # Strings are quoted so an empty feedback_text stays "" rather than NULL
+    writer = csv.writer(data, quoting=csv.QUOTE_NONNUMERIC)
+    for record in records:
+        writer.writerow([
+            record.row_number,
+            record.call_id,
+            record.evaluator_name,
+            json.dumps(record.scorecard_overrides),
+            record.total_score_override,
+            record.feedback_text
+        ])
+    data.seek(0)
     
     lakebase = Lakebase()
-    rows = lakebase.query(sql)
+    rows = await lakebase.acopy_in(_IMPORT_STAGING_SETUP, _IMPORT_STAGING_COPY, data, _IMPORT_UPSERT)
     
-    return [row[0] for row in rows if row[0]]
+    saved_call_ids = []
+    for row_number, call_id, inserted in rows:
+        if inserted is None:
+            result["errors"].append({"row": row_number, "call_id": call_id, "error": "call_id not found"})
+            continue
+        saved_call_ids.append(call_id)
+        result["inserted" if inserted else "updated"] += 1
+    result["imported"] = len(saved_call_ids)
+    
+    if saved_call_ids:
+        await _refresh_derived_stats_for_calls(saved_call_ids)
+    
+    return result
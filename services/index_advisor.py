@@ -0,0 +1,289 @@
+"""
+Index advisor and migrations for the call listing access patterns.
+
+calls_service filters call_center_scores_sync by rep_id, member_id, call_date
+ranges and total_score and always orders by (call_date, call_time, call_id)
+descending; the rep directory refresh groups calls by rep_id. Evaluations are
+looked up by call_id. This module:
+
+- lists the existing indexes on those tables from pg_indexes (with validity),
+- runs EXPLAIN for each query shape calls_service uses and reports every
+  sequential scan in the plans. Each shape is planned twice: as a custom plan
+  for sample values (what Postgres runs for the first executions of a
+  prepared statement) and as the generic plan it may cache and reuse for any
+  parameters afterwards (EXPLAIN (GENERIC_PLAN), Postgres 16),
+- creates the recommended indexes that are missing. Every migration is
+  idempotent (CREATE INDEX CONCURRENTLY IF NOT EXISTS) and an index left
+  INVALID by an interrupted build is dropped and rebuilt.
+
+Run it from the command line:
+    python -m services.index_advisor            # report only
+    python -m services.index_advisor --apply    # report, then create missing indexes
+
+or at startup with INDEX_ADVISOR_ON_STARTUP=report (log the report) or
+INDEX_ADVISOR_ON_STARTUP=apply (also create missing indexes).
+"""
+import argparse
+import json
+import logging
+import os
+from typing import List, Tuple, Any, Dict, Optional
+from services.lakebase import Lakebase, _positional_placeholders
+from services.calls_service import _list_calls_query, _GET_CALL_BY_ID
+from services.human_evaluations_service import _GET_HUMAN_EVALUATION
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = "telco_call_center_analytics"
+
+# Key expressions matching the listing's ORDER BY, so pages are read in index order
+_RECENT_KEYS = "(COALESCE(call_date, '')) DESC, (COALESCE(call_time, '')) DESC, call_id DESC"
+
+# (index name, table, key list, leading key as it appears in pg_indexes.indexdef)
+RECOMMENDED_INDEXES = [
+    ("idx_scores_sync_recent", "call_center_scores_sync", _RECENT_KEYS, "COALESCE(call_date"),
+    ("idx_scores_sync_rep_recent", "call_center_scores_sync", f"rep_id, {_RECENT_KEYS}", "rep_id"),
+    ("idx_scores_sync_member_recent", "call_center_scores_sync", f"member_id, {_RECENT_KEYS}", "member_id"),
+    ("idx_scores_sync_call_id", "call_center_scores_sync", "call_id", "call_id"),
+    ("idx_human_evaluations_call_id", "human_evaluations", "call_id", "call_id"),
+]
+
+
+def get_existing_indexes() -> List[Tuple[Any, ...]]:
+    """
+    List the indexes on the tables the advisor manages.
+
+    Returns:
+        List of tuples containing (tablename, indexname, indexdef, is_valid)
+    """
+    tables = sorted({table for _, table, _, _ in RECOMMENDED_INDEXES})
+    sql = """
+        SELECT p.tablename, p.indexname, p.indexdef, x.indisvalid
+        FROM pg_indexes p
+        JOIN pg_index x
+            ON x.indexrelid = (quote_ident(p.schemaname) || '.' || quote_ident(p.indexname))::regclass
+        WHERE p.schemaname = %s AND p.tablename = ANY(%s)
+        ORDER BY p.tablename, p.indexname
+    """
+    return Lakebase().query(sql, (SCHEMA, tables))
+
+
+def _leading_key(indexdef: str) -> str:
+    """The first key of an index definition, e.g. 'rep_id' for '... USING btree (rep_id, ...)'."""
+    keys = indexdef[indexdef.find("(", indexdef.find(" USING ")) + 1:]
+    return keys.lstrip("(").strip()
+
+
+def plan_index_migrations(existing: List[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
+    """
+    Work out which recommended indexes are missing.
+
+    A recommendation is satisfied by a valid index of the same name, or by any
+    valid index on the same table with the same leading key (for example the
+    UNIQUE(call_id) constraint on human_evaluations).
+
+    Args:
+        existing: Rows from get_existing_indexes()
+
+    Returns:
+        List of dicts with index, table, reason and the statements to run
+    """
+    migrations = []
+    for name, table, keys, leading in RECOMMENDED_INDEXES:
+        same_name = [row for row in existing if row[1] == name]
+        covering = [
+            row for row in existing
+            if row[0] == table and row[3] and _leading_key(row[2]).startswith(leading)
+        ]
+
+        if same_name and same_name[0][3]:
+            continue
+        if covering and not same_name:
+            continue
+
+        statements = []
+        if same_name:
+            # A failed CONCURRENTLY build leaves an INVALID index that IF NOT EXISTS would skip
+            statements.append(f"DROP INDEX CONCURRENTLY IF EXISTS {SCHEMA}.{name}")
+            reason = "invalid index from an interrupted build"
+        else:
+            reason = "missing"
+        statements.append(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {SCHEMA}.{table} ({keys})")
+
+        migrations.append({"index": name, "table": table, "reason": reason, "statements": statements})
+    return migrations
+
+
+def _sample_call() -> Optional[Tuple[Any, ...]]:
+    """A real (call_id, member_id, rep_id, call_date) to plan the query shapes with."""
+    rows = Lakebase().query(f"""
+        SELECT call_id, member_id, rep_id, call_date
+        FROM public.{SCHEMA}.call_center_scores_sync
+        WHERE rep_id IS NOT NULL AND member_id IS NOT NULL
+        LIMIT 1
+    """)
+    return rows[0] if rows else None
+
+
+def _date_range_shape(call_date: Any) -> Tuple[str, Tuple[Any, ...]]:
+    """The unfiltered listing shape with start/end dates and a score floor set."""
+    day = str(call_date or "")[:10]
+    statement, params = _list_calls_query(None, 30, day, day, None, 51, None)
+    return statement.sql, params
+
+
+def _query_shapes() -> List[Tuple[str, str, Tuple[Any, ...]]]:
+    """The (name, sql, params) of every calls_service read shape, bound to sample values."""
+    sample = _sample_call()
+    if sample is None:
+        return []
+    call_id, member_id, rep_id, call_date = sample
+    after = (str(call_date or ""), "", call_id)
+
+    shapes = []
+    for by_member in (False, True):
+        for by_rep in (False, True):
+            for keyset in (False, True):
+                statement, params = _list_calls_query(
+                    member_id if by_member else None,
+                    None,
+                    None,
+                    None,
+                    rep_id if by_rep else None,
+                    51,
+                    after if keyset else None
+                )
+                shapes.append((statement.name, statement.sql, params))
+
+    shapes.append(("list_calls (date range)", *_date_range_shape(call_date)))
+    shapes.append((_GET_CALL_BY_ID.name, _GET_CALL_BY_ID.sql, (call_id,)))
+    shapes.append((_GET_HUMAN_EVALUATION.name, _GET_HUMAN_EVALUATION.sql, (call_id,)))
+    return shapes
+
+
+def _seq_scans(plan: Dict[str, Any]) -> List[str]:
+    """Relations read by Seq Scan nodes anywhere in an EXPLAIN (FORMAT JSON) plan."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+def _explain(sql: str, params: Optional[Tuple[Any, ...]] = None) -> Dict[str, Any]:
+    """Root node of an EXPLAIN (FORMAT JSON) plan for sql, a statement with EXPLAIN options applied."""
+    rows = Lakebase().query(sql, params)
+    plan = rows[0][0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def explain_query_shapes() -> List[Dict[str, Any]]:
+    """
+    EXPLAIN every calls_service query shape and report its sequential scans.
+
+    The custom plan binds sample values as literals; the generic plan keeps
+    the placeholders as $1, $2, ... and is the one a prepared statement
+    switches to once Postgres finds it no costlier than the custom plans.
+
+    Returns:
+        List of dicts with the shape name and, for its custom and generic
+        plans, the estimated total cost and the relations read by sequential
+        scans (empty when the plan uses indexes only)
+    """
+    report = []
+    for name, sql, params in _query_shapes():
+        custom = _explain(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        generic = _explain(f"EXPLAIN (GENERIC_PLAN, FORMAT JSON) {_positional_placeholders(sql)}")
+        report.append({
+            "shape": name,
+            "custom_plan": {"total_cost": custom.get("Total Cost"), "seq_scans": _seq_scans(custom)},
+            "generic_plan": {"total_cost": generic.get("Total Cost"), "seq_scans": _seq_scans(generic)},
+        })
+    return report
+
+
+def advise() -> Dict[str, Any]:
+    """
+    Inspect indexes and query plans.
+
+    Returns:
+        Dictionary with existing indexes, per-shape plan findings and the
+        migrations that would create the missing indexes
+    """
+    existing = get_existing_indexes()
+    return {
+        "indexes": [
+            {"table": row[0], "index": row[1], "definition": row[2], "valid": row[3]}
+            for row in existing
+        ],
+        "query_shapes": explain_query_shapes(),
+        "migrations": plan_index_migrations(existing),
+    }
+
+
+def apply_index_migrations() -> List[str]:
+    """
+    Create the recommended indexes that are missing. Safe to run repeatedly.
+
+    Indexes are built CONCURRENTLY, so the sync pipeline and the app keep
+    writing and reading while they build.
+
+    Returns:
+        Names of the indexes that were created or rebuilt
+    """
+    lakebase = Lakebase()
+    applied = []
+    for migration in plan_index_migrations(get_existing_indexes()):
+        for statement in migration["statements"]:
+            logger.info(f"Index migration: {statement}")
+            lakebase.execute_autocommit(statement)
+        applied.append(migration["index"])
+    return applied
+
+
+def run_startup_check() -> None:
+    """
+    Report (and optionally apply) index findings according to INDEX_ADVISOR_ON_STARTUP.
+    Runs in a background thread at startup; failures are logged, never raised.
+    """
+    mode = os.getenv("INDEX_ADVISOR_ON_STARTUP", "off").lower()
+    if mode not in ("report", "apply"):
+        return
+
+    try:
+        report = advise()
+        for shape in report["query_shapes"]:
+            for plan in ("custom_plan", "generic_plan"):
+                seq_scans = shape[plan]["seq_scans"]
+                if seq_scans:
+                    logger.warning(
+                        f"Index advisor: {shape['shape']} ({plan.replace('_', ' ')}) uses a sequential scan on {', '.join(seq_scans)}"
+                    )
+        for migration in report["migrations"]:
+            logger.warning(f"Index advisor: {migration['index']} on {migration['table']} is {migration['reason']}")
+
+        if mode == "apply" and report["migrations"]:
+            applied = apply_index_migrations()
+            logger.info(f"Index advisor: created {', '.join(applied)}")
+    except Exception as e:
+        logger.warning(f"Index advisor failed: {e}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check Lakebase indexes against the app's query shapes.")
+    parser.add_argument("--apply", action="store_true", help="create the missing recommended indexes")
+    args = parser.parse_args()
+
+    print(json.dumps(advise(), indent=2, default=str))
+    if args.apply:
+        applied = apply_index_migrations()
+        print(json.dumps({"applied": applied}, indent=2))
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    main()
@@ -1,99 +1,838 @@
 """
 Lakebase singleton service for connecting to Databricks Lakebase via PostgreSQL protocol.
+
+The singleton owns a small thread-safe connection pool. Each request borrows a
+connection for the duration of one query and hands it back afterwards, so
+concurrent requests no longer share (or queue behind) a single socket.
+
+Pool settings (all optional environment variables):
+    LAKEBASE_POOL_MIN_SIZE      connections opened on first use and kept warm (default 1)
+    LAKEBASE_POOL_MAX_SIZE      hard cap on open connections (default 10)
+    LAKEBASE_POOL_TIMEOUT       seconds to wait for a free connection (default 30)
+    LAKEBASE_POOL_PING_AFTER    idle seconds after which a borrowed connection is pinged (default 30)
+    LAKEBASE_MAX_PENDING        async queries allowed in flight or queued before callers wait (default 4 x max size)
+    LAKEBASE_CREDENTIAL_REFRESH_MINUTES
+                                credential age at which the background thread renews it (default 45)
+    LAKEBASE_RECYCLE_MINUTES    idle connection age at which the background thread replaces it (default 55)
+    LAKEBASE_STREAM_FETCH_SIZE  rows fetched per round trip by stream()/astream() (default 2000)
+    LAKEBASE_MAX_STREAMS        astream() cursors open at once; more wait for a slot (default half the max size)
+
+Async callers use aquery(), which runs the blocking driver call on a dedicated
+executor sized to the pool so route handlers never block the event loop.
+Identical SELECTs already in flight are coalesced into one round trip, as
+long as no result cache invalidation happened since the shared one started.
+Hot query shapes go through query_prepared()/aquery_prepared(): each named
+statement is PREPAREd once per pooled connection and then EXECUTEd with bound
+parameters, so Postgres parses and plans the shape once instead of per call.
+Large reads use stream() (astream() when async), which pages through a
+server-side named cursor so only one batch of rows is held in memory at a
+time. Bulk writes use copy_in()/acopy_in(): a COPY into a
+staging table plus one set-based statement, in a single transaction. SELECTs
+run in READ ONLY transactions that are rolled back rather than committed, and
+any failed statement is rolled back before its connection returns to the pool.
+
+The WorkspaceClient, the instance's read_write_dns and the database credential
+are cached. A background thread renews the credential and replaces aging idle
+connections ahead of the 59-minute cutoff, so request threads only ever pay
+for a plain psycopg2.connect.
 """
 import os
+import re
+import asyncio
+import itertools
+import logging
+import time
 import uuid
+import threading
 import psycopg2
+import psycopg2.extensions
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Optional, List, Tuple, Any
+from typing import Optional, List, Tuple, Any, Dict, Iterator, AsyncIterator, Callable, Hashable, Sequence, Set, IO
 from databricks.sdk import WorkspaceClient
+from services.token_provider import DatabricksTokenProvider
+from services.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+# psycopg2 placeholders in prepared statement text: %s (a parameter) or %% (a literal %)
+_PLACEHOLDER = re.compile(r"%([s%])")
+
+
+def _positional_placeholders(sql: str) -> str:
+    """Rewrite psycopg2 %s placeholders as the $1, $2, ... that PREPARE expects."""
+    counter = itertools.count(1)
+    return _PLACEHOLDER.sub(lambda m: f"${next(counter)}" if m.group(1) == "s" else "%", sql)
+
+
+class LakebasePoolTimeout(Exception):
+    """Raised when no pooled connection becomes available within the timeout."""
 
 
 class Lakebase:
     """Singleton service for Lakebase database connections."""
-    
+
     _instance: Optional['Lakebase'] = None
-    _connection: Optional[psycopg2.extensions.connection] = None
-    _connection_time: Optional[datetime] = None
+    _instance_lock = threading.Lock()
     _db_user = "mc-call-center-vibing"  # Group name, hardcoded as specified
-    
+    _max_connection_age = timedelta(minutes=59)
+
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._init_pool()
+                    cls._instance = instance
         return cls._instance
-    
-    def _create_connection(self) -> psycopg2.extensions.connection:
-        """Create a new connection to Lakebase with a fresh token."""
-        # Initialize Databricks client
-        w = WorkspaceClient(
-            client_id=os.getenv("DATABRICKS_CLIENT_ID"),
-            client_secret=os.getenv("DATABRICKS_CLIENT_SECRET")
-        )
-        
+
+    def _init_pool(self) -> None:
+        """Initialize pool configuration, state and metrics."""
+        self._min_size = int(os.getenv("LAKEBASE_POOL_MIN_SIZE", "1"))
+        self._max_size = max(1, int(os.getenv("LAKEBASE_POOL_MAX_SIZE", "10")))
+        self._checkout_timeout = float(os.getenv("LAKEBASE_POOL_TIMEOUT", "30"))
+        self._ping_after = float(os.getenv("LAKEBASE_POOL_PING_AFTER", "30"))
+        self._max_pending = max(1, int(os.getenv("LAKEBASE_MAX_PENDING", str(4 * self._max_size))))
+        self._stream_fetch_size = max(1, int(os.getenv("LAKEBASE_STREAM_FETCH_SIZE", "2000")))
+        self._max_streams = max(1, int(os.getenv("LAKEBASE_MAX_STREAMS", str(max(1, self._max_size // 2)))))
+
+        # Async path: one worker thread per pooled connection, plus a semaphore
+        # (created lazily on the running loop) that bounds queued work
+        self._executor = ThreadPoolExecutor(max_workers=self._max_size, thread_name_prefix="lakebase")
+        self._pending: Optional[asyncio.Semaphore] = None
+        # Streams keep a connection checked out between batches, so they get their own
+        # threads and slots: a stream is never stuck waiting for a thread held by a
+        # query that is itself waiting for the stream's connection
+        self._stream_executor = ThreadPoolExecutor(max_workers=self._max_streams, thread_name_prefix="lakebase-stream")
+        self._stream_slots: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[Hashable, asyncio.Future] = {}  # SELECT key -> shared in-flight task
+        self._coalesced = 0
+
+        # Prepared statement names per open connection (keyed by id(conn))
+        self._prepared: Dict[int, Set[str]] = {}
+        self._prepares = 0
+        self._prepared_executions = 0
+
+        # Idle connections as (connection, created_at, returned_at), used LIFO
+        self._idle: List[Tuple[psycopg2.extensions.connection, datetime, float]] = []
+        self._size = 0  # open connections, idle + checked out
+        self._in_use = 0
+        self._warmed_up = False
+        self._cond = threading.Condition()
+
+        # Metrics
+        self._checkouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._created = 0
+        self._discarded = 0
+
+        # Cached Databricks client, instance host and database credential
+        self._credential_refresh_after = timedelta(minutes=float(os.getenv("LAKEBASE_CREDENTIAL_REFRESH_MINUTES", "45")))
+        self._recycle_after = timedelta(minutes=float(os.getenv("LAKEBASE_RECYCLE_MINUTES", "55")))
+        self._workspace_client: Optional[WorkspaceClient] = None
+        self._workspace_token: Optional[str] = None
+        self._host: Optional[str] = None
+        self._credential: Optional[str] = None
+        self._credential_time: Optional[datetime] = None
+        self._credential_lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+
+    def _get_workspace_client(self) -> WorkspaceClient:
+        """
+        Return the cached Databricks client, authenticated as the app's service
+        principal (DATABRICKS_CLIENT_ID/SECRET).
+
+        Only the OAuth token cache is shared with the agent proxy:
+        DATABRICKS_TOKEN is ignored here, so setting it for the proxy never
+        changes the identity that generates database credentials. The client
+        is rebuilt only when the provider hands out a new token, which is a
+        local operation (no network round trip).
+        """
+        token = DatabricksTokenProvider().get_token(use_static_token=False)
+        if self._workspace_client is None or token != self._workspace_token:
+            self._workspace_client = WorkspaceClient(
+                host=os.getenv("DATABRICKS_HOST"),
+                token=token,
+                auth_type="pat"
+            )
+            self._workspace_token = token
+        return self._workspace_client
+
+    def _refresh_credential(self) -> None:
+        """Generate a new database credential (and resolve the host once)."""
+        w = self._get_workspace_client()
         instance_name = os.getenv("LAKEBASE_INSTANCE_NAME")
-        db_name = os.getenv("LAKEBASE_DB_NAME")
-        
+
+        if self._host is None:
+            # Get instance details
+            instance = w.database.get_database_instance(name=instance_name)
+            self._host = instance.read_write_dns
+
         # Generate database credential
         cred = w.database.generate_database_credential(
-            request_id=str(uuid.uuid4()), 
+            request_id=str(uuid.uuid4()),
             instance_names=[instance_name]
         )
-        
-        # Get instance details
-        instance = w.database.get_database_instance(name=instance_name)
-        
+        self._credential = cred.token
+        self._credential_time = datetime.now()
+
+    def _get_credential(self) -> Tuple[str, str]:
+        """
+        Return (host, password) for a new connection.
+
+        The cached credential is reused until the 59-minute cutoff; the
+        background refresher normally renews it well before then.
+        """
+        if self._credential is None or self._is_connection_expired(self._credential_time):
+            with self._credential_lock:
+                if self._credential is None or self._is_connection_expired(self._credential_time):
+                    self._refresh_credential()
+        return self._host, self._credential
+
+    def _invalidate_credential(self) -> None:
+        """Forget the cached credential and host so the next connect resolves them again."""
+        with self._credential_lock:
+            self._credential = None
+            self._credential_time = None
+            self._host = None
+
+    def _create_connection(self) -> psycopg2.extensions.connection:
+        """Create a new connection to Lakebase using the cached credential."""
+        host, password = self._get_credential()
+        db_name = os.getenv("LAKEBASE_DB_NAME")
+
         # Create connection
-        conn = psycopg2.connect(
-            host=instance.read_write_dns,
-            dbname=db_name,
-            user=self._db_user,
-            password=cred.token,
-            sslmode="require",
-        )
-        
+        try:
+            conn = psycopg2.connect(
+                host=host,
+                dbname=db_name,
+                user=self._db_user,
+                password=password,
+                sslmode="require",
+            )
+        except psycopg2.OperationalError:
+            # Rejected credential or moved instance: resolve both again next time
+            self._invalidate_credential()
+            raise
+
         return conn
-    
-    def _is_connection_expired(self) -> bool:
-        """Check if the connection is older than 59 minutes."""
-        if self._connection_time is None:
+
+    def _ensure_refresher(self) -> None:
+        """Start the background credential refresher once."""
+        if self._refresher is not None:
+            return
+        with self._credential_lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(
+                    target=self._refresh_loop,
+                    name="lakebase-credential-refresher",
+                    daemon=True
+                )
+                self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        """Renew the credential and replace aging idle connections ahead of expiry."""
+        while True:
+            time.sleep(60)
+            try:
+                credential_time = self._credential_time
+                if credential_time is None or datetime.now() - credential_time > self._credential_refresh_after:
+                    with self._credential_lock:
+                        self._refresh_credential()
+                self._recycle_aging_connections()
+            except Exception as e:
+                logger.warning(f"Lakebase background refresh failed: {e}")
+
+    def _recycle_aging_connections(self) -> None:
+        """Replace idle connections older than the recycle age with fresh ones."""
+        with self._cond:
+            now = datetime.now()
+            aging = [entry for entry in self._idle if now - entry[1] > self._recycle_after]
+            if not aging:
+                return
+            self._idle = [entry for entry in self._idle if now - entry[1] <= self._recycle_after]
+
+        for conn, _, _ in aging:
+            self._close_quietly(conn)
+            try:
+                new_conn = self._create_connection()
+            except Exception as e:
+                logger.warning(f"Could not replace aging Lakebase connection: {e}")
+                with self._cond:
+                    self._size -= 1
+                    self._discarded += 1
+                    self._cond.notify()
+                continue
+            with self._cond:
+                self._created += 1
+                self._discarded += 1
+                self._idle.append((new_conn, datetime.now(), time.monotonic()))
+                self._cond.notify()
+
+    def _is_connection_expired(self, created_at: Optional[datetime]) -> bool:
+        """Check if a connection is older than 59 minutes."""
+        if created_at is None:
+            return True
+
+        elapsed = datetime.now() - created_at
+        return elapsed > self._max_connection_age
+
+    def _is_healthy(self, conn: psycopg2.extensions.connection, created_at: datetime, returned_at: float) -> bool:
+        """
+        Check a connection before handing it out.
+
+        Expired or closed connections are rejected outright. Connections that
+        have been idle longer than the ping interval get a round-trip check.
+        """
+        if conn.closed or self._is_connection_expired(created_at):
+            return False
+
+        if time.monotonic() - returned_at < self._ping_after:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            conn.rollback()
             return True
-        
-        elapsed = datetime.now() - self._connection_time
-        return elapsed > timedelta(minutes=59)
-    
-    def _ensure_connection(self) -> None:
-        """Ensure a valid connection exists, creating or refreshing as needed."""
-        if self._connection is None or self._is_connection_expired():
-            # Close old connection if it exists
-            if self._connection is not None:
+        except Exception:
+            return False
+
+    def _close_quietly(self, conn: psycopg2.extensions.connection) -> None:
+        # Prepared statements die with the session
+        self._prepared.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _warm_up(self) -> None:
+        """Open connections up to the configured minimum size."""
+        with self._cond:
+            if self._warmed_up:
+                return
+            self._warmed_up = True
+            missing = max(0, min(self._min_size, self._max_size) - self._size)
+            self._size += missing
+
+        for _ in range(missing):
+            try:
+                conn = self._create_connection()
+            except Exception as e:
+                logger.warning(f"Could not open Lakebase connection during warm-up: {e}")
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                continue
+            with self._cond:
+                self._created += 1
+                self._idle.append((conn, datetime.now(), time.monotonic()))
+                self._cond.notify()
+
+    def warm_up(self) -> None:
+        """
+        Open the minimum pool size and start the background refresher.
+
+        Called at application startup so the first request doesn't pay for
+        credential generation or connection setup.
+        """
+        self._warm_up()
+        self._ensure_refresher()
+
+    def _acquire(self) -> Tuple[psycopg2.extensions.connection, datetime]:
+        """Borrow a healthy connection, creating one if the pool has room."""
+        if not self._warmed_up:
+            self._warm_up()
+            self._ensure_refresher()
+
+        start = time.monotonic()
+        deadline = start + self._checkout_timeout
+
+        while True:
+            candidate = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        candidate = self._idle.pop()
+                        break
+                    if self._size < self._max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise LakebasePoolTimeout(
+                            f"No Lakebase connection available after {self._checkout_timeout}s "
+                            f"(max_size={self._max_size})"
+                        )
+                    self._cond.wait(remaining)
+
+            if candidate is None:
+                try:
+                    conn = self._create_connection()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                created_at = datetime.now()
+                with self._cond:
+                    self._created += 1
+                break
+
+            conn, created_at, returned_at = candidate
+            if self._is_healthy(conn, created_at, returned_at):
+                break
+
+            # Unhealthy or expired: drop it and try again
+            self._close_quietly(conn)
+            with self._cond:
+                self._size -= 1
+                self._discarded += 1
+                self._cond.notify()
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._in_use += 1
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        return conn, created_at
+
+    def _release(self, conn: psycopg2.extensions.connection, created_at: datetime) -> None:
+        """Return a connection to the pool, or close it if it is no longer usable."""
+        reusable = not conn.closed and not self._is_connection_expired(created_at)
+
+        if reusable and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except Exception:
+                reusable = False
+
+        if not reusable:
+            self._close_quietly(conn)
+
+        with self._cond:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append((conn, created_at, time.monotonic()))
+            else:
+                self._size -= 1
+                self._discarded += 1
+            self._cond.notify()
+
+    @contextmanager
+    def _connection(self) -> Iterator[psycopg2.extensions.connection]:
+        """
+        Borrow a pooled connection for the duration of the block.
+
+        If the block raises, the transaction is rolled back explicitly so the
+        connection never returns to the pool in an aborted state.
+        """
+        conn, created_at = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
                 try:
-                    self._connection.close()
+                    conn.rollback()
                 except Exception:
                     pass
-            
-            # Create new connection
-            self._connection = self._create_connection()
-            self._connection_time = datetime.now()
-    
-    def query(self, sql: str) -> List[Tuple[Any, ...]]:
+            raise
+        finally:
+            self._release(conn, created_at)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Return a snapshot of pool metrics.
+
+        Returns:
+            Dictionary with pool size, idle/in-use counts, checkout count and
+            wait time statistics (seconds)
+        """
+        with self._cond:
+            return {
+                "min_size": self._min_size,
+                "max_size": self._max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "checkouts": self._checkouts,
+                "created": self._created,
+                "discarded": self._discarded,
+                "total_wait_seconds": round(self._total_wait, 6),
+                "avg_wait_seconds": round(self._total_wait / self._checkouts, 6) if self._checkouts else 0.0,
+                "max_wait_seconds": round(self._max_wait, 6),
+                "coalesced_queries": self._coalesced,
+                "statements_prepared": self._prepares,
+                "prepared_executions": self._prepared_executions,
+            }
+
+    def query(self, sql: str, params: Optional[Sequence[Any]] = None) -> List[Tuple[Any, ...]]:
         """
         Execute a SQL query and return the results.
-        
+
+        SELECTs run in a READ ONLY transaction that is rolled back afterwards;
+        anything else is committed. On error the transaction is rolled back
+        before the connection goes back to the pool.
+
         Args:
             sql: SQL query string to execute
-            
+            params: Values bound to %s placeholders in sql, if any
+
+        Returns:
+            List of tuples representing the query results
+
+        Raises:
+            Exception: If the query fails
+        """
+        read_only = self._is_read_only(sql)
+        with self._connection() as conn:
+            conn.readonly = read_only
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+            if read_only:
+                conn.rollback()
+            else:
+                conn.commit()
+            return rows
+
+    def execute_autocommit(self, sql: str) -> None:
+        """
+        Execute a statement outside a transaction block.
+
+        For maintenance statements that Postgres refuses to run inside a
+        transaction, such as CREATE INDEX CONCURRENTLY.
+
+        Args:
+            sql: SQL statement to execute
+
+        Raises:
+            Exception: If the statement fails
+        """
+        with self._connection() as conn:
+            conn.readonly = False
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql)
+            finally:
+                conn.autocommit = False
+
+    def copy_in(self, setup_sql: str, copy_sql: str, data: IO[str], sql: str) -> List[Tuple[Any, ...]]:
+        """
+        Bulk-load rows with COPY and run one statement over them, in one transaction.
+
+        setup_sql runs first (typically CREATE TEMP TABLE ... ON COMMIT DROP for
+        a staging table), then copy_sql (a COPY ... FROM STDIN) streams data into
+        it, then sql runs and its rows are returned. Everything is committed
+        together, or rolled back together on error.
+
+        Args:
+            setup_sql: Statement(s) preparing the COPY target
+            copy_sql: COPY ... FROM STDIN statement
+            data: File-like object with the COPY input
+            sql: Statement to run after the load, e.g. a set-based upsert
+
+        Returns:
+            List of tuples returned by sql
+
+        Raises:
+            Exception: If any step fails
+        """
+        with self._connection() as conn:
+            conn.readonly = False
+            with conn.cursor() as cursor:
+                cursor.execute(setup_sql)
+                cursor.copy_expert(copy_sql, data)
+                cursor.execute(sql)
+                rows = cursor.fetchall()
+            conn.commit()
+            return rows
+
+    def query_prepared(self, name: str, sql: str, params: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        """
+        Execute a named prepared statement with bound parameters and return the results.
+
+        The statement is PREPAREd the first time it runs on a pooled
+        connection and only EXECUTEd afterwards, so its parse and plan work is
+        reused. Transactions are handled as in query().
+
+        Args:
+            name: Statement name, unique per query shape (a SQL identifier)
+            sql: Statement text with psycopg2 %s placeholders
+            params: Values bound to the placeholders, in order
+
         Returns:
             List of tuples representing the query results
-            
+
         Raises:
             Exception: If the query fails
         """
-        # Ensure we have a valid connection
-        self._ensure_connection()
-        
-        # Execute query
-        with self._connection.cursor() as cursor:
-            cursor.execute(sql)
-            rows = cursor.fetchall()
-            self._connection.commit()
+        read_only = self._is_read_only(sql)
+        with self._connection() as conn:
+            conn.readonly = read_only
+            with conn.cursor() as cursor:
+                prepared = self._prepared.setdefault(id(conn), set())
+                if name not in prepared:
+                    cursor.execute(f"PREPARE {name} AS {_positional_placeholders(sql)}")
+                    # PREPARE is not transactional: the statement outlives a rollback
+                    prepared.add(name)
+                    self._prepares += 1
+                if params:
+                    cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+                else:
+                    cursor.execute(f"EXECUTE {name}")
+                rows = cursor.fetchall()
+                self._prepared_executions += 1
+            if read_only:
+                conn.rollback()
+            else:
+                conn.commit()
             return rows
+
+    def stream(
+        self,
+        sql: str,
+        itersize: Optional[int] = None,
+        params: Optional[Sequence[Any]] = None
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        """
+        Execute a SELECT through a server-side named cursor and yield its rows in batches.
+
+        Only one batch is held in memory at a time, whatever the size of the
+        result; the whole result is never buffered client-side. The query runs
+        in a READ ONLY transaction and the pooled connection stays checked out
+        until the generator is exhausted or closed; closing it early (or an
+        error) rolls the transaction back and discards the cursor on the server.
+
+        Args:
+            sql: SELECT statement to execute
+            itersize: Rows per round trip (LAKEBASE_STREAM_FETCH_SIZE if None)
+            params: Values bound to %s placeholders in sql, if any
+
+        Yields:
+            Lists of up to itersize row tuples
+
+        Raises:
+            Exception: If the query fails
+        """
+        itersize = itersize or self._stream_fetch_size
+        with self._connection() as conn:
+            conn.readonly = True
+            with conn.cursor(name=f"lakebase_stream_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = itersize
+                cursor.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany(itersize)
+                    if not rows:
+                        break
+                    yield rows
+            # Read-only: nothing to commit, end the transaction that held the cursor
+            conn.rollback()
+
+    def query_batched(self, sql: str, params: Optional[Sequence[Any]] = None) -> List[Tuple[Any, ...]]:
+        """
+        Execute a SELECT through stream() and return all its rows.
+
+        The rows are fetched in batches from a server-side cursor, so the
+        driver never buffers the whole result next to the returned list.
+
+        Args:
+            sql: SELECT statement to execute
+            params: Values bound to %s placeholders in sql, if any
+
+        Returns:
+            List of tuples representing the query results
+        """
+        rows: List[Tuple[Any, ...]] = []
+        for batch in self.stream(sql, params=params):
+            rows.extend(batch)
+        return rows
+
+    async def astream(
+        self,
+        sql: str,
+        itersize: Optional[int] = None,
+        params: Optional[Sequence[Any]] = None
+    ) -> AsyncIterator[List[Tuple[Any, ...]]]:
+        """
+        Async version of stream(): each batch is fetched on the stream executor.
+
+        The stream holds one of LAKEBASE_MAX_STREAMS slots from before it
+        borrows its connection until it gives it back. With one stream thread
+        per slot, an open stream can always fetch its next batch, and with
+        fewer slots than pooled connections, queries always have a connection
+        to run on.
+
+        Args:
+            sql: SELECT statement to execute
+            itersize: Rows per round trip (LAKEBASE_STREAM_FETCH_SIZE if None)
+            params: Values bound to %s placeholders in sql, if any
+
+        Yields:
+            Lists of up to itersize row tuples
+        """
+        if self._stream_slots is None:
+            self._stream_slots = asyncio.Semaphore(self._max_streams)
+
+        async with self._stream_slots:
+            batches = self.stream(sql, itersize, params)
+            loop = asyncio.get_running_loop()
+            try:
+                while True:
+                    batch = await loop.run_in_executor(self._stream_executor, next, batches, None)
+                    if batch is None:
+                        break
+                    yield batch
+            finally:
+                # Releases the connection if the consumer stopped early (e.g. client disconnect)
+                await loop.run_in_executor(self._stream_executor, batches.close)
+
+    async def _aexecute(self, func: Callable[..., List[Tuple[Any, ...]]], *args: Any) -> List[Tuple[Any, ...]]:
+        """Run a blocking query method on the executor, waiting for a back-pressure slot first."""
+        if self._pending is None:
+            self._pending = asyncio.Semaphore(self._max_pending)
+
+        async with self._pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    @staticmethod
+    def _is_read_only(sql: str) -> bool:
+        """Only plain SELECTs are safe to share between callers."""
+        return sql.lstrip().upper().startswith("SELECT")
+
+    async def _acoalesced(
+        self,
+        key: Hashable,
+        func: Callable[..., List[Tuple[Any, ...]]],
+        *args: Any
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Run a read on the executor, sharing one in-flight run between callers
+        with the same key.
+
+        Only reads started at the current result cache generation are shared:
+        after an invalidation (which follows every write), a caller never joins
+        a read that may have started before the write and caches its rows as
+        current.
+        """
+        key = (ResultCache().generation, key)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._aexecute(func, *args))
+            self._inflight[key] = task
+
+            def _forget(done: asyncio.Future, key: Hashable = key) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+                # Mark the exception retrieved even if every caller was cancelled
+                if not done.cancelled():
+                    done.exception()
+
+            task.add_done_callback(_forget)
+        else:
+            self._coalesced += 1
+
+        return await asyncio.shield(task)
+
+    async def aquery(self, sql: str) -> List[Tuple[Any, ...]]:
+        """
+        Execute a SQL query without blocking the event loop.
+
+        The query runs on the Lakebase executor. At most LAKEBASE_MAX_PENDING
+        queries may be in flight or queued; further callers wait here, which
+        applies back-pressure instead of growing an unbounded backlog.
+
+        Identical SELECTs issued while one is already in flight are coalesced:
+        every caller awaits the same database round trip and shares its rows.
+        A read that started before the latest result cache invalidation is
+        not shared with later callers.
+        The shared query runs as its own task, so a cancelled caller does not
+        cancel it for the others. Callers must not mutate the returned rows.
+
+        Args:
+            sql: SQL query string to execute
+
+        Returns:
+            List of tuples representing the query results
+
+        Raises:
+            Exception: If the query fails
+        """
+        if not self._is_read_only(sql):
+            return await self._aexecute(self.query, sql)
+
+        return await self._acoalesced(sql, self.query, sql)
+
+    async def acopy_in(self, setup_sql: str, copy_sql: str, data: IO[str], sql: str) -> List[Tuple[Any, ...]]:
+        """
+        Async version of copy_in(), run on the Lakebase executor with the same
+        back-pressure as aquery().
+
+        Args:
+            setup_sql: Statement(s) preparing the COPY target
+            copy_sql: COPY ... FROM STDIN statement
+            data: File-like object with the COPY input
+            sql: Statement to run after the load
+
+        Returns:
+            List of tuples returned by sql
+        """
+        return await self._aexecute(self.copy_in, setup_sql, copy_sql, data, sql)
+
+    async def aquery_batched(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        """
+        Async version of query_batched(), with the same back-pressure and
+        SELECT coalescing as aquery(). Calls with the same statement and
+        (hashable) parameters share one in-flight read.
+
+        Args:
+            sql: SELECT statement to execute
+            params: Values bound to %s placeholders in sql, in order
+
+        Returns:
+            List of tuples representing the query results
+        """
+        params = tuple(params)
+        key = ("batched", sql, params)
+        try:
+            hash(key)
+        except TypeError:
+            return await self._aexecute(self.query_batched, sql, params)
+
+        return await self._acoalesced(key, self.query_batched, sql, params)
+
+    async def aquery_prepared(self, name: str, sql: str, params: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        """
+        Async version of query_prepared(), with the same back-pressure and
+        SELECT coalescing as aquery(). Calls with the same statement and
+        (hashable) parameters share one in-flight round trip.
+
+        Args:
+            name: Statement name, unique per query shape (a SQL identifier)
+            sql: Statement text with psycopg2 %s placeholders
+            params: Values bound to the placeholders, in order
+
+        Returns:
+            List of tuples representing the query results
+
+        Raises:
+            Exception: If the query fails
+        """
+        params = tuple(params)
+        if self._is_read_only(sql):
+            key = ("prepared", name, params)
+            try:
+                hash(key)
+            except TypeError:
+                pass  # e.g. list parameters bound to ANY(%s): run without coalescing
+            else:
+                return await self._acoalesced(key, self.query_prepared, name, sql, params)
+
+        return await self._aexecute(self.query_prepared, name, sql, params)
@@ -0,0 +1,111 @@
+"""
+Registry of named, parameterized query shapes.
+
+Each service declares its queries once at import time as PreparedStatement
+objects with psycopg2 %s placeholders. Lakebase PREPAREs a statement the first
+time it runs on a pooled connection and afterwards only EXECUTEs it with bound
+parameters, so Postgres parses and plans each shape once per connection and
+literal values never become part of the SQL text.
+"""
+import re
+from typing import List, Tuple, Any, Optional, Dict, AsyncIterator
+from services.lakebase import Lakebase
+
+_STATEMENT_NAME = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+# name -> statement text, for every shape declared in this process
+_registry: Dict[str, str] = {}
+
+
+class PreparedStatement:
+    """A named query shape executed with bound parameters."""
+
+    __slots__ = ("name", "sql")
+
+    def __init__(self, name: str, sql: str):
+        """
+        Register a query shape.
+
+        Args:
+            name: Unique statement name (lowercase SQL identifier)
+            sql: Statement text with psycopg2 %s placeholders
+
+        Raises:
+            ValueError: If the name is invalid or already registered with different SQL
+        """
+        if not _STATEMENT_NAME.match(name):
+            raise ValueError(f"Invalid prepared statement name: {name}")
+        if _registry.get(name, sql) != sql:
+            raise ValueError(f"Prepared statement {name} is already registered with different SQL")
+
+        _registry[name] = sql
+        self.name = name
+        self.sql = sql
+
+    async def fetch(self, *params: Any) -> List[Tuple[Any, ...]]:
+        """
+        Execute the statement and return all rows.
+
+        Args:
+            *params: Values bound to the placeholders, in order
+
+        Returns:
+            List of tuples representing the query results
+        """
+        return await Lakebase().aquery_prepared(self.name, self.sql, params)
+
+    async def fetch_one(self, *params: Any) -> Optional[Tuple[Any, ...]]:
+        """
+        Execute the statement and return the first row.
+
+        Args:
+            *params: Values bound to the placeholders, in order
+
+        Returns:
+            The first row, or None if there are no rows
+        """
+        rows = await self.fetch(*params)
+        if rows and len(rows) > 0:
+            return rows[0]
+        return None
+
+    async def fetch_batched(self, *params: Any) -> List[Tuple[Any, ...]]:
+        """
+        Execute the statement through a server-side cursor and return all rows.
+
+        For results that can be large: rows are fetched in batches, and
+        identical concurrent calls share one read. Like stream(), the
+        statement text is sent with bound parameters.
+
+        Args:
+            *params: Values bound to the placeholders, in order
+
+        Returns:
+            List of tuples representing the query results
+        """
+        return await Lakebase().aquery_batched(self.sql, params)
+
+    def stream(self, *params: Any) -> AsyncIterator[List[Tuple[Any, ...]]]:
+        """
+        Stream the statement's rows in batches through a server-side cursor.
+
+        Postgres cannot declare a cursor over EXECUTE, so the statement text
+        is sent with bound parameters instead of the prepared name.
+
+        Args:
+            *params: Values bound to the placeholders, in order
+
+        Returns:
+            Async iterator over lists of row tuples
+        """
+        return Lakebase().astream(self.sql, params=params)
+
+
+def registered_statements() -> Dict[str, str]:
+    """
+    Get every registered query shape.
+
+    Returns:
+        Dictionary mapping statement name to statement text
+    """
+    return dict(_registry)
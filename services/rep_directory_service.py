@@ -0,0 +1,175 @@
+"""
+Service for the materialized call center rep directory.
+
+One row per rep with the rep's display name, call count and most recent call
+date, so listing reps is a read of a small table instead of a DISTINCT over
+every call. The directory is refreshed after each sync; a refresh rewrites
+only the rows whose values changed and removes reps that no longer have
+calls. The full directory is held in the result cache, so type-ahead search
+over thousands of reps is an in-memory prefix match.
+
+Database Schema:
+----------------
+CREATE TABLE IF NOT EXISTS public.telco_call_center_analytics.rep_directory (
+    rep_id TEXT PRIMARY KEY,
+    rep_name TEXT,
+    call_count INTEGER NOT NULL,
+    last_call_date TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+from typing import List, Tuple, Any, Optional
+from psycopg2.errors import UndefinedTable
+from services.lakebase import Lakebase
+from services.prepared_statements import PreparedStatement
+from services.result_cache import ResultCache, cached
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Held while a request builds the missing directory, so concurrent requests wait for one build
+_build_lock = asyncio.Lock()
+
+_LIST_REP_DIRECTORY = PreparedStatement("list_rep_directory", """
+        SELECT rep_id, rep_name, call_count, last_call_date
+        FROM public.telco_call_center_analytics.rep_directory
+        ORDER BY rep_id
+""")
+
+
+async def ensure_rep_directory_table() -> List[Tuple[Any, ...]]:
+    """
+    Ensure the rep_directory table exists.
+    """
+    sql = """
+        CREATE TABLE IF NOT EXISTS public.telco_call_center_analytics.rep_directory (
+            rep_id TEXT PRIMARY KEY,
+            rep_name TEXT,
+            call_count INTEGER NOT NULL,
+            last_call_date TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        SELECT to_regclass('public.telco_call_center_analytics.rep_directory')::text
+    """
+    
+    lakebase = Lakebase()
+    return await lakebase.aquery(sql)
+
+
+async def refresh_rep_directory() -> Tuple[int, int]:
+    """
+    Bring the rep directory up to date with call_center_scores_sync.
+    Run after each sync.
+    
+    Reps whose name, call count and last call date are unchanged are not
+    rewritten, so a refresh after a small sync touches only a few rows.
+    
+    Returns:
+        Tuple of (reps added or updated, reps removed)
+    """
+    sql = """
+        WITH reps AS (
+            SELECT
+                rep_id,
+                (ARRAY_AGG(rep_name ORDER BY COALESCE(call_date, '') DESC, COALESCE(call_time, '') DESC)
+                    FILTER (WHERE rep_name IS NOT NULL))[1] AS rep_name,
+                COUNT(*) AS call_count,
+                MAX(call_date) AS last_call_date
+            FROM public.telco_call_center_analytics.call_center_scores_sync
+            WHERE rep_id IS NOT NULL
+            GROUP BY rep_id
+        ),
+        upserted AS (
+            INSERT INTO public.telco_call_center_analytics.rep_directory AS d
+                (rep_id, rep_name, call_count, last_call_date, updated_at)
+            SELECT rep_id, rep_name, call_count, last_call_date, CURRENT_TIMESTAMP
+            FROM reps
+            ON CONFLICT (rep_id)
+            DO UPDATE SET
+                rep_name = EXCLUDED.rep_name,
+                call_count = EXCLUDED.call_count,
+                last_call_date = EXCLUDED.last_call_date,
+                updated_at = EXCLUDED.updated_at
+            WHERE (d.rep_name, d.call_count, d.last_call_date)
+                IS DISTINCT FROM (EXCLUDED.rep_name, EXCLUDED.call_count, EXCLUDED.last_call_date)
+            RETURNING rep_id
+        ),
+        removed AS (
+            DELETE FROM public.telco_call_center_analytics.rep_directory d
+            WHERE NOT EXISTS (SELECT 1 FROM reps r WHERE r.rep_id = d.rep_id)
+            RETURNING rep_id
+        )
+        SELECT (SELECT COUNT(*) FROM upserted), (SELECT COUNT(*) FROM removed)
+    """
+    
+    lakebase = Lakebase()
+    await ensure_rep_directory_table()
+    rows = await lakebase.aquery(sql)
+    
+    changed, removed = rows[0] if rows else (0, 0)
+    if changed or removed:
+        ResultCache().invalidate_namespaces("ccrs")
+    
+    return changed, removed
+
+
+@cached("ccrs")
+async def get_rep_directory() -> List[Tuple[Any, ...]]:
+    """
+    Get every rep in the directory.
+    
+    The directory is built on first use if the table does not exist yet;
+    concurrent requests share that one build. Any other error is raised.
+    
+    Returns:
+        List of tuples containing (rep_id, rep_name, call_count, last_call_date),
+        ordered by rep_id
+    """
+    try:
+        return await _LIST_REP_DIRECTORY.fetch()
+    except UndefinedTable:
+        pass
+    
+    async with _build_lock:
+        # Another request may have built the directory while this one waited
+        try:
+            return await _LIST_REP_DIRECTORY.fetch()
+        except UndefinedTable:
+            logger.warning("Rep directory table missing, building it")
+        await refresh_rep_directory()
+    
+    return await _LIST_REP_DIRECTORY.fetch()
+
+
+def _matches(rep: Tuple[Any, ...], prefix: str) -> bool:
+    """Check a directory row against a lowercase prefix: rep ID, full name, or any word of the name."""
+    if rep[0].lower().startswith(prefix):
+        return True
+    name = (rep[1] or "").lower()
+    return name.startswith(prefix) or any(word.startswith(prefix) for word in name.split())
+
+
+async def search_reps(query: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[Any, ...]]:
+    """
+    Find reps whose ID, name, or any word of the name starts with the query
+    (case-insensitive).
+    
+    Args:
+        query: Type-ahead prefix; all reps match when empty
+        limit: Maximum number of reps to return (all if None)
+    
+    Returns:
+        List of tuples containing (rep_id, rep_name, call_count, last_call_date),
+        ordered by rep_id
+    """
+    reps = await get_rep_directory()
+    
+    prefix = (query or "").strip().lower()
+    if prefix:
+        reps = [rep for rep in reps if _matches(rep, prefix)]
+    
+    if limit is not None:
+        reps = reps[:limit]
+    
+    return reps
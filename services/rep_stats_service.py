@@ -0,0 +1,282 @@
+"""
+Service for maintaining precomputed per-rep score statistics.
+
+Statistics are computed from effective scores: the human override when one
+exists in human_evaluations, otherwise the AI score from call_center_scores_sync.
+They are stored one row per rep, so the CCR dashboard reads them with a single
+key lookup. A rep's row is recomputed whenever one of their calls gets a human
+evaluation saved or deleted, and all rows are refreshed after each sync.
+
+Rep and call IDs are bound as parameters of prepared statements; only fixed
+SQL is built as text.
+
+Database Schema:
+----------------
+CREATE TABLE IF NOT EXISTS public.telco_call_center_analytics.rep_score_stats (
+    rep_id TEXT PRIMARY KEY,
+    total_calls INTEGER NOT NULL,
+    avg_score NUMERIC(6, 2),
+    min_score INTEGER,
+    max_score INTEGER,
+    score_histogram JSONB,
+    criteria_averages JSONB,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+score_histogram buckets effective total scores by tens ("0-9" ... "50-60").
+criteria_averages holds the average effective score per scorecard criterion.
+"""
+from typing import List, Tuple, Any, Optional
+from services.lakebase import Lakebase
+from services.prepared_statements import PreparedStatement
+from services.result_cache import ResultCache
+
+# Scorecard criteria and their JSON paths inside scorecard_json / scorecard_overrides
+SCORECARD_CRITERIA = {
+    "recording_disclosure": "criteria_1,technical_aspects,recording_disclosure,score",
+    "member_authentication": "criteria_1,technical_aspects,member_authentication,score",
+    "call_closing": "criteria_1,technical_aspects,call_closing,score",
+    "professionalism": "criteria_2,quality_of_service,professionalism,score",
+    "program_information": "criteria_2,quality_of_service,program_information,score",
+    "demeanor": "criteria_2,quality_of_service,demeanor,score",
+}
+
+HISTOGRAM_BUCKETS = ["0-9", "10-19", "20-29", "30-39", "40-49", "50-60"]
+
+
+def _effective_criterion_sql(criterion: str) -> str:
+    """SQL expression for a criterion's effective score (override, else AI)."""
+    path = SCORECARD_CRITERIA[criterion]
+    return f"COALESCE(e.overrides #>> '{{{path}}}', e.scorecard #>> '{{{path}}}')::numeric"
+
+
+def _rep_stats_sql(where_clause: str, store: bool = True) -> str:
+    """
+    Build the statement that recomputes stats for the reps matching where_clause.
+    With store the rows are upserted into rep_score_stats and returned;
+    otherwise it is a plain SELECT of the same columns that writes nothing.
+    """
+    criteria_columns = "".join(
+        f",\n                AVG({_effective_criterion_sql(name)}) AS {name}" for name in SCORECARD_CRITERIA
+    )
+    criteria_object = ", ".join(
+        f"'{name}', ROUND(t.{name}, 2)" for name in SCORECARD_CRITERIA
+    )
+    bucket_labels = ", ".join(f"'{label}'" for label in HISTOGRAM_BUCKETS)
+    
+    ctes = f"""
+        WITH effective AS (
+            SELECT
+                s.rep_id,
+                s.scorecard_json::jsonb AS scorecard,
+                h.scorecard_overrides AS overrides,
+                COALESCE(h.total_score_override, s.total_score) AS total_score
+            FROM public.telco_call_center_analytics.call_center_scores_sync s
+            LEFT JOIN public.telco_call_center_analytics.human_evaluations h
+                ON h.call_id = s.call_id
+            WHERE s.rep_id IS NOT NULL AND {where_clause}
+        ),
+        totals AS (
+            SELECT
+                e.rep_id,
+                COUNT(*) AS total_calls,
+                ROUND(AVG(e.total_score)::numeric, 2) AS avg_score,
+                MIN(e.total_score) AS min_score,
+                MAX(e.total_score) AS max_score{criteria_columns}
+            FROM effective e
+            GROUP BY e.rep_id
+        ),
+        histogram AS (
+            SELECT rep_id, jsonb_object_agg(bucket, calls) AS score_histogram
+            FROM (
+                SELECT
+                    rep_id,
+                    (ARRAY[{bucket_labels}])[LEAST(GREATEST(total_score, 0) / 10, 5) + 1] AS bucket,
+                    COUNT(*) AS calls
+                FROM effective
+                WHERE total_score IS NOT NULL
+                GROUP BY 1, 2
+            ) buckets
+            GROUP BY rep_id
+        )"""
+    columns = f"""
+            t.rep_id,
+            t.total_calls,
+            t.avg_score,
+            t.min_score,
+            t.max_score,
+            COALESCE(hg.score_histogram, '{{}}'::jsonb) AS score_histogram,
+            jsonb_build_object({criteria_object}) AS criteria_averages"""
+    
+    if not store:
+        # Wrapped in a SELECT so it runs as a read-only query
+        return f"""
+        SELECT * FROM ({ctes}
+        SELECT{columns}
+        FROM totals t
+        LEFT JOIN histogram hg ON hg.rep_id = t.rep_id
+        ) stats
+    """
+    
+    return f"""{ctes}
+        INSERT INTO public.telco_call_center_analytics.rep_score_stats
+            (rep_id, total_calls, avg_score, min_score, max_score, score_histogram, criteria_averages, updated_at)
+        SELECT{columns},
+            CURRENT_TIMESTAMP
+        FROM totals t
+        LEFT JOIN histogram hg ON hg.rep_id = t.rep_id
+        ON CONFLICT (rep_id)
+        DO UPDATE SET
+            total_calls = EXCLUDED.total_calls,
+            avg_score = EXCLUDED.avg_score,
+            min_score = EXCLUDED.min_score,
+            max_score = EXCLUDED.max_score,
+            score_histogram = EXCLUDED.score_histogram,
+            criteria_averages = EXCLUDED.criteria_averages,
+            updated_at = EXCLUDED.updated_at
+        RETURNING rep_id, total_calls, avg_score, min_score, max_score, score_histogram, criteria_averages
+    """
+
+
+_GET_REP_STATS = PreparedStatement("get_rep_stats", """
+        SELECT rep_id, total_calls, avg_score, min_score, max_score, score_histogram, criteria_averages
+        FROM public.telco_call_center_analytics.rep_score_stats
+        WHERE rep_id = %s
+""")
+
+_COMPUTE_REP_STATS = PreparedStatement("compute_rep_stats", _rep_stats_sql("s.rep_id = %s", store=False))
+
+_REFRESH_REP_STATS = PreparedStatement("refresh_rep_stats", _rep_stats_sql("s.rep_id = %s"))
+
+_REFRESH_REP_STATS_FOR_CALL = PreparedStatement("refresh_rep_stats_for_call", _rep_stats_sql(
+    "s.rep_id = (SELECT c.rep_id FROM public.telco_call_center_analytics.call_center_scores_sync c "
+    "WHERE c.call_id = %s)"
+))
+
+_REFRESH_REP_STATS_FOR_CALLS = PreparedStatement("refresh_rep_stats_for_calls", _rep_stats_sql(
+    "s.rep_id IN (SELECT c.rep_id FROM public.telco_call_center_analytics.call_center_scores_sync c "
+    "WHERE c.call_id = ANY(%s::text[]))"
+))
+
+
+async def ensure_rep_stats_table() -> List[Tuple[Any, ...]]:
+    """
+    Ensure the rep_score_stats table exists.
+    """
+    sql = """
+        CREATE TABLE IF NOT EXISTS public.telco_call_center_analytics.rep_score_stats (
+            rep_id TEXT PRIMARY KEY,
+            total_calls INTEGER NOT NULL,
+            avg_score NUMERIC(6, 2),
+            min_score INTEGER,
+            max_score INTEGER,
+            score_histogram JSONB,
+            criteria_averages JSONB,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        SELECT to_regclass('public.telco_call_center_analytics.rep_score_stats')::text
+    """
+    
+    lakebase = Lakebase()
+    return await lakebase.aquery(sql)
+
+
+async def get_rep_stats(call_center_rep_id: str) -> Optional[Tuple[Any, ...]]:
+    """
+    Get precomputed statistics for a rep with a single key lookup.
+    
+    Args:
+        call_center_rep_id: The call center rep ID to get stats for
+    
+    Returns:
+        Tuple containing (rep_id, total_calls, avg_score, min_score, max_score,
+                         score_histogram, criteria_averages)
+        or None if the rep has no stored stats
+    """
+    return await _GET_REP_STATS.fetch_one(call_center_rep_id)
+
+
+async def compute_rep_stats(call_center_rep_id: str) -> Optional[Tuple[Any, ...]]:
+    """
+    Compute statistics for one rep from the calls, without storing them.
+    For reads of reps that have no stored row yet.
+    
+    Args:
+        call_center_rep_id: The call center rep ID to compute stats for
+    
+    Returns:
+        Tuple with the same columns as get_rep_stats, or None if the rep has no calls
+    """
+    return await _COMPUTE_REP_STATS.fetch_one(call_center_rep_id)
+
+
+async def refresh_rep_stats(call_center_rep_id: str) -> Optional[Tuple[Any, ...]]:
+    """
+    Recompute and store statistics for one rep.
+    
+    Args:
+        call_center_rep_id: The call center rep ID to refresh
+    
+    Returns:
+        The stored stats row, or None if the rep has no calls
+    """
+    return await _REFRESH_REP_STATS.fetch_one(call_center_rep_id)
+
+
+async def refresh_rep_stats_for_call(call_id: str) -> Optional[Tuple[Any, ...]]:
+    """
+    Recompute statistics for the rep who handled a call.
+    Called after a human evaluation for the call is saved or deleted.
+    
+    Args:
+        call_id: The call whose rep's stats should be refreshed
+    
+    Returns:
+        The stored stats row, or None if the call has no rep
+    """
+    return await _REFRESH_REP_STATS_FOR_CALL.fetch_one(call_id)
+
+
+async def refresh_rep_stats_for_calls(call_ids: List[str]) -> List[Tuple[Any, ...]]:
+    """
+    Recompute statistics for every rep who handled one of the calls, in one statement.
+    Called once per bulk evaluation import.
+    
+    Args:
+        call_ids: The calls whose reps' stats should be refreshed
+    
+    Returns:
+        The stored stats rows, one per affected rep
+    """
+    if not call_ids:
+        return []
+    
+    return await _REFRESH_REP_STATS_FOR_CALLS.fetch(list(call_ids))
+
+
+async def refresh_all_rep_stats() -> int:
+    """
+    Recompute statistics for every rep and drop rows for reps with no calls.
+    Run after each sync of call_center_scores_sync.
+    
+    Returns:
+        Number of reps refreshed
+    """
+    lakebase = Lakebase()
+    await ensure_rep_stats_table()
+    rows = await lakebase.aquery(_rep_stats_sql("TRUE"))
+    
+    sql = """
+        DELETE FROM public.telco_call_center_analytics.rep_score_stats r
+        WHERE NOT EXISTS (
+            SELECT 1 FROM public.telco_call_center_analytics.call_center_scores_sync s
+            WHERE s.rep_id = r.rep_id
+        )
+        RETURNING rep_id
+    """
+    await lakebase.aquery(sql)
+    
+    # A sync may have changed any call, so start from an empty result cache
+    ResultCache().clear()
+    
+    return len(rows)
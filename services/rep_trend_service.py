@@ -0,0 +1,431 @@
+"""
+Service for per-rep score trends backed by daily rollups.
+
+rep_daily_rollups keeps one row per rep and call day with the call count and
+the sums and counts of effective scores (human override when one exists,
+otherwise the AI score): the total score and every scorecard criterion.
+Trends for any granularity (day, week, month) are answered by summing those
+rows, so they never read the calls table.
+
+Rollups are rebuilt incrementally:
+- after each sync, for the reps and days of calls that are new, removed or
+  changed (rep, date, scores or human evaluation), or for every day with a
+  full rebuild; rep_rollup_calls keeps each call's rep, day and an MD5 of
+  those values to find them, however old the call is
+- after a human evaluation is saved or deleted, for that call's rep and day
+Only rows whose sums changed are rewritten, and days that no longer have
+calls are removed. The rollups are built at startup when missing and by the
+refresh after each sync; until then get_rep_trend raises RollupsNotReady.
+
+A call's day is the leading YYYY-MM-DD of its TEXT call_date; calls whose
+call_date does not start with a valid date are left out of the rollups.
+
+Database Schema:
+----------------
+CREATE TABLE IF NOT EXISTS public.telco_call_center_analytics.rep_daily_rollups (
+    rep_id TEXT NOT NULL,
+    day DATE NOT NULL,
+    call_count INTEGER NOT NULL,
+    score_sum NUMERIC,
+    score_count INTEGER NOT NULL,
+    <criterion>_sum NUMERIC,          -- one pair per SCORECARD_CRITERIA entry
+    <criterion>_count INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (rep_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS public.telco_call_center_analytics.rep_rollup_calls (
+    call_id TEXT PRIMARY KEY,
+    rep_id TEXT,
+    day DATE,
+    content_hash TEXT NOT NULL
+);
+"""
+from typing import List, Tuple, Any, Optional
+from psycopg2.errors import UndefinedTable
+from services.lakebase import Lakebase
+from services.prepared_statements import PreparedStatement
+from services.rep_stats_service import SCORECARD_CRITERIA, _effective_criterion_sql
+from services.result_cache import cached
+from datetime import date, datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+TREND_GRANULARITIES = ("day", "week", "month")
+
+_ROLLUPS_TABLE = "public.telco_call_center_analytics.rep_daily_rollups"
+
+_ROLLUP_CALLS_TABLE = "public.telco_call_center_analytics.rep_rollup_calls"
+
+
+class RollupsNotReady(Exception):
+    """Raised when the daily rollups have not been built yet."""
+
+
+def parse_day(value: str) -> date:
+    """
+    Parse a YYYY-MM-DD date parameter.
+    
+    Raises:
+        ValueError: If the value is not a valid YYYY-MM-DD date
+    """
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Invalid date: {value} (expected YYYY-MM-DD)")
+
+
+def _day_sql(column: str) -> str:
+    """
+    SQL expression for the calendar day of a TEXT call_date.
+    
+    NULL unless the value starts with a valid YYYY-MM-DD date: the nested
+    CASE only casts once the month and day are known to be in range, so a
+    value such as 2024-13-45 or 2024-02-30 never fails the statement.
+    """
+    return (
+        f"CASE WHEN {column} ~ '^[1-9][0-9]{{3}}-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])' THEN "
+        f"CASE WHEN SUBSTRING({column}, 9, 2)::integer <= EXTRACT(DAY FROM "
+        f"(LEFT({column}, 8) || '01')::date + INTERVAL '1 month' - INTERVAL '1 day') "
+        f"THEN LEFT({column}, 10)::date END END"
+    )
+
+
+def _rollup_refresh_sql(calls_scope: str, rollups_scope: str, leading_ctes: str = "", trailing_ctes: str = "") -> str:
+    """
+    Build a statement that recomputes the rollup rows in one scope.
+    
+    calls_scope filters the calls (aliases s and d.day) and rollups_scope
+    selects the same rows of rep_daily_rollups (alias r); rows in the scope
+    that no longer have calls are deleted. leading_ctes and trailing_ctes
+    are extra WITH entries (each ending in a comma, or starting with one),
+    placed before and after the rollup ones.
+    """
+    criteria_sums = "".join(
+        f",\n                SUM({_effective_criterion_sql(c)}) AS {c}_sum,"
+        f"\n                COUNT({_effective_criterion_sql(c)}) AS {c}_count"
+        for c in SCORECARD_CRITERIA
+    )
+    value_columns = ["call_count", "score_sum", "score_count"] + [
+        f"{c}_{suffix}" for c in SCORECARD_CRITERIA for suffix in ("sum", "count")
+    ]
+    column_list = ", ".join(value_columns)
+    update_list = ",\n                ".join(f"{column} = EXCLUDED.{column}" for column in value_columns)
+    current = ", ".join(f"r.{column}" for column in value_columns)
+    excluded = ", ".join(f"EXCLUDED.{column}" for column in value_columns)
+    
+    return f"""
+        WITH {leading_ctes}effective AS (
+            SELECT
+                s.rep_id,
+                d.day,
+                s.scorecard_json::jsonb AS scorecard,
+                h.scorecard_overrides AS overrides,
+                COALESCE(h.total_score_override, s.total_score) AS total_score
+            FROM public.telco_call_center_analytics.call_center_scores_sync s
+            CROSS JOIN LATERAL (SELECT {_day_sql("s.call_date")} AS day) d
+            LEFT JOIN public.telco_call_center_analytics.human_evaluations h
+                ON h.call_id = s.call_id
+            WHERE s.rep_id IS NOT NULL AND d.day IS NOT NULL AND {calls_scope}
+        ),
+        rolled AS (
+            SELECT
+                e.rep_id,
+                e.day,
+                COUNT(*) AS call_count,
+                SUM(e.total_score) AS score_sum,
+                COUNT(e.total_score) AS score_count{criteria_sums}
+            FROM effective e
+            GROUP BY e.rep_id, e.day
+        ),
+        upserted AS (
+            INSERT INTO {_ROLLUPS_TABLE} AS r (rep_id, day, {column_list}, updated_at)
+            SELECT rep_id, day, {column_list}, CURRENT_TIMESTAMP
+            FROM rolled
+            ON CONFLICT (rep_id, day)
+            DO UPDATE SET
+                {update_list},
+                updated_at = EXCLUDED.updated_at
+            WHERE ({current}) IS DISTINCT FROM ({excluded})
+            RETURNING rep_id
+        ),
+        removed AS (
+            DELETE FROM {_ROLLUPS_TABLE} r
+            WHERE {rollups_scope}
+                AND NOT EXISTS (SELECT 1 FROM rolled x WHERE x.rep_id = r.rep_id AND x.day = r.day)
+            RETURNING rep_id
+        ){trailing_ctes}
+        SELECT (SELECT COUNT(*) FROM upserted), (SELECT COUNT(*) FROM removed)
+    """
+
+
+def _rollup_refresh_statement(name: str, calls_scope: str, rollups_scope: str) -> PreparedStatement:
+    """Register a _rollup_refresh_sql statement as a prepared statement."""
+    return PreparedStatement(name, _rollup_refresh_sql(calls_scope, rollups_scope))
+
+
+# Post-sync refresh. The reps and days to recompute are those of calls whose
+# fingerprint differs from the one recorded in rep_rollup_calls (before and
+# after the change) and of calls that no longer exist; the recorded
+# fingerprints are updated in the same statement. The %s flag makes it a
+# full rebuild. %% escapes the format() placeholders.
+_REFRESH_CHANGED = PreparedStatement("refresh_rep_rollups_changed", _rollup_refresh_sql(
+    "(%s OR (s.rep_id, d.day) IN (SELECT rep_id, day FROM keys))",
+    "(%s OR (r.rep_id, r.day) IN (SELECT rep_id, day FROM keys))",
+    leading_ctes=f"""fingerprints AS (
+            SELECT
+                s.call_id,
+                s.rep_id,
+                {_day_sql("s.call_date")} AS day,
+                md5(format('%%L %%L %%L %%L %%L %%L', s.rep_id, s.call_date, s.total_score, s.scorecard_json::text,
+                    h.total_score_override, h.scorecard_overrides::text)) AS content_hash
+            FROM public.telco_call_center_analytics.call_center_scores_sync s
+            LEFT JOIN public.telco_call_center_analytics.human_evaluations h
+                ON h.call_id = s.call_id
+        ),
+        changed AS (
+            SELECT f.call_id, f.rep_id, f.day, f.content_hash, t.rep_id AS old_rep_id, t.day AS old_day
+            FROM fingerprints f
+            LEFT JOIN {_ROLLUP_CALLS_TABLE} t
+                ON t.call_id = f.call_id
+            WHERE %s OR t.content_hash IS DISTINCT FROM f.content_hash
+        ),
+        gone AS (
+            DELETE FROM {_ROLLUP_CALLS_TABLE} t
+            WHERE NOT EXISTS (
+                SELECT 1 FROM public.telco_call_center_analytics.call_center_scores_sync s
+                WHERE s.call_id = t.call_id
+            )
+            RETURNING t.rep_id, t.day
+        ),
+        keys AS (
+            SELECT rep_id, day FROM changed
+            UNION SELECT old_rep_id, old_day FROM changed
+            UNION SELECT rep_id, day FROM gone
+        ),
+        """,
+    trailing_ctes=f""",
+        recorded AS (
+            INSERT INTO {_ROLLUP_CALLS_TABLE} AS t (call_id, rep_id, day, content_hash)
+            SELECT call_id, rep_id, day, content_hash
+            FROM changed
+            ON CONFLICT (call_id)
+            DO UPDATE SET
+                rep_id = EXCLUDED.rep_id,
+                day = EXCLUDED.day,
+                content_hash = EXCLUDED.content_hash
+            RETURNING call_id
+        )"""
+))
+
+# The rep and day of one call
+_CALL_KEY = f"""(
+                SELECT c.rep_id, {_day_sql("c.call_date")}
+                FROM public.telco_call_center_analytics.call_center_scores_sync c
+                WHERE c.call_id = %s
+            )"""
+
+_REFRESH_FOR_CALL = _rollup_refresh_statement(
+    "refresh_rep_rollups_for_call",
+    f"(s.rep_id, d.day) = {_CALL_KEY}",
+    f"(r.rep_id, r.day) = {_CALL_KEY}"
+)
+
+# The rep and day of each of several calls
+_CALLS_KEYS = f"""(
+                SELECT c.rep_id, {_day_sql("c.call_date")}
+                FROM public.telco_call_center_analytics.call_center_scores_sync c
+                WHERE c.call_id = ANY(%s::text[])
+            )"""
+
+_REFRESH_FOR_CALLS = _rollup_refresh_statement(
+    "refresh_rep_rollups_for_calls",
+    f"(s.rep_id, d.day) IN {_CALLS_KEYS}",
+    f"(r.rep_id, r.day) IN {_CALLS_KEYS}"
+)
+
+_criteria_averages = "".join(
+    f",\n            ROUND(SUM({c}_sum) / NULLIF(SUM({c}_count), 0), 2) AS {c}"
+    for c in SCORECARD_CRITERIA
+)
+
+_GET_REP_TREND = PreparedStatement("get_rep_trend", f"""
+        SELECT
+            date_trunc(%s, day::timestamp)::date AS period,
+            SUM(call_count) AS call_count,
+            SUM(score_count) AS scored_calls,
+            ROUND(SUM(score_sum) / NULLIF(SUM(score_count), 0), 2) AS avg_score{_criteria_averages}
+        FROM {_ROLLUPS_TABLE}
+        WHERE rep_id = %s
+            AND (%s::date IS NULL OR day >= %s::date)
+            AND (%s::date IS NULL OR day <= %s::date)
+        GROUP BY 1
+        ORDER BY 1
+""")
+
+
+async def ensure_rep_rollups_table() -> List[Tuple[Any, ...]]:
+    """
+    Ensure the rep_daily_rollups and rep_rollup_calls tables exist.
+    """
+    criteria_columns = "".join(
+        f"\n            {c}_sum NUMERIC,\n            {c}_count INTEGER NOT NULL," for c in SCORECARD_CRITERIA
+    )
+    sql = f"""
+        CREATE TABLE IF NOT EXISTS {_ROLLUPS_TABLE} (
+            rep_id TEXT NOT NULL,
+            day DATE NOT NULL,
+            call_count INTEGER NOT NULL,
+            score_sum NUMERIC,
+            score_count INTEGER NOT NULL,{criteria_columns}
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (rep_id, day)
+        );
+        CREATE TABLE IF NOT EXISTS {_ROLLUP_CALLS_TABLE} (
+            call_id TEXT PRIMARY KEY,
+            rep_id TEXT,
+            day DATE,
+            content_hash TEXT NOT NULL
+        );
+        SELECT to_regclass('{_ROLLUPS_TABLE}')::text
+    """
+    
+    lakebase = Lakebase()
+    return await lakebase.aquery(sql)
+
+
+async def refresh_rep_rollups(full: bool = False) -> Tuple[int, int]:
+    """
+    Bring the daily rollups up to date with call_center_scores_sync.
+    Run after each sync.
+    
+    Only the reps and days of calls that are new, removed or changed since
+    the last refresh are recomputed, so a refresh after a small sync costs a
+    fingerprint pass over the calls plus those days. The first refresh
+    covers every day.
+    
+    Args:
+        full: Recompute every day instead of only the changed ones
+    
+    Returns:
+        Tuple of (rollup rows added or updated, rollup rows removed)
+    """
+    await ensure_rep_rollups_table()
+    
+    rows = await _REFRESH_CHANGED.fetch(full, full, full)
+    
+    changed, removed = rows[0] if rows else (0, 0)
+    return changed, removed
+
+
+async def build_rep_rollups_if_missing() -> bool:
+    """
+    Build the daily rollups if the table does not exist yet. Called in the
+    background at startup, so no trend request ever has to build them; a
+    failure is logged and left to the next refresh.
+    
+    Returns:
+        True if the rollups were built
+    """
+    try:
+        lakebase = Lakebase()
+        rows = await lakebase.aquery(f"SELECT to_regclass('{_ROLLUPS_TABLE}')::text")
+        if rows and rows[0][0] is not None:
+            return False
+    
+        changed, _ = await refresh_rep_rollups()
+    except Exception as e:
+        logger.warning(f"Could not build the daily rollups at startup: {e}")
+        return False
+    
+    logger.info(f"Built {changed} daily rollup rows")
+    return True
+
+
+async def refresh_rep_rollups_for_call(call_id: str) -> Tuple[int, int]:
+    """
+    Recompute the rollup row for the rep and day of one call.
+    Called after a human evaluation for the call is saved or deleted.
+    
+    Args:
+        call_id: The call whose rollup row should be refreshed
+    
+    Returns:
+        Tuple of (rollup rows added or updated, rollup rows removed)
+    """
+    rows = await _REFRESH_FOR_CALL.fetch(call_id, call_id)
+    
+    changed, removed = rows[0] if rows else (0, 0)
+    return changed, removed
+
+
+async def refresh_rep_rollups_for_calls(call_ids: List[str]) -> Tuple[int, int]:
+    """
+    Recompute the rollup rows for the reps and days of several calls, in one statement.
+    Called once per bulk evaluation import.
+    
+    Args:
+        call_ids: The calls whose rollup rows should be refreshed
+    
+    Returns:
+        Tuple of (rollup rows added or updated, rollup rows removed)
+    """
+    if not call_ids:
+        return 0, 0
+    
+    call_ids = list(call_ids)
+    rows = await _REFRESH_FOR_CALLS.fetch(call_ids, call_ids)
+    
+    changed, removed = rows[0] if rows else (0, 0)
+    return changed, removed
+
+
+@cached("ccr_stats", tags=lambda rows, call_center_rep_id, *_, **__: [f"rep:{call_center_rep_id}"])
+async def get_rep_trend(
+    call_center_rep_id: str,
+    granularity: str = "day",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> List[Tuple[Any, ...]]:
+    """
+    Get a rep's effective score trend from the daily rollups.
+    
+    Read-only: the rollups are built at startup and by the refresh after
+    each sync, never by a trend request.
+    
+    Args:
+        call_center_rep_id: The call center rep ID to get the trend for
+        granularity: Period length: day, week (starting Monday) or month
+        start_date: First day to include (YYYY-MM-DD)
+        end_date: Last day to include (YYYY-MM-DD)
+    
+    Returns:
+        List of tuples containing (period_start, call_count, scored_calls,
+        avg_score, <criterion averages in SCORECARD_CRITERIA order>),
+        oldest period first
+    
+    Raises:
+        ValueError: If the granularity is not day, week or month, or a date
+                    is not YYYY-MM-DD
+        RollupsNotReady: If the rollups have not been built yet
+    """
+    if granularity not in TREND_GRANULARITIES:
+        raise ValueError(f"Invalid granularity: {granularity}")
+    for value in (start_date, end_date):
+        if value:
+            parse_day(value)
+    
+    params = (
+        granularity,
+        call_center_rep_id,
+        start_date or None, start_date or None,
+        end_date or None, end_date or None,
+    )
+    
+    try:
+        return await _GET_REP_TREND.fetch(*params)
+    except UndefinedTable:
+        raise RollupsNotReady(
+            "The trend rollups have not been built yet; they are built at startup and by POST /api/ccrs/stats/refresh"
+        )
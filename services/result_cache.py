@@ -0,0 +1,223 @@
+"""
+In-process result cache for read-heavy service functions.
+
+call_center_scores_sync only changes when the sync job runs, so listing,
+detail and stats results can be served from memory for a short time. The
+cache is bounded (least-recently-used entries are evicted first), each
+namespace has its own TTL, and entries carry tags such as "call:<id>" and
+"rep:<id>" so writes can invalidate exactly the results they affect.
+
+Optional environment variables:
+    RESULT_CACHE_ENABLED        set to "false" to bypass the cache (default true)
+    RESULT_CACHE_MAX_ENTRIES    maximum cached results (default 1024)
+"""
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Any, Dict, Set, Tuple, Callable, Iterable, Hashable
+
+# Seconds each namespace's results stay fresh
+CACHE_TTLS = {
+    "ccrs": 300,
+    "ccr_stats": 120,
+    "calls": 60,
+    "call": 300,
+    "human_evaluation": 300,
+    "data_version": 5,
+}
+
+DEFAULT_TTL = 60
+
+
+class ResultCache:
+    """Singleton bounded TTL/LRU cache with tag-based invalidation."""
+
+    _instance: Optional['ResultCache'] = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._init_cache()
+                    cls._instance = instance
+        return cls._instance
+
+    def _init_cache(self) -> None:
+        self._enabled = os.getenv("RESULT_CACHE_ENABLED", "true").lower() != "false"
+        self._max_entries = max(1, int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024")))
+        # key -> (value, expires_at, namespace, tags)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, str, Tuple[str, ...]]]" = OrderedDict()
+        self._tag_index: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._evictions = 0
+        self._invalidations = 0
+        # Bumped on every invalidation so results read before a write are not stored after it
+        self._generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def _remove(self, key: Hashable) -> None:
+        """Remove an entry and its tag references. Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[3]:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+    def get(self, key: Hashable, namespace: str) -> Tuple[bool, Any]:
+        """
+        Look up a cached result.
+
+        Returns:
+            (True, value) on a fresh hit, otherwise (False, None)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits[namespace] = self._hits.get(namespace, 0) + 1
+                return True, entry[0]
+            if entry is not None:
+                self._remove(key)
+            self._misses[namespace] = self._misses.get(namespace, 0) + 1
+            return False, None
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        namespace: str,
+        tags: Iterable[str] = (),
+        generation: Optional[int] = None
+    ) -> None:
+        """
+        Store a result under the namespace TTL, evicting the least recently used entries.
+
+        If generation is given and an invalidation happened since it was read,
+        the result may predate a write and is not stored.
+        """
+        ttl = CACHE_TTLS.get(namespace, DEFAULT_TTL)
+        tags = tuple(set(tags))
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, namespace, tags)
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            while len(self._entries) > self._max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        Drop every entry carrying any of the given tags.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tag_index.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self._invalidations += len(keys)
+            self._generation += 1
+            return len(keys)
+
+    def invalidate_namespaces(self, *namespaces: str) -> int:
+        """
+        Drop every entry in the given namespaces.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry[2] in namespaces]
+            for key in keys:
+                self._remove(key)
+            self._invalidations += len(keys)
+            self._generation += 1
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._tag_index.clear()
+            self._generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters per namespace plus size and eviction totals."""
+        with self._lock:
+            namespaces = sorted(set(self._hits) | set(self._misses))
+            return {
+                "enabled": self._enabled,
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "namespaces": {
+                    ns: {"hits": self._hits.get(ns, 0), "misses": self._misses.get(ns, 0)}
+                    for ns in namespaces
+                },
+            }
+
+
+def cached(namespace: str, tags: Optional[Callable[..., Iterable[str]]] = None):
+    """
+    Cache the result of an async service function in ResultCache.
+
+    Args:
+        namespace: Cache namespace; selects the TTL and groups hit/miss counters
+        tags: Optional callable (result, *args, **kwargs) -> tags for invalidation
+
+    All arguments of the decorated function must be hashable. The wrapper's
+    prime(value, *args, **kwargs) stores a result obtained elsewhere (for
+    example from a snapshot) as if the function had returned it.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache = ResultCache()
+            if not cache.enabled:
+                return await func(*args, **kwargs)
+
+            key = (namespace, func.__name__, args, tuple(sorted(kwargs.items())))
+            hit, value = cache.get(key, namespace)
+            if hit:
+                return value
+
+            generation = cache.generation
+            value = await func(*args, **kwargs)
+            cache.set(key, value, namespace, tags(value, *args, **kwargs) if tags else (), generation)
+            return value
+
+        def prime(value, *args, **kwargs):
+            cache = ResultCache()
+            if cache.enabled:
+                key = (namespace, func.__name__, args, tuple(sorted(kwargs.items())))
+                cache.set(key, value, namespace, tags(value, *args, **kwargs) if tags else ())
+
+        wrapper.prime = prime
+        return wrapper
+    return decorator
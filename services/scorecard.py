@@ -0,0 +1,122 @@
+"""
+Compact scorecard representation and fast override merge.
+
+A scorecard always has the same six criteria (see SCORECARD_CRITERIA), so the
+scores fit in a fixed-order tuple. Human overrides in the usual shape (only
+criterion scores) are converted to that compact form once, when the
+evaluation row is fetched, and merged by walking the fixed layout and copying
+just the dicts on overridden paths. Overrides in any other shape return None
+from compact_overrides(), and the caller falls back to the generic deep merge.
+"""
+from typing import List, Tuple, Optional, Dict, Sequence
+from services.rep_stats_service import SCORECARD_CRITERIA
+
+# Criterion names in the fixed order used by CompactScorecard.scores
+CRITERIA: Tuple[str, ...] = tuple(SCORECARD_CRITERIA)
+
+# JSON path of each criterion's score, e.g. ("criteria_1", "technical_aspects", "call_closing", "score")
+CRITERIA_PATHS: Tuple[Tuple[str, ...], ...] = tuple(
+    tuple(SCORECARD_CRITERIA[name].split(",")) for name in CRITERIA
+)
+
+
+def _build_sections() -> Tuple[Tuple[str, str, Tuple[Tuple[int, str], ...]], ...]:
+    """Group criteria by (group, section), e.g. ("criteria_1", "technical_aspects", ((0, "recording_disclosure"), ...))."""
+    sections: Dict[Tuple[str, str], List[Tuple[int, str]]] = {}
+    for position, (group, section, criterion, _) in enumerate(CRITERIA_PATHS):
+        sections.setdefault((group, section), []).append((position, criterion))
+    return tuple((group, section, tuple(items)) for (group, section), items in sections.items())
+
+
+# The scorecard layout is fixed at three levels, so merges walk this table instead of recursing
+_SECTIONS = _build_sections()
+_SECTION_KEYS = {group: section for group, section, _ in _SECTIONS}
+_CRITERION_POSITIONS = {
+    (group, section): {criterion: position for position, criterion in items}
+    for group, section, items in _SECTIONS
+}
+
+
+class CompactScorecard:
+    """The six criterion scores of a scorecard, in CRITERIA order (None when absent)."""
+
+    __slots__ = ("scores",)
+
+    def __init__(self, scores: Sequence[Optional[float]]):
+        self.scores: Tuple[Optional[float], ...] = tuple(scores)
+
+    def to_dict(self) -> Dict[str, Optional[float]]:
+        """Criterion name -> score."""
+        return dict(zip(CRITERIA, self.scores))
+
+
+def compact_overrides(overrides: dict) -> Optional[CompactScorecard]:
+    """
+    Convert human overrides to compact form.
+
+    Args:
+        overrides: scorecard_overrides dictionary
+
+    Returns:
+        CompactScorecard with None for criteria that are not overridden, or
+        None if the overrides contain anything besides criterion scores
+    """
+    scores: List[Optional[float]] = [None] * len(CRITERIA)
+    for group, sections in overrides.items():
+        section = _SECTION_KEYS.get(group)
+        if section is None or not isinstance(sections, dict) or sections.keys() - {section}:
+            return None
+        criteria = sections.get(section)
+        if criteria is None:
+            continue
+        if not isinstance(criteria, dict):
+            return None
+        positions = _CRITERION_POSITIONS[(group, section)]
+        for criterion, leaf in criteria.items():
+            position = positions.get(criterion)
+            if position is None or not isinstance(leaf, dict) or leaf.keys() - {"score"}:
+                return None
+            score = leaf.get("score")
+            if score is None:
+                continue
+            if not isinstance(score, (int, float)) or isinstance(score, bool):
+                return None
+            scores[position] = score
+    return CompactScorecard(scores)
+
+
+def apply_compact_overrides(scorecard: dict, overrides: CompactScorecard) -> dict:
+    """
+    Merge compact overrides into a scorecard dictionary.
+
+    Only the dicts on overridden paths are copied; every other branch is
+    shared with the input, which is never modified. The result equals the
+    generic deep merge of the same overrides.
+
+    Args:
+        scorecard: AI scorecard_json dictionary
+        overrides: Overrides from compact_overrides()
+
+    Returns:
+        Merged scorecard dictionary
+    """
+    scores = overrides.scores
+    merged = dict(scorecard)
+    for group, section, items in _SECTIONS:
+        section_node = None
+        for position, criterion in items:
+            score = scores[position]
+            if score is None:
+                continue
+            if section_node is None:
+                # First override in this section: copy the group and section once
+                group_node = merged.get(group)
+                group_node = dict(group_node) if isinstance(group_node, dict) else {}
+                section_node = group_node.get(section)
+                section_node = dict(section_node) if isinstance(section_node, dict) else {}
+                group_node[section] = section_node
+                merged[group] = group_node
+            leaf = section_node.get(criterion)
+            section_node[criterion] = {**leaf, "score": score} if isinstance(leaf, dict) else {"score": score}
+    return merged
+
@@ -0,0 +1,258 @@
+"""
+Service for full-text search over call transcripts.
+
+Each call's transcript_summary and transcript are parsed once into a tsvector
+stored in call_search_documents, with a GIN index on it. Searches match that
+index instead of scanning transcripts, rank the matches with ts_rank_cd
+(summary words weigh more than transcript words) and only read the top-k
+transcripts back, to build snippets. Ranking reads each match's document,
+so only the SEARCH_MAX_CANDIDATES most recent matches are ranked; a common
+word does not rank the whole corpus.
+
+The search documents are built at startup when missing and refreshed after
+each sync (POST /api/ccrs/stats/refresh); a refresh re-parses only calls
+whose text changed and removes calls that no longer exist. Searches only
+read them: until the first build, search_calls raises SearchIndexNotReady.
+
+Queries use websearch_to_tsquery syntax: plain words are ANDed,
+"quoted text" is a phrase, "or" separates alternatives and -word excludes.
+
+Optional environment variables:
+    SEARCH_MAX_CANDIDATES   most recent matches ranked per search (default 1000)
+
+Database Schema:
+----------------
+CREATE TABLE IF NOT EXISTS public.telco_call_center_analytics.call_search_documents (
+    call_id TEXT PRIMARY KEY,
+    document TSVECTOR NOT NULL,
+    content_hash TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_call_search_documents_document
+    ON public.telco_call_center_analytics.call_search_documents USING GIN (document);
+"""
+from typing import List, Tuple, Any, Optional
+from psycopg2.errors import UndefinedTable
+from services.lakebase import Lakebase
+from services.prepared_statements import PreparedStatement
+from services.result_cache import cached
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Text search configuration used for both documents and queries
+SEARCH_CONFIG = "english"
+
+
+class SearchIndexNotReady(Exception):
+    """Raised when the search documents have not been built yet."""
+
+_SEARCH_CALLS = PreparedStatement("search_calls", f"""
+        SELECT
+            m.call_id,
+            m.member_id,
+            m.call_date,
+            m.call_time,
+            m.total_score,
+            m.rep_id,
+            m.has_human_override,
+            m.rank,
+            ts_headline('{SEARCH_CONFIG}', COALESCE(t.transcript, t.transcript_summary, ''), m.query,
+                'MaxFragments=2, MinWords=5, MaxWords=20, FragmentDelimiter=" ... "') AS snippet
+        FROM (
+            SELECT
+                c.call_id,
+                c.member_id,
+                c.call_date,
+                c.call_time,
+                COALESCE(h.total_score_override, c.total_score) AS total_score,
+                c.rep_id,
+                h.call_id IS NOT NULL AS has_human_override,
+                ts_rank_cd(c.document, c.query, 32) AS rank,
+                c.query
+            FROM (
+                -- Matches come from the GIN index; only the most recent ones are ranked
+                SELECT s.call_id, s.member_id, s.call_date, s.call_time, s.total_score, s.rep_id, d.document, q.query
+                FROM websearch_to_tsquery('{SEARCH_CONFIG}', %s) AS q(query)
+                JOIN public.telco_call_center_analytics.call_search_documents d
+                    ON d.document @@ q.query
+                JOIN public.telco_call_center_analytics.call_center_scores_sync s
+                    ON s.call_id = d.call_id
+                WHERE (%s::integer IS NULL OR s.total_score >= %s)
+                    AND (%s::text IS NULL OR COALESCE(s.call_date, '') >= %s)
+                    AND (%s::text IS NULL OR (COALESCE(s.call_date, '') <= %s AND s.call_date IS NOT NULL))
+                    AND (%s::text IS NULL OR s.member_id = %s)
+                    AND (%s::text IS NULL OR s.rep_id = %s)
+                ORDER BY COALESCE(s.call_date, '') DESC, COALESCE(s.call_time, '') DESC, s.call_id DESC
+                LIMIT %s
+            ) c
+            LEFT JOIN public.telco_call_center_analytics.human_evaluations h
+                ON h.call_id = c.call_id
+            ORDER BY rank DESC, COALESCE(c.call_date, '') DESC, COALESCE(c.call_time, '') DESC, c.call_id DESC
+            LIMIT %s
+        ) m
+        JOIN public.telco_call_center_analytics.call_center_scores_sync t
+            ON t.call_id = m.call_id
+        ORDER BY m.rank DESC, COALESCE(m.call_date, '') DESC, COALESCE(m.call_time, '') DESC, m.call_id DESC
+""")
+
+
+async def ensure_search_index_table() -> List[Tuple[Any, ...]]:
+    """
+    Ensure the call_search_documents table and its GIN index exist.
+    """
+    sql = """
+        CREATE TABLE IF NOT EXISTS public.telco_call_center_analytics.call_search_documents (
+            call_id TEXT PRIMARY KEY,
+            document TSVECTOR NOT NULL,
+            content_hash TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_call_search_documents_document
+            ON public.telco_call_center_analytics.call_search_documents USING GIN (document);
+        SELECT to_regclass('public.telco_call_center_analytics.call_search_documents')::text
+    """
+    
+    lakebase = Lakebase()
+    return await lakebase.aquery(sql)
+
+
+async def refresh_search_index() -> Tuple[int, int]:
+    """
+    Bring the search documents up to date with call_center_scores_sync.
+    Run after each sync.
+    
+    Only calls that are new or whose summary or transcript changed (by MD5)
+    are parsed again, so a refresh after a small sync costs a hash pass over
+    the text plus the new documents.
+    
+    Returns:
+        Tuple of (calls indexed, calls removed)
+    """
+    sql = f"""
+        WITH changed AS (
+            SELECT s.call_id, s.transcript_summary, s.transcript, c.content_hash
+            FROM public.telco_call_center_analytics.call_center_scores_sync s
+            CROSS JOIN LATERAL (
+                SELECT md5(COALESCE(s.transcript_summary, '') || chr(31) || COALESCE(s.transcript, '')) AS content_hash
+            ) c
+            LEFT JOIN public.telco_call_center_analytics.call_search_documents d
+                ON d.call_id = s.call_id
+            WHERE d.content_hash IS DISTINCT FROM c.content_hash
+        ),
+        upserted AS (
+            INSERT INTO public.telco_call_center_analytics.call_search_documents
+                (call_id, document, content_hash, updated_at)
+            SELECT
+                call_id,
+                setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(transcript_summary, '')), 'A')
+                    || setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(transcript, '')), 'B'),
+                content_hash,
+                CURRENT_TIMESTAMP
+            FROM changed
+            ON CONFLICT (call_id)
+            DO UPDATE SET
+                document = EXCLUDED.document,
+                content_hash = EXCLUDED.content_hash,
+                updated_at = EXCLUDED.updated_at
+            RETURNING call_id
+        ),
+        removed AS (
+            DELETE FROM public.telco_call_center_analytics.call_search_documents d
+            WHERE NOT EXISTS (
+                SELECT 1 FROM public.telco_call_center_analytics.call_center_scores_sync s
+                WHERE s.call_id = d.call_id
+            )
+            RETURNING call_id
+        )
+        SELECT (SELECT COUNT(*) FROM upserted), (SELECT COUNT(*) FROM removed)
+    """
+    
+    lakebase = Lakebase()
+    await ensure_search_index_table()
+    rows = await lakebase.aquery(sql)
+    
+    indexed, removed = rows[0] if rows else (0, 0)
+    return indexed, removed
+
+
+async def build_search_index_if_missing() -> bool:
+    """
+    Build the search documents if the table does not exist yet. Called in
+    the background at startup, so no search request ever has to build them;
+    a failure is logged and left to the next refresh.
+    
+    Returns:
+        True if the documents were built
+    """
+    try:
+        lakebase = Lakebase()
+        rows = await lakebase.aquery(
+            "SELECT to_regclass('public.telco_call_center_analytics.call_search_documents')::text"
+        )
+        if rows and rows[0][0] is not None:
+            return False
+    
+        indexed, _ = await refresh_search_index()
+    except Exception as e:
+        logger.warning(f"Could not build the search documents at startup: {e}")
+        return False
+    
+    logger.info(f"Built search documents for {indexed} calls")
+    return True
+
+
+@cached("calls", tags=lambda rows, *_, **__: {f"rep:{row[5]}" for row in rows if row[5]})
+async def search_calls(
+    query: str,
+    member_id: Optional[str] = None,
+    min_score: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    call_center_rep_id: Optional[str] = None,
+    limit: int = 20
+) -> List[Tuple[Any, ...]]:
+    """
+    Find the calls whose summary or transcript best match a text query.
+    
+    Read-only: the search documents are built at startup and by the
+    refresh after each sync, never by a search.
+    
+    Args:
+        query: Search text in websearch_to_tsquery syntax
+        member_id: Filter by member ID
+        min_score: Filter calls with total_score >= min_score
+        start_date: Filter calls on or after this date (YYYY-MM-DD)
+        end_date: Filter calls on or before this date (YYYY-MM-DD)
+        call_center_rep_id: Filter by call center representative ID
+        limit: Maximum number of calls to return
+    
+    Rows are ordered by rank, then most recent first.
+    
+    Returns:
+        List of tuples containing (call_id, member_id, call_date, call_time,
+        total_score, rep_id, has_human_override, rank, snippet); the first
+        seven columns match list_calls
+    
+    Raises:
+        SearchIndexNotReady: If the search documents have not been built yet
+    """
+    end_bound = f"{end_date} 23:59:59" if end_date else None
+    params = (
+        query,
+        min_score, min_score,
+        start_date or None, start_date or None,
+        end_bound, end_bound,
+        member_id or None, member_id or None,
+        call_center_rep_id or None, call_center_rep_id or None,
+        max(int(limit), int(os.getenv("SEARCH_MAX_CANDIDATES", "1000"))),
+        int(limit),
+    )
+    
+    try:
+        return await _SEARCH_CALLS.fetch(*params)
+    except UndefinedTable:
+        raise SearchIndexNotReady(
+            "The search index has not been built yet; it is built at startup and by POST /api/ccrs/stats/refresh"
+        )
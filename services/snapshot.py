@@ -0,0 +1,358 @@
+"""
+Local Arrow snapshot of the serving tables, for warm restarts and offline analytics.
+
+After each sync the non-transcript columns of call_center_scores_sync, plus
+human_evaluations, rep_directory and rep_score_stats, are written to Arrow IPC
+files in SNAPSHOT_DIR with a manifest recording the data watermark they were
+read at. On startup a background task reads the live watermark. When it
+equals the snapshot's, the files are memory-mapped (zero-copy, so opening
+them costs no parsing) and, off the event loop, used to:
+
+- prime the cached rep directory behind /api/ccrs and the stats of the reps
+  with the most calls behind /api/ccrs/{id}/stats,
+- seed the optional columnar call index (see columnar_index.py).
+
+Results primed from an older snapshot would be served under the live ETag,
+so when Lakebase moved on since the snapshot nothing is primed and a fresh
+snapshot is written instead.
+
+The same files serve ad-hoc analytics without touching the database:
+    from services.snapshot import load_table
+    calls = load_table("calls")          # pyarrow.Table, memory-mapped
+
+Command line:
+    python -m services.snapshot export [--parquet]   # write a snapshot now (also as Parquet)
+    python -m services.snapshot info                 # print the manifest
+
+Optional environment variables:
+    SNAPSHOT_DIR    directory for snapshot files; snapshots are disabled when unset (requires pyarrow)
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import List, Tuple, Any, Optional, Dict
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional; without it the app simply starts cold
+    pa = None
+
+from services.lakebase import Lakebase
+from services.result_cache import ResultCache
+from services.data_version_service import get_data_watermark
+from services.columnar_index import ColumnarCallIndex, watermark_label, refresh_columnar_index
+from services.rep_directory_service import get_rep_directory
+from services.calls_service import get_ccr_aggregate_stats
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# Rep stats primed on startup, most calls first; the result cache is bounded
+PRIMED_STATS_LIMIT = 256
+
+# Table name -> (query, [(column, arrow type name)]); JSONB columns are stored as JSON text
+SNAPSHOT_TABLES = {
+    "calls": ("""
+        SELECT call_id, member_id, rep_id, rep_name, call_date, call_time, call_outcome, call_purpose,
+            call_duration_seconds, total_score, scorecard_json::text, transcript_summary
+        FROM public.telco_call_center_analytics.call_center_scores_sync
+        ORDER BY COALESCE(call_date, '') DESC, COALESCE(call_time, '') DESC, call_id DESC
+    """, [
+        ("call_id", "string"), ("member_id", "string"), ("rep_id", "string"), ("rep_name", "string"),
+        ("call_date", "string"), ("call_time", "string"), ("call_outcome", "string"),
+        ("call_purpose", "string"), ("call_duration_seconds", "int64"), ("total_score", "int64"),
+        ("scorecard_json", "string"), ("transcript_summary", "string"),
+    ]),
+    "human_evaluations": ("""
+        SELECT evaluation_id, call_id, evaluator_name, evaluation_date, scorecard_overrides::text,
+            total_score_override, feedback_text
+        FROM public.telco_call_center_analytics.human_evaluations
+        ORDER BY call_id
+    """, [
+        ("evaluation_id", "int64"), ("call_id", "string"), ("evaluator_name", "string"),
+        ("evaluation_date", "timestamp"), ("scorecard_overrides", "string"),
+        ("total_score_override", "int64"), ("feedback_text", "string"),
+    ]),
+    "rep_directory": ("""
+        SELECT rep_id, rep_name, call_count, last_call_date
+        FROM public.telco_call_center_analytics.rep_directory
+        ORDER BY rep_id
+    """, [
+        ("rep_id", "string"), ("rep_name", "string"), ("call_count", "int64"), ("last_call_date", "string"),
+    ]),
+    "rep_score_stats": ("""
+        SELECT rep_id, total_calls, avg_score::float8, min_score, max_score,
+            score_histogram::text, criteria_averages::text
+        FROM public.telco_call_center_analytics.rep_score_stats
+        ORDER BY total_calls DESC, rep_id
+    """, [
+        ("rep_id", "string"), ("total_calls", "int64"), ("avg_score", "float64"), ("min_score", "int64"),
+        ("max_score", "int64"), ("score_histogram", "string"), ("criteria_averages", "string"),
+    ]),
+}
+
+_export_lock = threading.Lock()
+
+
+def snapshot_dir() -> Optional[str]:
+    """The snapshot directory, or None when snapshots are disabled or pyarrow is missing."""
+    directory = os.getenv("SNAPSHOT_DIR")
+    if not directory or pa is None:
+        return None
+    return directory
+
+
+def _arrow_schema(columns: List[Tuple[str, str]]) -> "pa.Schema":
+    """Build the Arrow schema of a snapshot table."""
+    types = {"string": pa.string(), "int64": pa.int64(), "float64": pa.float64(), "timestamp": pa.timestamp("us")}
+    return pa.schema([(name, types[type_name]) for name, type_name in columns])
+
+
+def _write_table(lakebase: Lakebase, path: str, sql: str, schema: "pa.Schema") -> int:
+    """Stream a query into an Arrow IPC file batch by batch; returns the row count."""
+    rows_written = 0
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        for batch in lakebase.stream(sql):
+            columns = list(zip(*batch))
+            writer.write_batch(pa.record_batch(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            ))
+            rows_written += len(batch)
+    return rows_written
+
+
+def export_snapshot(watermark: Tuple[Any, ...], parquet: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Write every snapshot table and then the manifest (blocking).
+
+    Files are written next to the current ones and renamed into place, so a
+    reader never sees a partial file. The watermark must be read before the
+    export starts, so the snapshot is never older than its label.
+
+    Args:
+        watermark: Data watermark from get_data_watermark()
+        parquet: Also write a Parquet copy of each table, for other tools
+
+    Returns:
+        The manifest written, or None when snapshots are disabled or an
+        export is already running
+    """
+    directory = snapshot_dir()
+    if directory is None:
+        return None
+    if not _export_lock.acquire(blocking=False):
+        return None
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        lakebase = Lakebase()
+
+        counts = {}
+        for name, (sql, columns) in SNAPSHOT_TABLES.items():
+            counts[name] = _write_table(lakebase, os.path.join(directory, f"{name}.arrow.tmp"), sql, _arrow_schema(columns))
+
+        for name in SNAPSHOT_TABLES:
+            path = os.path.join(directory, f"{name}.arrow")
+            os.replace(f"{path}.tmp", path)
+            if parquet:
+                pa.parquet.write_table(load_table(name, directory), os.path.join(directory, f"{name}.parquet"))
+
+        manifest = {
+            "watermark": list(watermark_label(watermark)),
+            "written_at": datetime.now().isoformat(),
+            "tables": counts,
+        }
+        with open(os.path.join(directory, f"{MANIFEST_NAME}.tmp"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(os.path.join(directory, f"{MANIFEST_NAME}.tmp"), os.path.join(directory, MANIFEST_NAME))
+
+        logger.info(f"Snapshot written to {directory}: {counts}")
+        return manifest
+    finally:
+        _export_lock.release()
+
+
+def read_manifest(directory: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Read the snapshot manifest.
+
+    Returns:
+        Dictionary with watermark, written_at and per-table row counts,
+        or None if there is no snapshot
+    """
+    directory = directory or snapshot_dir()
+    if directory is None:
+        return None
+
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_table(name: str, directory: Optional[str] = None) -> "pa.Table":
+    """
+    Memory-map one snapshot table.
+
+    Args:
+        name: A SNAPSHOT_TABLES name (calls, human_evaluations, rep_directory, rep_score_stats)
+        directory: Snapshot directory (SNAPSHOT_DIR if None)
+
+    Returns:
+        pyarrow.Table backed by the mapped file; no data is copied until read
+    """
+    directory = directory or snapshot_dir()
+    if directory is None:
+        raise RuntimeError("Snapshots are disabled: set SNAPSHOT_DIR and install pyarrow")
+
+    source = pa.memory_map(os.path.join(directory, f"{name}.arrow"), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+def _rows(table: "pa.Table", columns: List[str]) -> List[Tuple[Any, ...]]:
+    """Selected columns of a table as row tuples."""
+    return list(zip(*(table.column(column).to_pylist() for column in columns)))
+
+
+def warm_start(manifest: Dict[str, Any]) -> bool:
+    """
+    Prime the rep directory and rep stats caches and seed the columnar call
+    index from the snapshot (blocking). The caller checks that the snapshot
+    is current first.
+
+    Only the rows that are primed are converted to Python objects; the calls
+    table is read only when the columnar index is enabled, column by column.
+
+    Args:
+        manifest: Manifest of the snapshot in SNAPSHOT_DIR
+
+    Returns:
+        True if the snapshot was used
+    """
+    try:
+        get_rep_directory.prime(_rows(load_table("rep_directory"), ["rep_id", "rep_name", "call_count", "last_call_date"]))
+
+        stats_columns = ["rep_id", "total_calls", "avg_score", "min_score", "max_score", "score_histogram", "criteria_averages"]
+        for row in _rows(load_table("rep_score_stats").slice(0, PRIMED_STATS_LIMIT), stats_columns):
+            get_ccr_aggregate_stats.prime(row, row[0])
+
+        index = ColumnarCallIndex()
+        if index.enabled:
+            calls = load_table("calls")
+            index.load_columns(
+                [calls.column(column).to_pylist() for column in ["call_id", "member_id", "call_date", "call_time", "total_score", "rep_id"]],
+                _rows(load_table("human_evaluations"), ["call_id", "total_score_override"]),
+                tuple(manifest["watermark"])
+            )
+    except Exception as e:
+        logger.warning(f"Snapshot warm start failed: {e}")
+        return False
+
+    logger.info(f"Warm start from snapshot written at {manifest.get('written_at')}")
+    return True
+
+
+def schedule_export(watermark: Tuple[Any, ...]) -> None:
+    """Write a fresh snapshot in a background thread (no-op when snapshots are disabled)."""
+    if snapshot_dir() is None:
+        return
+
+    def run():
+        try:
+            export_snapshot(watermark)
+        except Exception as e:
+            logger.warning(f"Snapshot export failed: {e}")
+
+    threading.Thread(target=run, name="snapshot-export", daemon=True).start()
+
+
+async def warm_start_if_current() -> bool:
+    """
+    Use the snapshot when its watermark equals the live one; otherwise
+    write a fresh snapshot in the background and start cold.
+
+    Returns:
+        True if the snapshot was used
+    """
+    manifest = read_manifest()
+    cache = ResultCache()
+    generation = cache.generation
+    watermark = await get_data_watermark()
+    if watermark is None:
+        # Cannot tell whether the snapshot is current, so do not serve it
+        return False
+
+    if manifest is None or tuple(manifest["watermark"]) != watermark_label(watermark):
+        schedule_export(watermark)
+        return False
+
+    used = await asyncio.get_running_loop().run_in_executor(None, warm_start, manifest)
+    if used and cache.generation != generation:
+        # The data moved while priming; the primed results may predate it
+        cache.invalidate_namespaces("ccrs", "ccr_stats")
+    return used
+
+
+async def refresh_snapshot() -> None:
+    """
+    Write a fresh snapshot in the background at the current watermark.
+    Called after each sync.
+    """
+    if snapshot_dir() is None:
+        return
+
+    watermark = await get_data_watermark()
+    if watermark is not None:
+        schedule_export(watermark)
+
+
+async def _start_snapshot() -> None:
+    """Warm start from a current snapshot, then load the columnar index if the snapshot did not seed it."""
+    try:
+        await warm_start_if_current()
+    finally:
+        await refresh_columnar_index()
+
+
+async def start_snapshot() -> None:
+    """
+    Warm start from the snapshot in the background.
+    Called at startup; returns without waiting for Lakebase.
+    """
+    if snapshot_dir() is None:
+        return
+
+    asyncio.get_running_loop().create_task(_start_snapshot())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write or inspect the local Arrow snapshot.")
+    parser.add_argument("command", choices=["export", "info"])
+    parser.add_argument("--parquet", action="store_true", help="also write a Parquet copy of each table")
+    args = parser.parse_args()
+
+    if snapshot_dir() is None:
+        raise SystemExit("Snapshots are disabled: set SNAPSHOT_DIR and install pyarrow")
+
+    if args.command == "export":
+        watermark = asyncio.run(get_data_watermark())
+        if watermark is None:
+            raise SystemExit("Could not read the data watermark from Lakebase")
+        print(json.dumps(export_snapshot(watermark, parquet=args.parquet), indent=2))
+    else:
+        print(json.dumps(read_manifest(), indent=2))
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    main()
@@ -0,0 +1,188 @@
+"""
+Static frontend asset service.
+
+Loads frontend/index.html and everything under frontend/static once at startup.
+Each static file gets a content-fingerprinted URL (app.css -> /static/app.<hash>.css)
+so it can be cached forever, and the HTML shell is rendered with those URLs.
+Every file is pre-compressed once (gzip, plus brotli when the optional brotli
+package is installed), so requests only pick the matching bytes. Each encoding has its own strong
+ETag (the content hash plus an encoding suffix), since its bytes differ.
+
+The HTML shell references assets with placeholders like {{ asset:app.css }}.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from typing import Optional, Dict
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+_ASSET_PLACEHOLDER = re.compile(r"\{\{\s*asset:([\w.\-]+)\s*\}\}")
+
+# Encodings in order of preference when the client weighs them equally
+_PREFERENCE = ("br", "gzip", "identity")
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Parse an Accept-Encoding header into {coding: q-value}.
+
+    Codings are lowercased; a missing q is 1 and an unparsable one is 0.
+    "*" stands for every coding not listed.
+    """
+    weights: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+    return weights
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header (a list of ETags, or "*") against an ETag.
+
+    Uses the weak comparison If-None-Match calls for, so a W/ prefix added
+    by a proxy still matches.
+    """
+    if not if_none_match:
+        return False
+
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any((candidate[2:] if candidate.startswith("W/") else candidate) == opaque for candidate in candidates)
+
+
+class StaticAsset:
+    """One servable file with its pre-compressed variants."""
+
+    __slots__ = ("content_type", "etags", "variants")
+
+    def __init__(self, content: bytes, content_type: str):
+        self.content_type = content_type
+        # Content-Encoding -> body; "identity" is the uncompressed body
+        self.variants: Dict[str, bytes] = {"identity": content}
+
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content):
+            self.variants["gzip"] = compressed
+
+        if brotli is not None:
+            compressed = brotli.compress(content, quality=11)
+            if len(compressed) < len(content):
+                self.variants["br"] = compressed
+
+        # Content-Encoding -> strong ETag of that variant's bytes
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        self.etags: Dict[str, str] = {
+            encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            for encoding in self.variants
+        }
+
+    def select(self, accept_encoding: str) -> str:
+        """
+        Pick the encoding with the highest q-value the client accepts.
+
+        Codings not listed take the q-value of "*", if any. Ties go to br,
+        then gzip, then identity; identity is also the fallback when no
+        compressed variant is acceptable.
+        """
+        weights = parse_accept_encoding(accept_encoding)
+        default = weights.get("*", 0.0)
+
+        best, best_weight = "identity", 0.0
+        for encoding in _PREFERENCE:
+            weight = weights.get(encoding, default)
+            if encoding in self.variants and weight > best_weight:
+                best, best_weight = encoding, weight
+        return best
+
+
+class StaticAssets:
+    """Singleton holding the rendered HTML shell and fingerprinted static assets."""
+
+    _instance: Optional['StaticAssets'] = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._index = None
+                    instance._assets = {}
+                    instance._urls = {}
+                    cls._instance = instance
+        return cls._instance
+
+    def load(self, frontend_dir: str = "frontend") -> None:
+        """
+        Read, fingerprint and pre-compress the frontend files.
+
+        Args:
+            frontend_dir: Directory containing index.html and static/
+        """
+        assets: Dict[str, StaticAsset] = {}
+        urls: Dict[str, str] = {}
+
+        static_dir = os.path.join(frontend_dir, "static")
+        for name in sorted(os.listdir(static_dir)) if os.path.isdir(static_dir) else []:
+            path = os.path.join(static_dir, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                content = f.read()
+
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if content_type.startswith("text/") or content_type == "application/javascript":
+                content_type += "; charset=utf-8"
+
+            stem, ext = os.path.splitext(name)
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            fingerprinted = f"{stem}.{digest}{ext}"
+            assets[fingerprinted] = StaticAsset(content, content_type)
+            urls[name] = f"/static/{fingerprinted}"
+
+        with open(os.path.join(frontend_dir, "index.html"), "r", encoding="utf-8") as f:
+            html = f.read()
+
+        def resolve(match: re.Match) -> str:
+            name = match.group(1)
+            if name not in urls:
+                raise ValueError(f"index.html references unknown asset: {name}")
+            return urls[name]
+
+        html = _ASSET_PLACEHOLDER.sub(resolve, html)
+
+        self._assets = assets
+        self._urls = urls
+        self._index = StaticAsset(html.encode("utf-8"), "text/html; charset=utf-8")
+
+    def index(self) -> StaticAsset:
+        """Return the rendered HTML shell, loading the frontend on first use."""
+        if self._index is None:
+            self.load()
+        return self._index
+
+    def get(self, fingerprinted_name: str) -> Optional[StaticAsset]:
+        """Return a static asset by its fingerprinted file name, or None."""
+        if self._index is None:
+            self.load()
+        return self._assets.get(fingerprinted_name)
@@ -0,0 +1,123 @@
+"""
+Shared Databricks OAuth token provider.
+
+Caches the access token issued by the workspace OIDC endpoint until shortly
+before it expires, so callers (the agent proxy, Lakebase connections) don't
+request a new token on every use. When the cached token is stale, exactly one
+caller refreshes it under a lock while concurrent callers wait for the result.
+
+Optional environment variables:
+    DATABRICKS_TOKEN                 static token; used as-is when set, except by callers
+                                     that must act as the service principal (Lakebase)
+    TOKEN_REFRESH_MARGIN_SECONDS     refresh this many seconds before expiry (default 120)
+"""
+import os
+import time
+import threading
+import requests
+from typing import Optional
+
+
+class TokenProviderError(Exception):
+    """Raised when a Databricks access token cannot be obtained."""
+
+
+class DatabricksTokenProvider:
+    """Singleton service that issues and caches Databricks access tokens."""
+
+    _instance: Optional['DatabricksTokenProvider'] = None
+    _instance_lock = threading.Lock()
+    _default_expires_in = 3600  # used when the token response has no expires_in
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._token = None
+                    instance._expires_at = 0.0
+                    instance._issued = 0
+                    instance._lock = threading.Lock()
+                    instance._session = requests.Session()
+                    cls._instance = instance
+        return cls._instance
+
+    def _is_fresh(self) -> bool:
+        """Check whether the cached token is usable for at least the refresh margin."""
+        margin = float(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "120"))
+        return self._token is not None and time.monotonic() < self._expires_at - margin
+
+    def _fetch_token(self) -> None:
+        """Request a new token with OAuth client credentials and cache it."""
+        client_id = os.getenv("DATABRICKS_CLIENT_ID")
+        client_secret = os.getenv("DATABRICKS_CLIENT_SECRET")
+        databricks_host = os.getenv("DATABRICKS_HOST")
+
+        if not all([client_id, client_secret, databricks_host]):
+            raise TokenProviderError("Databricks credentials not configured")
+
+        token_url = f"{databricks_host}/oidc/v1/token"
+        response = self._session.post(
+            token_url,
+            data={
+                "grant_type": "client_credentials",
+                "scope": "all-apis"
+            },
+            auth=(client_id, client_secret),
+            timeout=30
+        )
+
+        if response.status_code != 200:
+            raise TokenProviderError(f"Failed to get auth token: {response.text}")
+
+        body = response.json()
+        token = body.get("access_token")
+        if not token:
+            raise TokenProviderError("Failed to get auth token: response has no access_token")
+
+        expires_in = float(body.get("expires_in") or self._default_expires_in)
+        self._token = token
+        self._expires_at = time.monotonic() + expires_in
+        self._issued += 1
+
+    def get_token(self, use_static_token: bool = True) -> str:
+        """
+        Return a valid access token.
+
+        Returns DATABRICKS_TOKEN when it is set and use_static_token is True.
+        Otherwise returns the cached OAuth token of the service principal
+        (DATABRICKS_CLIENT_ID/SECRET), refreshing it first if it is about to expire.
+
+        Args:
+            use_static_token: Accept DATABRICKS_TOKEN; pass False when the
+                              caller's identity must be the service principal
+
+        Returns:
+            Bearer token string
+
+        Raises:
+            TokenProviderError: If credentials are missing or the token request fails
+        """
+        static_token = os.getenv("DATABRICKS_TOKEN") if use_static_token else None
+        if static_token:
+            return static_token
+
+        if self._is_fresh():
+            return self._token
+
+        with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            if not self._is_fresh():
+                self._fetch_token()
+            return self._token
+
+    def invalidate(self) -> None:
+        """Drop the cached token, e.g. after the server rejected it."""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+
+    @property
+    def issued_count(self) -> int:
+        """Number of tokens issued by the OIDC endpoint since startup."""
+        return self._issued
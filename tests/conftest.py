@@ -0,0 +1,386 @@
+"""
+Shared test fixtures.
+
+Unit tests run against FakeDatabase, which stands in for psycopg2 connections
+behind the Lakebase pool and records every statement.
+
+Tests marked with the database fixture run against a real Postgres: the
+Lakebase pool connects to TEST_DATABASE_URL instead of Databricks, and each
+test starts from an empty telco_call_center_analytics schema. The services
+use three-part names (public.telco_call_center_analytics.<table>), so the
+URL must point at a database named "public":
+
+    createdb public
+    TEST_DATABASE_URL=postgresql://postgres@localhost:5432/public python -m pytest
+
+Those tests are skipped when TEST_DATABASE_URL is unset.
+"""
+import io
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple, Any, Optional, Dict, Callable
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+from services import data_version_service
+from services.lakebase import Lakebase
+from services.result_cache import ResultCache
+from services.columnar_index import ColumnarCallIndex
+from services.token_provider import DatabricksTokenProvider
+from services.rep_stats_service import SCORECARD_CRITERIA
+
+SCHEMA = "telco_call_center_analytics"
+
+_SINGLETONS = (Lakebase, ResultCache, ColumnarCallIndex, DatabricksTokenProvider)
+
+
+def _close_lakebase() -> None:
+    """Close the pooled connections and executor of the current Lakebase singleton."""
+    instance = Lakebase._instance
+    if instance is None:
+        return
+    for conn, _, _ in instance._idle:
+        instance._close_quietly(conn)
+    instance._idle = []
+    instance._executor.shutdown(wait=False)
+    instance._stream_executor.shutdown(wait=False)
+
+
+@pytest.fixture(autouse=True)
+def fresh_singletons(monkeypatch):
+    """Give every test its own Lakebase pool, result cache, columnar index and token provider."""
+    monkeypatch.setattr(Lakebase, "_ensure_refresher", lambda self: None)
+    monkeypatch.setattr(data_version_service, "_last_watermark", None)
+    for cls in _SINGLETONS:
+        cls._instance = None
+    yield
+    _close_lakebase()
+    for cls in _SINGLETONS:
+        cls._instance = None
+
+
+class FakeCursor:
+    """Cursor of a FakeConnection: records statements and returns the handler's rows."""
+
+    def __init__(self, connection: "FakeConnection", name: Optional[str] = None):
+        self.connection = connection
+        self.name = name
+        self.itersize = 2000
+        self._rows: List[Tuple[Any, ...]] = []
+
+    def __enter__(self) -> "FakeCursor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def execute(self, sql: str, params: Any = None) -> None:
+        self.connection.database.record(self.connection, sql, params)
+        self._rows = list(self.connection.database.handler(sql, params) or [])
+
+    def copy_expert(self, sql: str, data: io.TextIOBase) -> None:
+        self.connection.database.record(self.connection, sql, data.read())
+
+    def fetchall(self) -> List[Tuple[Any, ...]]:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size: int) -> List[Tuple[Any, ...]]:
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for the Lakebase pool."""
+
+    def __init__(self, database: "FakeDatabase"):
+        self.database = database
+        self.closed = 0
+        self.readonly = False
+        self.autocommit = False
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, name: Optional[str] = None) -> FakeCursor:
+        return FakeCursor(self, name)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def rollback(self) -> None:
+        self.rollbacks += 1
+
+    def get_transaction_status(self) -> int:
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self) -> None:
+        self.closed = 1
+
+
+class FakeDatabase:
+    """
+    Stand-in for Lakebase's connections.
+
+    handler(sql, params) returns the rows of each statement; every statement
+    is recorded in statements as (sql, params), with COPY input as params.
+    """
+
+    def __init__(self):
+        self.handler: Callable[[str, Any], Optional[List[Tuple[Any, ...]]]] = lambda sql, params: []
+        self.statements: List[Tuple[str, Any]] = []
+        self.connections: List[FakeConnection] = []
+
+    def connect(self) -> FakeConnection:
+        conn = FakeConnection(self)
+        self.connections.append(conn)
+        return conn
+
+    def record(self, conn: FakeConnection, sql: str, params: Any) -> None:
+        self.statements.append((sql, params))
+
+    def executed(self, fragment: str) -> List[Tuple[str, Any]]:
+        """Statements whose text contains fragment."""
+        return [statement for statement in self.statements if fragment in statement[0]]
+
+
+@pytest.fixture
+def fake_db(monkeypatch) -> FakeDatabase:
+    """Point the Lakebase pool at a FakeDatabase."""
+    database = FakeDatabase()
+    monkeypatch.setattr(Lakebase, "_create_connection", lambda self: database.connect())
+    return database
+
+
+def scorecard(scores: Dict[str, float]) -> dict:
+    """Build a scorecard_json dictionary from criterion scores."""
+    card: dict = {}
+    for name, score in scores.items():
+        group, section, criterion, leaf = SCORECARD_CRITERIA[name].split(",")
+        card.setdefault(group, {}).setdefault(section, {})[criterion] = {leaf: score, "reasoning": f"{name} reasoning"}
+    return card
+
+
+def score_overrides(scores: Dict[str, float]) -> dict:
+    """Build scorecard_overrides setting the given criterion scores."""
+    overrides: dict = {}
+    for name, score in scores.items():
+        group, section, criterion, leaf = SCORECARD_CRITERIA[name].split(",")
+        overrides.setdefault(group, {}).setdefault(section, {})[criterion] = {leaf: score}
+    return overrides
+
+
+def make_call(
+    call_id: str,
+    rep_id: Optional[str] = "rep-1",
+    member_id: Optional[str] = "member-1",
+    call_date: Optional[str] = "2024-05-01",
+    call_time: Optional[str] = "10:00:00",
+    scores: Optional[Dict[str, float]] = None,
+    total_score: Optional[int] = None,
+    transcript: str = "Agent: Thank you for calling. Member: I have a billing question.",
+    rep_name: Optional[str] = None
+) -> Dict[str, Any]:
+    """A call_center_scores_sync row; the total defaults to the sum of the criterion scores."""
+    scores = scores if scores is not None else {name: 8 for name in SCORECARD_CRITERIA}
+    return {
+        "call_id": call_id,
+        "member_id": member_id,
+        "rep_id": rep_id,
+        "rep_name": rep_name if rep_name is not None else (f"Rep {rep_id}" if rep_id else None),
+        "call_date": call_date,
+        "call_time": call_time,
+        "call_outcome": "resolved",
+        "call_purpose": "billing",
+        "call_duration_seconds": 300,
+        "transcript": transcript,
+        "scorecard_json": json.dumps(scorecard(scores)),
+        "total_score": total_score if total_score is not None else int(sum(scores.values())),
+        "transcript_summary": f"Summary of {call_id}",
+    }
+
+
+class TestDatabase:
+    """Helpers over an autocommit connection to the test database."""
+
+    __test__ = False  # not a test class
+
+    def __init__(self, conn: psycopg2.extensions.connection):
+        self.conn = conn
+
+    def execute(self, sql: str, params: Any = None) -> Optional[List[Tuple[Any, ...]]]:
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall() if cursor.description else None
+
+    def insert_calls(self, *calls: Dict[str, Any]) -> None:
+        if not calls:
+            return
+        columns = list(calls[0])
+        with self.conn.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO public.{SCHEMA}.call_center_scores_sync ({', '.join(columns)}) "
+                f"VALUES ({', '.join(['%s'] * len(columns))})",
+                [[call[column] for column in columns] for call in calls]
+            )
+
+    def insert_evaluation(
+        self,
+        call_id: str,
+        total_score_override: Optional[int],
+        overrides: Optional[dict] = None,
+        evaluator_name: str = "QA"
+    ) -> None:
+        self.execute(
+            f"INSERT INTO public.{SCHEMA}.human_evaluations "
+            "(call_id, evaluator_name, scorecard_overrides, total_score_override, feedback_text) "
+            "VALUES (%s, %s, %s::jsonb, %s, '')",
+            (call_id, evaluator_name, json.dumps(overrides or {}), total_score_override)
+        )
+
+
+_SCORES_SYNC_DDL = f"""
+    CREATE TABLE public.{SCHEMA}.call_center_scores_sync (
+        call_id TEXT PRIMARY KEY,
+        member_id TEXT,
+        rep_id TEXT,
+        rep_name TEXT,
+        call_date TEXT,
+        call_time TEXT,
+        call_outcome TEXT,
+        call_purpose TEXT,
+        call_duration_seconds INTEGER,
+        transcript TEXT,
+        scorecard_json JSONB,
+        total_score INTEGER,
+        transcript_summary TEXT
+    );
+    CREATE TABLE public.{SCHEMA}.human_evaluations (
+        evaluation_id SERIAL PRIMARY KEY,
+        call_id TEXT NOT NULL,
+        evaluator_name TEXT,
+        evaluation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        scorecard_overrides JSONB,
+        total_score_override INTEGER,
+        feedback_text TEXT,
+        UNIQUE(call_id)
+    );
+"""
+
+
+@pytest.fixture
+def database(monkeypatch) -> TestDatabase:
+    """
+    Point the Lakebase pool at TEST_DATABASE_URL, with a fresh schema holding
+    call_center_scores_sync and human_evaluations. The derived tables are
+    left to the services' ensure_* functions.
+    """
+    dsn = os.getenv("TEST_DATABASE_URL")
+    if not dsn:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    db = TestDatabase(conn)
+    if db.execute("SELECT current_database()")[0][0] != "public":
+        conn.close()
+        pytest.skip("TEST_DATABASE_URL must point at a database named public")
+
+    db.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    db.execute(f"CREATE SCHEMA {SCHEMA}")
+    db.execute(_SCORES_SYNC_DDL)
+
+    monkeypatch.setattr(Lakebase, "_create_connection", lambda self: psycopg2.connect(dsn))
+    yield db
+
+    _close_lakebase()
+    conn.close()
+
+
+def record_statements(monkeypatch):
+    """Record every statement the Lakebase pool sends, through a psycopg2 cursor factory."""
+    statements = []
+
+    class CountingCursor(psycopg2.extensions.cursor):
+        def execute(self, sql, params=None):
+            statements.append(sql if isinstance(sql, str) else sql.decode())
+            return super().execute(sql, params)
+
+    create = Lakebase._create_connection
+
+    def create_counting(self):
+        conn = create(self)
+        conn.cursor_factory = CountingCursor
+        return conn
+
+    monkeypatch.setattr(Lakebase, "_create_connection", create_counting)
+    return statements
+
+
+class StubServer:
+    """
+    Local HTTP/1.1 server standing in for a Databricks endpoint.
+
+    routes maps (method, path) to a function (handler, body) that writes the
+    response; requests records (method, path, headers, body) and connections
+    counts accepted TCP connections, so tests can check keep-alive reuse.
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], Callable[[BaseHTTPRequestHandler, bytes], None]] = {}
+        self.requests: List[Tuple[str, str, Dict[str, str], bytes]] = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with stub._lock:
+                    stub.requests.append(("POST", self.path, dict(self.headers), body))
+                route = stub.routes.get(("POST", self.path))
+                if route is None:
+                    self.send_error(404)
+                    return
+                route(self, body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def send_json(handler: BaseHTTPRequestHandler, payload: Any, status: int = 200) -> None:
+    """Write a JSON response with a Content-Length, keeping the connection open."""
+    body = json.dumps(payload).encode("utf-8")
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json")
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+@pytest.fixture
+def stub_server():
+    """A StubServer on a free local port, shut down after the test."""
+    server = StubServer()
+    yield server
+    server.close()
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routers.agent as agent
+from tests.conftest import send_json
+
+EVENTS = [f"data: {json.dumps({'delta': word})}\n\n" for word in ("Calls", " are", " up")]
+
+
+@pytest.fixture
+def app(stub_server, monkeypatch):
+    monkeypatch.setenv("DATABRICKS_AGENT_ENDPOINT", f"{stub_server.url}/serving-endpoints/agent/invocations")
+    monkeypatch.setenv("DATABRICKS_TOKEN", "test-token")
+    app = FastAPI()
+    app.include_router(agent.router)
+    return app
+
+
+def _stream_events(events, gate=None):
+    """Route writing server-sent events as HTTP/1.1 chunks, optionally waiting on gate before each."""
+    def route(handler, body):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        for event in events:
+            if gate is not None:
+                gate.wait(5)
+            data = event.encode("utf-8")
+            handler.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            handler.wfile.flush()
+        handler.wfile.write(b"0\r\n\r\n")
+    return route
+
+
+def test_streamed_chat_is_relayed_chunk_by_chunk(app, stub_server):
+    stub_server.routes[("POST", "/serving-endpoints/agent/invocations")] = _stream_events(EVENTS)
+    client = TestClient(app)
+
+    chunks = []
+    for _ in range(3):
+        chunks = []
+        with client.stream("POST", "/api/agent/chat", json={"messages": [{"role": "user", "content": "Trend?"}], "stream": True}) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            chunks = [chunk for chunk in response.iter_text() if chunk]
+
+    assert "".join(chunks) == "".join(EVENTS)
+    method, path, headers, body = stub_server.requests[0]
+    assert headers["Authorization"] == "Bearer test-token"
+    assert json.loads(body) == {"input": [{"role": "user", "content": "Trend?"}], "stream": True}
+    # Every chat reused one pooled keep-alive connection
+    assert stub_server.connections == 1
+    assert agent._chat_slots._value == agent._max_concurrent
+
+
+def test_non_streamed_chat_and_upstream_errors(app, stub_server):
+    route = "/serving-endpoints/agent/invocations"
+    client = TestClient(app)
+
+    stub_server.routes[("POST", route)] = lambda handler, body: send_json(handler, {"output": "Hello"})
+    assert client.post("/api/agent/chat", json={"messages": [{"role": "user", "content": "Hi"}]}).json() == {"output": "Hello"}
+
+    stub_server.routes[("POST", route)] = lambda handler, body: send_json(handler, {"error": "overloaded"}, status=429)
+    response = client.post("/api/agent/chat", json={"messages": [{"role": "user", "content": "Hi"}]})
+    assert response.status_code == 429
+    assert "overloaded" in response.json()["detail"]
+
+    assert agent._chat_slots._value == agent._max_concurrent
+
+
+def test_chats_beyond_the_cap_get_503(app, stub_server, monkeypatch):
+    monkeypatch.setattr(agent, "_chat_slots", asyncio.Semaphore(2))
+    gate = threading.Event()
+    stub_server.routes[("POST", "/serving-endpoints/agent/invocations")] = _stream_events(EVENTS, gate)
+    request = {"messages": [{"role": "user", "content": "Hi"}], "stream": True}
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            first = asyncio.ensure_future(client.post("/api/agent/chat", json=request))
+            second = asyncio.ensure_future(client.post("/api/agent/chat", json=request))
+            while agent._chat_slots._value > 0:
+                await asyncio.sleep(0.01)
+
+            rejected = await client.post("/api/agent/chat", json=request)
+
+            gate.set()
+            relayed = await asyncio.gather(first, second)
+            after = await client.post("/api/agent/chat", json=request)
+            return rejected, relayed, after
+
+    rejected, relayed, after = asyncio.run(scenario())
+
+    assert rejected.status_code == 503
+    assert rejected.headers["retry-after"] == "1"
+    assert [response.text for response in relayed] == ["".join(EVENTS)] * 2
+    assert after.status_code == 200
+    assert agent._chat_slots._value == 2
+
+
+@pytest.mark.parametrize("spec_version", ["2.0", "2.4"])
+def test_client_gone_before_the_first_chunk_releases_the_slot(app, stub_server, spec_version):
+    gate = threading.Event()
+    stub_server.routes[("POST", "/serving-endpoints/agent/invocations")] = _stream_events(EVENTS, gate)
+    body = json.dumps({"messages": [{"role": "user", "content": "Hi"}], "stream": True}).encode("utf-8")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": spec_version}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/api/agent/chat", "raw_path": b"/api/agent/chat",
+        "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        # The client disconnects as soon as the request has been read
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if spec_version == "2.4":
+            raise OSError("connection reset by peer")
+
+    async def scenario():
+        try:
+            await app(scope, receive, send)
+        except Exception:
+            pass
+
+    asyncio.run(scenario())
+    gate.set()
+
+    assert agent._chat_slots._value == agent._max_concurrent
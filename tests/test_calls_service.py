@@ -0,0 +1,71 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers.calls import router, TRANSCRIPT_CHUNK_SIZE
+from services.calls_service import list_calls
+from tests.conftest import make_call, record_statements
+
+
+def test_listing_costs_one_query_however_many_calls_match(database, monkeypatch):
+    statements = record_statements(monkeypatch)
+    for calls in (1, 10, 100):
+        database.execute("TRUNCATE telco_call_center_analytics.call_center_scores_sync")
+        database.execute("TRUNCATE telco_call_center_analytics.human_evaluations")
+        database.insert_calls(*[make_call(f"c{i}", total_score=30 + i % 20) for i in range(calls)])
+        for i in range(0, calls, 2):
+            database.insert_evaluation(f"c{i}", 55)
+
+        statements.clear()
+        rows = asyncio.run(list_calls(call_center_rep_id="rep-1", limit=calls + 1, after=None))
+
+        assert len(rows) == calls
+        assert sum(1 for row in rows if row[6]) == (calls + 1) // 2
+        assert all(row[4] == 55 for row in rows if row[6])
+        # One PREPARE on the fresh connection plus one EXECUTE, never a lookup per call
+        assert [sql.split()[0] for sql in statements] in (["PREPARE", "EXECUTE"], ["EXECUTE"])
+
+
+def test_transcript_is_read_once_and_streamed_in_chunks(database, monkeypatch):
+    transcript = "".join(f"Agent: line {i} of a long call\n" for i in range(12000))
+    assert len(transcript) > 4 * TRANSCRIPT_CHUNK_SIZE
+    database.insert_calls(make_call("long", transcript=transcript))
+    statements = record_statements(monkeypatch)
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    with client.stream("GET", "/api/calls/long/transcript") as response:
+        assert response.status_code == 200
+        chunks = list(response.iter_text())
+
+    assert "".join(chunks) == transcript
+    assert [sql.split()[0] for sql in statements] == ["PREPARE", "EXECUTE"]
+    assert client.get("/api/calls/missing/transcript").status_code == 404
+
+
+def test_batch_costs_two_queries_however_many_calls_are_requested(database, monkeypatch):
+    statements = record_statements(monkeypatch)
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    for calls in (2, 10, 50):
+        database.execute("TRUNCATE telco_call_center_analytics.call_center_scores_sync")
+        database.execute("TRUNCATE telco_call_center_analytics.human_evaluations")
+        database.insert_calls(*[make_call(f"c{i}", total_score=30) for i in range(calls)])
+        for i in range(0, calls, 2):
+            database.insert_evaluation(f"c{i}", 55)
+        call_ids = [f"c{i}" for i in reversed(range(calls))] + ["missing"]
+
+        statements.clear()
+        response = client.post("/api/calls/batch", json={"call_ids": call_ids})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert [call["call_id"] for call in body["calls"]] == call_ids[:-1]
+        assert body["missing"] == ["missing"]
+        assert [call["total_score"] for call in body["calls"]][-2:] == [30, 55]
+        # One query for the calls and one for their evaluations, plus PREPAREs on new connections
+        assert sum(1 for sql in statements if sql.startswith("EXECUTE")) == 2
+        assert {sql.split()[0] for sql in statements} <= {"PREPARE", "EXECUTE"}
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.calls_service import _list_calls_query
+from services.columnar_index import ColumnarCallIndex, columnar_list_calls, verify_against_sql
+from services.data_version_service import get_data_watermark
+from services.rep_stats_service import ensure_rep_stats_table
+from tests.conftest import make_call
+
+WATERMARK = ("2024-05-01 00:00:00", "2024-05-01 09:00:00", 3, 120)
+
+
+@pytest.fixture
+def columnar_enabled(monkeypatch):
+    monkeypatch.setenv("CALLS_COLUMNAR_INDEX", "on")
+
+
+def _refresh_kind(monkeypatch, index: ColumnarCallIndex, watermark) -> str:
+    """Run a refresh to watermark and report whether it was a full load or an override reload."""
+    calls = []
+    monkeypatch.setattr(index, "load", lambda watermark: calls.append("full"))
+    monkeypatch.setattr(index, "load_overrides", lambda watermark: calls.append("overrides"))
+    index._refresh(watermark)
+    return calls[0]
+
+
+def test_full_reload_only_when_the_sync_marker_moves(monkeypatch, columnar_enabled):
+    index = ColumnarCallIndex()
+    index.load_rows([("c1", "m1", "2024-05-01", "10:00:00", 40, "rep-1")], [], WATERMARK)
+
+    # Saving an evaluation bumps the rep stats timestamp and the evaluation columns
+    evaluation_saved = ("2024-05-02 00:00:00", "2024-05-02 09:00:00", 4, 120)
+    assert _refresh_kind(monkeypatch, index, evaluation_saved) == "overrides"
+
+    synced = ("2024-05-01 00:00:00", "2024-05-01 09:00:00", 3, 240)
+    assert _refresh_kind(monkeypatch, index, synced) == "full"
+
+    # Labels from snapshots written before the sync marker existed
+    index._watermark = WATERMARK[:3]
+    assert _refresh_kind(monkeypatch, index, WATERMARK) == "full"
+
+
+CASES = [
+    {},
+    {"limit": 3},
+    {"min_score": 40},
+    {"member_id": "member-2"},
+    {"member_id": "unknown"},
+    {"call_center_rep_id": "rep-1", "limit": 2},
+    {"call_center_rep_id": "rep-2", "min_score": 30},
+    {"start_date": "2024-05-02"},
+    {"end_date": "2024-05-02"},
+    {"start_date": "2024-05-02", "end_date": "2024-05-02"},
+    {"limit": 2, "after": ("2024-05-02", "11:00:00", "c3")},
+    {"call_center_rep_id": "rep-1", "after": ("2024-05-02", "09:00:00", "c2")},
+]
+
+
+def test_columnar_listing_matches_sql(database, columnar_enabled):
+    database.insert_calls(
+        make_call("c1", rep_id="rep-1", call_date="2024-05-01", call_time="09:00:00", total_score=45),
+        make_call("c2", rep_id="rep-1", member_id="member-2", call_date="2024-05-02", call_time="09:00:00", total_score=30),
+        make_call("c3", rep_id="rep-2", call_date="2024-05-02", call_time="11:00:00", total_score=50),
+        make_call("c4", rep_id="rep-2", call_date="2024-05-02", call_time="11:00:00", total_score=20),
+        make_call("c5", rep_id="rep-1", member_id="member-2", call_date="2024-05-03", call_time=None, total_score=41),
+        make_call("c6", rep_id=None, call_date=None, call_time=None, total_score=38),
+    )
+    database.execute("UPDATE public.telco_call_center_analytics.call_center_scores_sync SET total_score = NULL WHERE call_id = 'c4'")
+    database.insert_evaluation("c2", 55)
+    database.insert_evaluation("c3", None)
+    asyncio.run(ensure_rep_stats_table())
+
+    index = ColumnarCallIndex()
+    index.load(asyncio.run(get_data_watermark()))
+
+    async def sql_rows(case):
+        statement, params = _list_calls_query(
+            case.get("member_id"), case.get("min_score"), case.get("start_date"), case.get("end_date"),
+            case.get("call_center_rep_id"), case.get("limit"), case.get("after")
+        )
+        return [tuple(row) for row in await statement.fetch(*params)]
+
+    for case in CASES:
+        expected = asyncio.run(sql_rows(case))
+        actual = asyncio.run(columnar_list_calls(**case))
+        assert actual == expected, case
+
+    assert asyncio.run(verify_against_sql())["mismatches"] == []
@@ -0,0 +1,153 @@
+import asyncio
+
+from fastapi import FastAPI
+from psycopg2.errors import UndefinedTable
+from fastapi.testclient import TestClient
+
+from routers.calls import router
+from services.data_version_service import get_data_watermark, get_data_version
+from services.rep_stats_service import ensure_rep_stats_table
+from services.result_cache import ResultCache
+from tests.conftest import SCHEMA, make_call
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def _watermark_handler(state):
+    """Fake database whose watermark query returns state["watermark"]."""
+    def handler(sql, params):
+        if "pg_stat_user_tables" in sql:
+            state["watermark_reads"] += 1
+            return [state["watermark"]]
+        if "call_center_scores_sync" in sql:
+            state["data_reads"] += 1
+        return []
+    return handler
+
+
+def test_matching_if_none_match_returns_304_without_a_data_query(fake_db):
+    state = {"watermark": ("2024-05-01 00:00:00", None, 0, 120), "watermark_reads": 0, "data_reads": 0}
+    fake_db.handler = _watermark_handler(state)
+    client = _client()
+
+    first = client.get("/api/calls", params={"call_center_rep_id": "rep-1"})
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "no-cache"
+    assert state["data_reads"] == 1
+
+    for header in (etag, f'"other", {etag}', "*"):
+        response = client.get("/api/calls", params={"call_center_rep_id": "rep-1"}, headers={"If-None-Match": header})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+    # The data version is cached, so revalidating costs no round trip at all
+    assert (state["watermark_reads"], state["data_reads"]) == (1, 1)
+
+    other_url = client.get("/api/calls", params={"call_center_rep_id": "rep-2"}, headers={"If-None-Match": etag})
+    assert other_url.status_code == 200
+    assert other_url.headers["etag"] != etag
+
+
+def test_sync_rewrite_changes_the_etag(fake_db):
+    state = {"watermark": ("2024-05-01 00:00:00", None, 0, 120), "watermark_reads": 0, "data_reads": 0}
+    fake_db.handler = _watermark_handler(state)
+    client = _client()
+    etag = client.get("/api/calls").headers["etag"]
+
+    # The sync rewrote rows; the rep stats refresh has not run yet
+    state["watermark"] = ("2024-05-01 00:00:00", None, 0, 240)
+    ResultCache().invalidate_tags("data_version")
+
+    response = client.get("/api/calls", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_results_cached_before_a_sync_are_not_served_under_the_new_etag(fake_db):
+    state = {"watermark": ("2024-05-01 00:00:00", None, 0, 120), "watermark_reads": 0, "data_reads": 0}
+    fake_db.handler = _watermark_handler(state)
+    client = _client()
+    etag = client.get("/api/calls").headers["etag"]
+    assert client.get("/api/calls").status_code == 200
+    assert state["data_reads"] == 1
+
+    # The sync ran and the cached data version expired; the cached listing has not
+    state["watermark"] = ("2024-05-01 00:00:00", None, 0, 240)
+    ResultCache().invalidate_tags("data_version")
+
+    response = client.get("/api/calls")
+    assert response.headers["etag"] != etag
+    assert state["data_reads"] == 2
+
+
+def test_missing_rep_stats_table_still_gives_a_version_and_is_not_cached(fake_db):
+    state = {"stats_table": False}
+
+    def handler(sql, params):
+        if "pg_stat_user_tables" in sql:
+            if "rep_score_stats" in sql and not state["stats_table"]:
+                raise UndefinedTable('relation "rep_score_stats" does not exist')
+            return [(None, None, 0, 10)]
+        return []
+
+    fake_db.handler = handler
+
+    assert asyncio.run(get_data_version()) == "None|None|0|10"
+
+    def failing(sql, params):
+        raise RuntimeError("connection refused")
+
+    ResultCache().invalidate_tags("data_version")
+    fake_db.handler = failing
+    assert asyncio.run(get_data_version()) is None
+    # The failure was not cached: the next read goes to the database again
+    fake_db.handler = handler
+    assert asyncio.run(get_data_version()) == "None|None|0|10"
+
+
+def test_unknown_data_version_sends_no_validators(fake_db):
+    def handler(sql, params):
+        if "pg_stat_user_tables" in sql:
+            raise RuntimeError("connection refused")
+        return []
+
+    fake_db.handler = handler
+
+    response = _client().get("/api/calls", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+
+
+def test_version_is_known_before_the_first_stats_refresh(database):
+    database.insert_calls(make_call("c1"))
+
+    assert asyncio.run(get_data_version()) is not None
+
+
+def test_sync_marker_moves_on_sync_table_writes(database):
+    database.insert_calls(make_call("c1"), make_call("c2"))
+    asyncio.run(ensure_rep_stats_table())
+
+    def read_version():
+        ResultCache().invalidate_tags("data_version")
+        return asyncio.run(get_data_version())
+
+    def flush_and_read_version():
+        # Counters are published when the writing backend goes idle; force that instead of waiting
+        database.execute("SELECT pg_stat_force_next_flush()")
+        return read_version()
+
+    before = flush_and_read_version()
+    assert asyncio.run(get_data_watermark())[3] is not None
+
+    # A rewrite with identical values keeps every count and date the same
+    database.execute(f"UPDATE public.{SCHEMA}.call_center_scores_sync SET total_score = total_score")
+    after = flush_and_read_version()
+
+    assert after != before
+    assert read_version() == after
@@ -0,0 +1,188 @@
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+
+from services.evaluation_import import parse_import, MAX_IMPORT_ROWS
+from services.human_evaluations_service import import_human_evaluations, ensure_human_evaluations_table
+from services.rep_stats_service import ensure_rep_stats_table, SCORECARD_CRITERIA
+from services.rep_trend_service import ensure_rep_rollups_table
+from services.result_cache import ResultCache
+from tests.conftest import SCHEMA, make_call
+
+FULL_SCORES = {
+    "recording_disclosure": 8,
+    "member_authentication": 9,
+    "call_closing": 7,
+    "professionalism": 9,
+    "program_information": 8,
+    "demeanor": 9,
+}
+
+CALL_CLOSING_OVERRIDE = {"criteria_1": {"technical_aspects": {"call_closing": {"score": 5}}}}
+
+
+def _csv(header, *rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _jsonl(*rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows) + "\n"
+
+
+def test_csv_criterion_columns_fill_in_missing_total():
+    body = _csv(
+        ["call_id", "evaluator_name", *SCORECARD_CRITERIA, "total_score_override"],
+        ["c1", "Ana", *[FULL_SCORES[name] for name in SCORECARD_CRITERIA], ""],
+    )
+
+    records, errors = parse_import(body, "csv")
+
+    assert errors == []
+    assert len(records) == 1
+    record = records[0]
+    assert (record.row_number, record.call_id, record.evaluator_name) == (2, "c1", "Ana")
+    assert record.total_score_override == sum(FULL_SCORES.values())
+    assert record.scorecard_overrides["criteria_2"]["quality_of_service"]["demeanor"] == {"score": 9}
+
+
+def test_csv_overrides_column_and_default_evaluator():
+    body = _csv(
+        ["call_id", "scorecard_overrides", "total_score_override", "feedback_text"],
+        ["c1", json.dumps(CALL_CLOSING_OVERRIDE), "41", "Closed well"],
+    )
+
+    records, errors = parse_import(body, "csv", default_evaluator="Batch QA")
+
+    assert errors == []
+    assert records[0].evaluator_name == "Batch QA"
+    assert records[0].scorecard_overrides == CALL_CLOSING_OVERRIDE
+    assert records[0].total_score_override == 41
+    assert records[0].feedback_text == "Closed well"
+
+
+def test_invalid_rows_are_reported_with_row_numbers():
+    body = _jsonl(
+        {"call_id": "ok", "evaluator_name": "Ana", "scorecard_overrides": CALL_CLOSING_OVERRIDE, "total_score_override": 40},
+        "not json",
+        {"call_id": "no-evaluator", "scorecard_overrides": {}, "total_score_override": 40},
+        {"call_id": "bad-shape", "evaluator_name": "Ana", "scorecard_overrides": {"foo": 1}, "total_score_override": 40},
+        {"call_id": "too-high", "evaluator_name": "Ana", "scorecard_overrides": {"criteria_1": {"technical_aspects": {"call_closing": {"score": 11}}}}, "total_score_override": 40},
+        {"call_id": "bad-total", "evaluator_name": "Ana", "scorecard_overrides": {}, "total_score_override": 61},
+        {"call_id": "no-total", "evaluator_name": "Ana", "scorecard_overrides": CALL_CLOSING_OVERRIDE},
+        {"call_id": "ok", "evaluator_name": "Bo", "scorecard_overrides": {}, "total_score_override": 30},
+        [1, 2],
+    )
+
+    records, errors = parse_import(body, "jsonl")
+
+    assert [record.call_id for record in records] == ["ok"]
+    assert [(error["row"], error["call_id"]) for error in errors] == [
+        (2, None), (3, "no-evaluator"), (4, "bad-shape"), (5, "too-high"),
+        (6, "bad-total"), (7, "no-total"), (8, "ok"), (9, None),
+    ]
+    assert "invalid JSON" in errors[0]["error"]
+    assert "evaluator_name" in errors[1]["error"]
+    assert "criterion scores" in errors[2]["error"]
+    assert "call_closing" in errors[3]["error"]
+    assert "total_score_override" in errors[4]["error"]
+    assert "required" in errors[5]["error"]
+    assert "duplicate" in errors[6]["error"]
+
+
+def test_rejects_unknown_format_bad_header_and_oversized_batches():
+    with pytest.raises(ValueError):
+        parse_import("", "xml")
+    with pytest.raises(ValueError):
+        parse_import("evaluator_name,total_score_override\nAna,40\n", "csv")
+    with pytest.raises(ValueError):
+        parse_import("{}\n" * (MAX_IMPORT_ROWS + 1), "jsonl")
+
+
+def test_import_copies_rows_and_upserts_once(fake_db):
+    body = _jsonl(
+        {"call_id": "c1", "evaluator_name": "Ana", "scorecard_overrides": CALL_CLOSING_OVERRIDE, "total_score_override": 40},
+        {"call_id": "c2", "evaluator_name": "Ana", "scorecard_overrides": {}, "total_score_override": 35, "feedback_text": ""},
+        {"call_id": "missing", "evaluator_name": "Ana", "scorecard_overrides": {}, "total_score_override": 20},
+    )
+    records, _ = parse_import(body, "jsonl")
+
+    def handler(sql, params):
+        if "FROM evaluation_import i" in sql and "LEFT JOIN upserted" in sql:
+            return [(1, "c1", True), (2, "c2", False), (3, "missing", None)]
+        if sql.startswith("EXECUTE refresh_rep_stats_for_calls"):
+            return [("rep-1", 2, 37.5, 35, 40, {}, {})]
+        return []
+
+    fake_db.handler = handler
+    ResultCache().set("cached-call", "stale", "call", ["call:c1"])
+
+    result = asyncio.run(import_human_evaluations(records))
+
+    assert result["imported"] == 2
+    assert (result["inserted"], result["updated"]) == (1, 1)
+    assert result["errors"] == [{"row": 3, "call_id": "missing", "error": "call_id not found"}]
+
+    copies = fake_db.executed("COPY evaluation_import FROM STDIN")
+    assert len(copies) == 1
+    staged = list(csv.reader(io.StringIO(copies[0][1])))
+    assert [row[1] for row in staged] == ["c1", "c2", "missing"]
+    assert json.loads(staged[0][3]) == CALL_CLOSING_OVERRIDE
+    assert len(fake_db.executed("INSERT INTO public.telco_call_center_analytics.human_evaluations")) == 1
+    # Derived stats are refreshed once for the whole batch
+    assert len(fake_db.executed("refresh_rep_stats_for_calls")) == 2  # PREPARE + EXECUTE
+    assert ResultCache().get("cached-call", "call") == (False, None)
+
+
+def test_ensure_human_evaluations_table_creates_the_table(database):
+    database.execute(f"DROP TABLE public.{SCHEMA}.human_evaluations")
+
+    rows = asyncio.run(ensure_human_evaluations_table())
+
+    assert rows == [(f"{SCHEMA}.human_evaluations",)]
+    assert asyncio.run(ensure_human_evaluations_table()) == rows
+
+
+def test_import_upserts_against_postgres(database):
+    database.insert_calls(
+        make_call("c1", rep_id="rep-1", scores=FULL_SCORES),
+        make_call("c2", rep_id="rep-1", scores=FULL_SCORES),
+        make_call("c3", rep_id="rep-2", scores=FULL_SCORES),
+    )
+    database.insert_evaluation("c2", 10, evaluator_name="Old")
+    asyncio.run(ensure_rep_stats_table())
+    asyncio.run(ensure_rep_rollups_table())
+
+    body = _csv(
+        ["call_id", "evaluator_name", "call_closing", "total_score_override", "feedback_text"],
+        ["c1", "Ana", "5", "40", ""],
+        ["c2", "Ana", "", "30", "Re-scored, \"calibration\""],
+        ["unknown", "Ana", "", "30", ""],
+        ["c3", "Ana", "12", "30", ""],
+    )
+    records, errors = parse_import(body, "csv")
+    result = asyncio.run(import_human_evaluations(records))
+
+    assert [error["row"] for error in errors] == [5]
+    assert (result["imported"], result["inserted"], result["updated"]) == (2, 1, 1)
+    assert result["errors"] == [{"row": 4, "call_id": "unknown", "error": "call_id not found"}]
+
+    saved = database.execute(f"""
+        SELECT call_id, evaluator_name, total_score_override, feedback_text, scorecard_overrides
+        FROM public.{SCHEMA}.human_evaluations ORDER BY call_id
+    """)
+    assert saved == [
+        ("c1", "Ana", 40, "", {"criteria_1": {"technical_aspects": {"call_closing": {"score": 5}}}}),
+        ("c2", "Ana", 30, 'Re-scored, "calibration"', {}),
+    ]
+
+    stats = database.execute(f"SELECT rep_id, total_calls, avg_score FROM public.{SCHEMA}.rep_score_stats")
+    assert [(rep_id, calls, float(avg)) for rep_id, calls, avg in stats] == [("rep-1", 2, 35.0)]
+    rollups = database.execute(f"SELECT rep_id, call_count, score_sum FROM public.{SCHEMA}.rep_daily_rollups")
+    assert [(rep_id, calls, int(total)) for rep_id, calls, total in rollups] == [("rep-1", 2, 70)]
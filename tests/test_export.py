@@ -0,0 +1,49 @@
+import asyncio
+import tracemalloc
+
+from routers.calls import _export_csv, _export_ndjson
+from services.calls_service import stream_calls
+from tests.conftest import SCHEMA
+
+
+def _insert_calls(database, count):
+    database.execute(f"TRUNCATE public.{SCHEMA}.call_center_scores_sync")
+    database.execute(f"""
+        INSERT INTO public.{SCHEMA}.call_center_scores_sync
+            (call_id, member_id, rep_id, call_date, call_time, total_score, transcript)
+        SELECT 'call-' || lpad(i::text, 6, '0'), 'member-' || i, 'rep-' || (i %% 7),
+               '2024-05-' || lpad((1 + i %% 28)::text, 2, '0'), '10:00:00', 30 + i %% 20,
+               'transcript ' || i
+        FROM generate_series(1, %s) AS i
+    """, (count,))
+
+
+def _export_peak(encode):
+    """Export every call, returning (bytes written, peak traced memory during the export)."""
+    async def drain():
+        size = 0
+        async for chunk in encode(stream_calls()):
+            size += len(chunk)
+        return size
+
+    tracemalloc.start()
+    try:
+        size = asyncio.run(drain())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size, peak
+
+
+def test_export_memory_does_not_grow_with_the_number_of_calls(database, monkeypatch):
+    monkeypatch.setenv("LAKEBASE_STREAM_FETCH_SIZE", "200")
+    for encode in (_export_ndjson, _export_csv):
+        _insert_calls(database, 2000)
+        small_size, small_peak = _export_peak(encode)
+        _insert_calls(database, 16000)
+        large_size, large_peak = _export_peak(encode)
+
+        assert large_size > 7 * small_size
+        # Memory is bounded by one batch of 200 rows: eight times the rows, about the
+        # same peak (fetching everything at once peaks around 40x higher here)
+        assert large_peak < 2 * small_peak
@@ -0,0 +1,76 @@
+import asyncio
+
+from services.calls_service import list_calls, _list_calls_query
+from services.index_advisor import advise, apply_index_migrations, get_existing_indexes, plan_index_migrations, _explain
+from services.lakebase import Lakebase, _positional_placeholders
+from tests.conftest import make_call, _close_lakebase
+
+
+def _index_conditions(plan) -> list:
+    """(index name, index condition) of every index scan in a plan."""
+    found = []
+    if "Index Name" in plan:
+        found.append((plan["Index Name"], plan.get("Index Cond", "")))
+    for child in plan.get("Plans", []):
+        found.extend(_index_conditions(child))
+    return found
+
+
+def _insert_sample_calls(database) -> None:
+    database.insert_calls(*[
+        make_call(f"c{i}", rep_id=f"rep-{i % 3}", member_id=f"member-{i % 5}", call_date=f"2024-05-{i % 28 + 1:02d}")
+        for i in range(60)
+    ], make_call("undated", call_date=None))
+
+
+def test_advisor_reports_custom_and_generic_plans(database):
+    _insert_sample_calls(database)
+
+    report = advise()
+
+    assert {migration["index"] for migration in report["migrations"]} == {
+        "idx_scores_sync_recent", "idx_scores_sync_rep_recent", "idx_scores_sync_member_recent",
+    }
+    shapes = {shape["shape"]: shape for shape in report["query_shapes"]}
+    assert "list_calls (date range)" in shapes
+    for shape in shapes.values():
+        assert shape["custom_plan"]["total_cost"] is not None
+        assert shape["generic_plan"]["total_cost"] is not None
+
+
+def test_date_bounds_use_the_listing_index(database, monkeypatch):
+    _insert_sample_calls(database)
+    assert sorted(apply_index_migrations()) == [
+        "idx_scores_sync_member_recent", "idx_scores_sync_recent", "idx_scores_sync_rep_recent",
+    ]
+    assert plan_index_migrations(get_existing_indexes()) == []
+
+    # Make the tiny fixture table plan like a large one, on fresh pool connections
+    monkeypatch.setenv("PGOPTIONS", "-c enable_seqscan=off")
+    _close_lakebase()
+    Lakebase._instance = None
+
+    statement, params = _list_calls_query(None, None, "2024-05-03", "2024-05-04", None, 50, None)
+    for plan in (
+        _explain(f"EXPLAIN (FORMAT JSON) {statement.sql}", params),
+        _explain(f"EXPLAIN (GENERIC_PLAN, FORMAT JSON) {_positional_placeholders(statement.sql)}"),
+    ):
+        conditions = dict(_index_conditions(plan))
+        assert "idx_scores_sync_recent" in conditions
+
+    # The custom plan turns the date bounds into an index range
+    custom = dict(_index_conditions(_explain(f"EXPLAIN (FORMAT JSON) {statement.sql}", params)))
+    assert "call_date" in custom["idx_scores_sync_recent"]
+
+    report = {shape["shape"]: shape for shape in advise()["query_shapes"]}
+    assert "call_center_scores_sync" not in report["list_calls (date range)"]["generic_plan"]["seq_scans"]
+
+
+def test_date_bounds_keep_null_semantics(database):
+    _insert_sample_calls(database)
+
+    rows = asyncio.run(list_calls(start_date="2024-05-27", end_date="2024-05-28"))
+    assert {row[2] for row in rows} == {"2024-05-27", "2024-05-28"}
+    assert "undated" not in {row[0] for row in asyncio.run(list_calls(end_date="2024-05-28"))}
+    assert "undated" not in {row[0] for row in asyncio.run(list_calls(start_date="2024-05-01"))}
+    assert "undated" in {row[0] for row in asyncio.run(list_calls())}
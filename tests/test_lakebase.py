@@ -0,0 +1,317 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import psycopg2
+import pytest
+from fastapi import FastAPI
+
+from routers.calls import router
+from services.calls_service import _list_calls_query
+from services.lakebase import Lakebase, LakebasePoolTimeout
+from services.result_cache import ResultCache, cached
+from tests.conftest import SCHEMA, make_call, record_statements
+
+
+async def _wait_for(condition, timeout: float = 5.0) -> None:
+    """Yield to the event loop until condition() holds."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def test_identical_selects_in_flight_share_one_round_trip(fake_db):
+    release = threading.Event()
+
+    def handler(sql, params):
+        release.wait(5)
+        return [(1,)]
+
+    fake_db.handler = handler
+
+    async def scenario():
+        tasks = [asyncio.ensure_future(Lakebase().aquery("SELECT 1")) for _ in range(5)]
+        await _wait_for(lambda: len(fake_db.statements) == 1)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(scenario())
+
+    assert results == [[(1,)]] * 5
+    assert len(fake_db.executed("SELECT 1")) == 1
+    assert Lakebase().pool_stats()["coalesced_queries"] == 4
+
+
+def test_writes_are_never_coalesced(fake_db):
+    async def scenario():
+        await asyncio.gather(*(Lakebase().aquery("DELETE FROM t WHERE id = 1") for _ in range(3)))
+
+    asyncio.run(scenario())
+
+    assert len(fake_db.executed("DELETE FROM t")) == 3
+
+
+def test_reads_started_before_an_invalidation_are_not_joined(fake_db):
+    """A read issued after a write must not share (and cache) rows read before it."""
+    state = {"version": "before write", "calls": 0}
+    release = threading.Event()
+
+    def handler(sql, params):
+        state["calls"] += 1
+        version = state["version"]
+        if state["calls"] == 1:
+            release.wait(5)
+        return [(version,)]
+
+    fake_db.handler = handler
+
+    @cached("call", tags=lambda rows: ["call:c1"])
+    async def read_call():
+        return await Lakebase().aquery("SELECT version FROM calls WHERE call_id = 'c1'")
+
+    async def scenario():
+        before = asyncio.ensure_future(read_call())
+        await _wait_for(lambda: state["calls"] == 1)
+
+        # A write commits and invalidates while the first read is still running
+        state["version"] = "after write"
+        ResultCache().invalidate_tags("call:c1")
+
+        after = await read_call()
+        release.set()
+        return await before, after, await read_call()
+
+    before, after, cached_read = asyncio.run(scenario())
+
+    assert before == [("before write",)]
+    assert after == [("after write",)]
+    assert cached_read == [("after write",)]
+    assert state["calls"] == 2
+
+
+def test_sequential_queries_reuse_one_connection(fake_db):
+    for _ in range(5):
+        Lakebase().query("SELECT 1")
+
+    stats = Lakebase().pool_stats()
+    assert len(fake_db.connections) == 1
+    assert (stats["size"], stats["idle"], stats["in_use"], stats["checkouts"]) == (1, 1, 0, 5)
+
+
+def test_concurrent_queries_never_open_more_than_max_size(fake_db, monkeypatch):
+    monkeypatch.setenv("LAKEBASE_POOL_MAX_SIZE", "3")
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def handler(sql, params):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        return [(1,)]
+
+    fake_db.handler = handler
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(pool.map(lambda _: Lakebase().query("SELECT 1"), range(20)))
+
+    assert results == [[(1,)]] * 20
+    assert len(fake_db.connections) <= 3
+    assert active["peak"] <= 3
+    assert Lakebase().pool_stats()["in_use"] == 0
+
+
+def test_checkout_times_out_when_the_pool_is_exhausted(fake_db, monkeypatch):
+    monkeypatch.setenv("LAKEBASE_POOL_MAX_SIZE", "1")
+    monkeypatch.setenv("LAKEBASE_POOL_TIMEOUT", "0.05")
+    lakebase = Lakebase()
+
+    with lakebase._connection():
+        with pytest.raises(LakebasePoolTimeout):
+            lakebase.query("SELECT 1")
+
+    assert lakebase.query("SELECT 1") == []
+
+
+def test_failed_statements_are_rolled_back_before_reuse(fake_db):
+    def handler(sql, params):
+        if "broken" in sql:
+            raise psycopg2.errors.SyntaxError("syntax error")
+        return [(1,)]
+
+    fake_db.handler = handler
+
+    with pytest.raises(psycopg2.errors.SyntaxError):
+        Lakebase().query("UPDATE broken SET x = 1")
+
+    conn = fake_db.connections[0]
+    assert conn.rollbacks == 1
+    assert Lakebase().query("SELECT 1") == [(1,)]
+    assert len(fake_db.connections) == 1
+
+
+def test_closed_connections_are_replaced(fake_db):
+    Lakebase().query("SELECT 1")
+    fake_db.connections[0].closed = 1
+
+    Lakebase().query("SELECT 1")
+
+    stats = Lakebase().pool_stats()
+    assert len(fake_db.connections) == 2
+    assert (stats["size"], stats["discarded"]) == (1, 1)
+
+
+def _slow_handler(delay: float, active: dict, lock: threading.Lock, rows=((1,),)):
+    """Handler that takes delay seconds per statement and tracks the peak concurrency."""
+    def handler(sql, params):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(delay)
+        with lock:
+            active["now"] -= 1
+        return list(rows)
+    return handler
+
+
+def test_aquery_keeps_the_event_loop_responsive(fake_db):
+    active = {"now": 0, "peak": 0}
+    fake_db.handler = _slow_handler(0.05, active, threading.Lock())
+
+    async def scenario():
+        gaps = []
+        done = asyncio.Event()
+
+        async def ticker():
+            last = time.monotonic()
+            while not done.is_set():
+                await asyncio.sleep(0.005)
+                now = time.monotonic()
+                gaps.append(now - last)
+                last = now
+
+        ticking = asyncio.ensure_future(ticker())
+        await asyncio.gather(*(Lakebase().aquery(f"SELECT {i}") for i in range(30)))
+        done.set()
+        await ticking
+        return max(gaps)
+
+    # Queries run on the executor, so the loop keeps ticking while they wait on the database
+    assert asyncio.run(scenario()) < 0.05
+
+
+def test_aquery_applies_back_pressure(fake_db, monkeypatch):
+    monkeypatch.setenv("LAKEBASE_MAX_PENDING", "4")
+    active = {"now": 0, "peak": 0}
+    fake_db.handler = _slow_handler(0.01, active, threading.Lock())
+
+    async def scenario():
+        return await asyncio.gather(*(Lakebase().aquery(f"SELECT {i}") for i in range(40)))
+
+    assert asyncio.run(scenario()) == [[(1,)]] * 40
+    assert active["peak"] <= 4
+
+
+def test_open_streams_do_not_starve_queries_of_threads(fake_db, monkeypatch):
+    """Streams holding every connection used to leave the executor threads stuck in checkout."""
+    monkeypatch.setenv("LAKEBASE_POOL_MAX_SIZE", "2")
+    monkeypatch.setenv("LAKEBASE_POOL_TIMEOUT", "3")
+    monkeypatch.setenv("LAKEBASE_STREAM_FETCH_SIZE", "1")
+    fake_db.handler = lambda sql, params: [(1,), (2,), (3,)] if "stream" in sql else [(0,)]
+    lakebase = Lakebase()
+
+    async def drain(batches):
+        return [batch async for batch in batches]
+
+    async def paused_stream(resume):
+        batches = lakebase.astream("SELECT 'stream'")
+        first_batch = await batches.__anext__()
+        await resume.wait()
+        return [first_batch] + await drain(batches)
+
+    async def scenario():
+        first = lakebase.astream("SELECT 'stream'")
+        assert await first.__anext__() == [(1,)]
+        resume = asyncio.Event()
+        second = asyncio.ensure_future(paused_stream(resume))
+        await asyncio.sleep(0.05)
+        queries = asyncio.ensure_future(asyncio.gather(*(lakebase.aquery(f"SELECT {i}") for i in range(4))))
+        await asyncio.sleep(0.05)
+        # Two open streams on a two-connection pool must still move forward
+        rest = await asyncio.wait_for(drain(first), 1)
+        resume.set()
+        return rest, await asyncio.wait_for(second, 1), await asyncio.wait_for(queries, 1)
+
+    rest, second, queries = asyncio.run(scenario())
+
+    assert rest == [[(2,)], [(3,)]]
+    assert second == [[(1,)], [(2,)], [(3,)]]
+    assert queries == [[(0,)]] * 4
+    assert lakebase.pool_stats()["size"] <= 2
+
+
+def test_p99_latency_with_50_concurrent_clients(fake_db):
+    """50 clients hitting GET /api/calls with a 10 ms database: the pool of 10 serves them in waves."""
+    active = {"now": 0, "peak": 0}
+    fake_db.handler = _slow_handler(0.01, active, threading.Lock(), rows=())
+    app = FastAPI()
+    app.include_router(router)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            async def one_client(i):
+                started = time.monotonic()
+                response = await client.get("/api/calls", params={"member_id": f"member-{i}", "page_size": 20})
+                assert response.status_code == 200
+                return time.monotonic() - started
+
+            return sorted(await asyncio.gather(*(one_client(i) for i in range(50))))
+
+    latencies = asyncio.run(scenario())
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+
+    # 50 listings plus the shared watermark read over 10 connections is about 6 waves of 10 ms
+    assert p99 < 0.5
+    assert active["peak"] <= Lakebase().pool_stats()["max_size"]
+
+
+def test_100_identical_requests_run_each_query_once(database, monkeypatch):
+    """100 browsers opening the same CCR listing at once share one round trip per query."""
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "false")
+    database.insert_calls(*[make_call(f"c{i}", rep_id="rep-1") for i in range(20)])
+    statements = record_statements(monkeypatch)
+    app = FastAPI()
+    app.include_router(router)
+
+    # Hold every read of the calls table until all 100 requests are waiting on it
+    blocker = psycopg2.connect(os.environ["TEST_DATABASE_URL"])
+    with blocker.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE public.{SCHEMA}.call_center_scores_sync IN ACCESS EXCLUSIVE MODE")
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            requests = [
+                asyncio.ensure_future(client.get("/api/calls", params={"call_center_rep_id": "rep-1"}))
+                for _ in range(100)
+            ]
+            await _wait_for(lambda: Lakebase().pool_stats()["coalesced_queries"] >= 99)
+            blocker.rollback()
+            return await asyncio.gather(*requests)
+
+    try:
+        responses = asyncio.run(scenario())
+    finally:
+        blocker.close()
+
+    assert {response.status_code for response in responses} == {200}
+    assert all(len(response.json()["calls"]) == 20 for response in responses)
+    executed = [sql for sql in statements if not sql.startswith(("PREPARE", "SET", "BEGIN"))]
+    assert len(executed) == len(set(executed)), executed
+    listing, _ = _list_calls_query(None, None, None, None, "rep-1", None, None)
+    assert executed.count(listing.sql) == 1
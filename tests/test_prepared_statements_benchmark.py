@@ -0,0 +1,62 @@
+"""
+Planning overhead of the hot get_human_evaluation lookup, with pytest-benchmark:
+
+    python -m pytest tests/test_prepared_statements_benchmark.py --benchmark-only
+
+Both benchmarks look up the same rotating call IDs over one pooled connection.
+The literal form sends new SQL text for every ID, so Postgres parses and plans
+each lookup; the prepared form only EXECUTEs the statement planned once.
+"""
+import itertools
+
+import pytest
+
+from services.human_evaluations_service import _GET_HUMAN_EVALUATION
+from services.lakebase import Lakebase
+from tests.conftest import SCHEMA
+
+pytest.importorskip("pytest_benchmark")
+
+EVALUATIONS = 5000
+
+
+@pytest.fixture
+def evaluations(database, monkeypatch):
+    """EVALUATIONS human evaluations, read over a single pooled connection."""
+    monkeypatch.setenv("LAKEBASE_POOL_MAX_SIZE", "1")
+    database.execute(f"""
+        INSERT INTO public.{SCHEMA}.human_evaluations
+            (call_id, evaluator_name, scorecard_overrides, total_score_override, feedback_text)
+        SELECT 'call-' || i, 'QA', '{{}}'::jsonb, 40, ''
+        FROM generate_series(1, %s) AS i
+    """, (EVALUATIONS,))
+    database.execute(f"ANALYZE public.{SCHEMA}.human_evaluations")
+    return itertools.cycle([f"call-{i}" for i in range(1, EVALUATIONS + 1)])
+
+
+@pytest.mark.benchmark(group="get-human-evaluation")
+def test_literal_lookup(benchmark, evaluations):
+    lakebase = Lakebase()
+
+    def lookup():
+        # Inlined value, as the f-string queries used to send it
+        return lakebase.query(_GET_HUMAN_EVALUATION.sql.replace("%s", f"'{next(evaluations)}'"))
+
+    rows = benchmark(lookup)
+
+    assert len(rows) == 1
+
+
+@pytest.mark.benchmark(group="get-human-evaluation")
+def test_prepared_lookup(benchmark, evaluations):
+    lakebase = Lakebase()
+
+    def lookup():
+        return lakebase.query_prepared(_GET_HUMAN_EVALUATION.name, _GET_HUMAN_EVALUATION.sql, (next(evaluations),))
+
+    rows = benchmark(lookup)
+
+    assert len(rows) == 1
+    # One PREPARE for every lookup on the connection
+    statements = lakebase.query("SELECT name FROM pg_prepared_statements")
+    assert statements == [("get_human_evaluation",)]
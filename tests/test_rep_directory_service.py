@@ -0,0 +1,65 @@
+import asyncio
+
+import psycopg2
+import pytest
+from psycopg2.errors import UndefinedTable
+
+from services.rep_directory_service import get_rep_directory, search_reps
+from tests.conftest import make_call
+
+
+def _missing_directory_handler(state):
+    """Fake database where rep_directory is missing until the refresh runs."""
+    def handler(sql, params):
+        if sql.startswith("PREPARE list_rep_directory") and not state["built"]:
+            raise UndefinedTable('relation "rep_directory" does not exist')
+        if "INSERT INTO public.telco_call_center_analytics.rep_directory" in sql:
+            state["builds"] += 1
+            state["built"] = True
+            return [(2, 0)]
+        if sql.startswith("EXECUTE list_rep_directory"):
+            return [("rep-1", "Ana Diaz", 3, "2024-05-02"), ("rep-2", "Bo Lee", 1, "2024-05-01")]
+        return []
+    return handler
+
+
+def test_missing_directory_is_built_once_for_concurrent_requests(fake_db):
+    state = {"built": False, "builds": 0}
+    fake_db.handler = _missing_directory_handler(state)
+
+    async def fetch_all():
+        # Every request misses the result cache, which is only filled once a read returns
+        return await asyncio.gather(*(get_rep_directory() for _ in range(10)))
+
+    results = asyncio.run(fetch_all())
+
+    assert state["builds"] == 1
+    assert all(len(rows) == 2 for rows in results)
+
+
+def test_other_errors_are_raised_without_a_rebuild(fake_db):
+    def handler(sql, params):
+        if sql.startswith("EXECUTE list_rep_directory"):
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        return []
+
+    fake_db.handler = handler
+
+    with pytest.raises(psycopg2.OperationalError):
+        asyncio.run(get_rep_directory())
+
+    assert fake_db.executed("INSERT INTO") == []
+
+
+def test_directory_builds_on_first_use(database):
+    database.insert_calls(
+        make_call("c1", rep_id="rep-1", rep_name="Ana Diaz", call_date="2024-05-01"),
+        make_call("c2", rep_id="rep-1", rep_name="Ana Diaz", call_date="2024-05-02"),
+        make_call("c3", rep_id="rep-2", rep_name="Bo Lee", call_date="2024-05-01"),
+    )
+
+    assert asyncio.run(get_rep_directory()) == [
+        ("rep-1", "Ana Diaz", 2, "2024-05-02"),
+        ("rep-2", "Bo Lee", 1, "2024-05-01"),
+    ]
+    assert [rep[0] for rep in asyncio.run(search_reps("lee"))] == ["rep-2"]
@@ -0,0 +1,79 @@
+import asyncio
+
+from psycopg2.errors import UndefinedTable
+
+from services.calls_service import get_ccr_aggregate_stats
+from services.rep_stats_service import (
+    compute_rep_stats,
+    ensure_rep_stats_table,
+    get_rep_stats,
+    refresh_rep_stats,
+    refresh_rep_stats_for_call,
+)
+from tests.conftest import make_call
+
+TRICKY_REP = "o'brien'); DROP TABLE rep_score_stats; --"
+
+
+def test_rep_and_call_ids_are_bound_parameters(fake_db):
+    asyncio.run(get_rep_stats(TRICKY_REP))
+    asyncio.run(refresh_rep_stats(TRICKY_REP))
+    asyncio.run(refresh_rep_stats_for_call(TRICKY_REP))
+
+    for name in ("get_rep_stats", "refresh_rep_stats", "refresh_rep_stats_for_call"):
+        executions = fake_db.executed(f"EXECUTE {name} ")
+        assert [params for _, params in executions] == [(TRICKY_REP,)]
+    assert not [sql for sql, _ in fake_db.statements if "o'brien" in sql or "o''brien" in sql]
+
+
+def test_refresh_and_read_stats_against_postgres(database):
+    database.insert_calls(
+        make_call("c1", rep_id=TRICKY_REP, total_score=40),
+        make_call("c2", rep_id=TRICKY_REP, total_score=50),
+        make_call("c3", rep_id="rep-2", total_score=30),
+    )
+    asyncio.run(ensure_rep_stats_table())
+
+    stored = asyncio.run(refresh_rep_stats(TRICKY_REP))
+    assert stored[:5] == (TRICKY_REP, 2, 45, 40, 50)
+    assert stored[5] == {"40-49": 1, "50-60": 1}
+    assert asyncio.run(get_rep_stats(TRICKY_REP)) == stored
+
+    database.insert_evaluation("c1", 20)
+    refreshed = asyncio.run(refresh_rep_stats_for_call("c1"))
+    assert refreshed[:5] == (TRICKY_REP, 2, 35, 20, 50)
+
+    assert asyncio.run(get_rep_stats("rep-2")) is None
+    assert asyncio.run(refresh_rep_stats_for_call("unknown")) is None
+
+
+def test_stats_reads_never_write(fake_db):
+    def handler(sql, params):
+        if sql.startswith("PREPARE get_rep_stats"):
+            raise UndefinedTable('relation "rep_score_stats" does not exist')
+        if sql.startswith("EXECUTE compute_rep_stats"):
+            return [("rep-1", 2, 45, 40, 50, {}, {})]
+        return []
+
+    fake_db.handler = handler
+
+    assert asyncio.run(get_ccr_aggregate_stats("rep-1"))[:2] == ("rep-1", 2)
+    assert fake_db.executed("INSERT INTO") == []
+    assert all(conn.commits == 0 for conn in fake_db.connections)
+
+
+def test_unstored_reps_are_computed_read_only(database):
+    database.insert_calls(
+        make_call("c1", rep_id="rep-1", total_score=40),
+        make_call("c2", rep_id="rep-1", total_score=50),
+    )
+    database.insert_evaluation("c2", 30)
+
+    # No refresh has created rep_score_stats yet
+    computed = asyncio.run(get_ccr_aggregate_stats("rep-1"))
+    assert computed[:5] == ("rep-1", 2, 35, 30, 40)
+    assert database.execute("SELECT to_regclass('telco_call_center_analytics.rep_score_stats')") == [(None,)]
+
+    asyncio.run(ensure_rep_stats_table())
+    assert asyncio.run(compute_rep_stats("rep-1")) == asyncio.run(refresh_rep_stats("rep-1"))
+    assert asyncio.run(compute_rep_stats("unknown")) is None
@@ -0,0 +1,121 @@
+import asyncio
+
+import psycopg2
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from psycopg2.errors import UndefinedTable
+
+from routers.calls import router
+from services.rep_trend_service import RollupsNotReady, build_rep_rollups_if_missing, get_rep_trend, refresh_rep_rollups
+from tests.conftest import make_call
+
+
+def test_missing_rollups_are_reported_not_built(fake_db):
+    def handler(sql, params):
+        if sql.startswith("PREPARE get_rep_trend"):
+            raise UndefinedTable('relation "rep_daily_rollups" does not exist')
+        return []
+
+    fake_db.handler = handler
+
+    with pytest.raises(RollupsNotReady):
+        asyncio.run(get_rep_trend("rep-1"))
+
+    assert fake_db.executed("rep_daily_rollups (") == []
+    assert fake_db.executed("INSERT INTO") == []
+
+
+def test_other_errors_are_raised_without_a_rebuild(fake_db):
+    def handler(sql, params):
+        if sql.startswith("EXECUTE get_rep_trend"):
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        return []
+
+    fake_db.handler = handler
+
+    with pytest.raises(psycopg2.OperationalError):
+        asyncio.run(get_rep_trend("rep-1"))
+
+    assert fake_db.executed("INSERT INTO") == []
+
+
+def test_invalid_dates_are_rejected_before_any_query(fake_db):
+    with pytest.raises(ValueError):
+        asyncio.run(get_rep_trend("rep-1", start_date="2024-13-01"))
+
+    app = FastAPI()
+    app.include_router(router)
+    response = TestClient(app).get("/api/ccrs/rep-1/trend", params={"end_date": "yesterday"})
+
+    assert response.status_code == 400
+    assert "YYYY-MM-DD" in response.json()["detail"]
+    assert fake_db.executed("get_rep_trend") == []
+
+
+def _weekly(rep_id="rep-1"):
+    rows = asyncio.run(get_rep_trend(rep_id, "week"))
+    return [(str(row[0]), int(row[1]), float(row[3])) for row in rows]
+
+
+def test_trend_answers_503_until_the_startup_build(database):
+    database.insert_calls(
+        make_call("c1", rep_id="rep-1", call_date="2024-05-01", total_score=40),
+        make_call("c2", rep_id="rep-1", call_date="2024-05-02", total_score=50),
+        make_call("c3", rep_id="rep-1", call_date="2024-05-08", total_score=30),
+    )
+    database.insert_evaluation("c3", 20)
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    assert client.get("/api/ccrs/rep-1/trend").status_code == 503
+    assert database.execute("SELECT to_regclass('public.telco_call_center_analytics.rep_daily_rollups')") == [(None,)]
+
+    assert asyncio.run(build_rep_rollups_if_missing()) is True
+    assert asyncio.run(build_rep_rollups_if_missing()) is False
+    assert client.get("/api/ccrs/rep-1/trend").status_code == 200
+    assert _weekly() == [
+        ("2024-04-29", 2, 45.0),
+        ("2024-05-06", 1, 20.0),
+    ]
+
+
+def test_refresh_recomputes_the_days_of_changed_calls_however_old(database, monkeypatch):
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "false")
+    database.insert_calls(
+        make_call("old", rep_id="rep-1", call_date="2023-01-02", total_score=40),
+        make_call("moved", rep_id="rep-1", call_date="2023-01-03", total_score=30),
+        make_call("gone", rep_id="rep-1", call_date="2023-06-05", total_score=10),
+        make_call("new", rep_id="rep-1", call_date="2024-05-01", total_score=50),
+    )
+    asyncio.run(refresh_rep_rollups())
+    assert asyncio.run(refresh_rep_rollups()) == (0, 0)
+
+    # A sync rewrites a call from long before the latest day, moves one to another rep and drops one
+    database.execute("UPDATE public.telco_call_center_analytics.call_center_scores_sync SET total_score = 20 WHERE call_id = 'old'")
+    database.execute("UPDATE public.telco_call_center_analytics.call_center_scores_sync SET rep_id = 'rep-2' WHERE call_id = 'moved'")
+    database.execute("DELETE FROM public.telco_call_center_analytics.call_center_scores_sync WHERE call_id = 'gone'")
+
+    # rep-1 on 2023-01-02 and rep-2 on 2023-01-03 rewritten; rep-1 on 2023-01-03 and 2023-06-05 removed
+    assert asyncio.run(refresh_rep_rollups()) == (2, 2)
+
+    assert _weekly() == [("2023-01-02", 1, 20.0), ("2024-04-29", 1, 50.0)]
+    assert _weekly("rep-2") == [("2023-01-02", 1, 30.0)]
+    assert asyncio.run(refresh_rep_rollups(full=True)) == (0, 0)
+
+
+def test_calls_without_a_valid_day_are_left_out(database):
+    database.insert_calls(
+        make_call("c1", call_date="2024-02-29T10:00:00", total_score=40),
+        make_call("c2", call_date="2024-13-45", total_score=10),
+        make_call("c3", call_date="2023-02-29", total_score=10),
+        make_call("c4", call_date="0000-01-01", total_score=10),
+        make_call("c5", call_date="2024-04-31", total_score=10),
+        make_call("c6", call_date="soon", total_score=10),
+        make_call("c7", call_date=None, total_score=10),
+    )
+
+    asyncio.run(refresh_rep_rollups())
+
+    assert _weekly() == [("2024-02-26", 1, 40.0)]
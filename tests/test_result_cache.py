@@ -0,0 +1,116 @@
+import asyncio
+
+from services import result_cache
+from services.result_cache import ResultCache, CACHE_TTLS, cached
+
+
+class Clock:
+    """Replacement for time.monotonic that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(result_cache.time, "monotonic", clock)
+    return clock
+
+
+def test_entries_expire_after_their_namespace_ttl(monkeypatch):
+    clock = _clock(monkeypatch)
+    cache = ResultCache()
+    cache.set("list", ["c1"], "calls")
+    cache.set("detail", {"call_id": "c1"}, "call")
+
+    clock.now += CACHE_TTLS["calls"] + 1
+
+    assert cache.get("list", "calls") == (False, None)
+    assert cache.get("detail", "call") == (True, {"call_id": "c1"})
+    clock.now += CACHE_TTLS["call"]
+    assert cache.get("detail", "call") == (False, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted_first(monkeypatch):
+    monkeypatch.setenv("RESULT_CACHE_MAX_ENTRIES", "2")
+    cache = ResultCache()
+    cache.set("a", 1, "calls")
+    cache.set("b", 2, "calls")
+    assert cache.get("a", "calls") == (True, 1)
+
+    cache.set("c", 3, "calls")
+
+    assert cache.get("b", "calls") == (False, None)
+    assert cache.get("a", "calls") == (True, 1)
+    assert cache.get("c", "calls") == (True, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidating_a_tag_drops_only_entries_carrying_it():
+    cache = ResultCache()
+    cache.set("call-1", "one", "call", ["call:c1", "rep:rep-1"])
+    cache.set("call-2", "two", "call", ["call:c2", "rep:rep-1"])
+    cache.set("rep-2", "stats", "ccr_stats", ["rep:rep-2"])
+
+    assert cache.invalidate_tags("call:c1", "call:unknown") == 1
+    assert cache.get("call-1", "call") == (False, None)
+    assert cache.get("call-2", "call") == (True, "two")
+
+    assert cache.invalidate_tags("rep:rep-1") == 1
+    assert cache.get("call-2", "call") == (False, None)
+    assert cache.get("rep-2", "ccr_stats") == (True, "stats")
+    assert cache.invalidate_namespaces("ccr_stats") == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_result_read_before_an_invalidation_is_not_stored():
+    cache = ResultCache()
+    generation = cache.generation
+
+    cache.invalidate_tags("call:c1")
+    cache.set("call-1", "stale", "call", ["call:c1"], generation)
+    assert cache.get("call-1", "call") == (False, None)
+
+    cache.set("call-1", "fresh", "call", ["call:c1"], cache.generation)
+    assert cache.get("call-1", "call") == (True, "fresh")
+
+
+def test_cached_function_is_called_once_until_invalidated():
+    calls = []
+
+    @cached("call", tags=lambda result, call_id: [f"call:{call_id}"])
+    async def load(call_id):
+        calls.append(call_id)
+        return {"call_id": call_id, "version": len(calls)}
+
+    async def scenario():
+        first = await load("c1")
+        assert await load("c1") == first
+        ResultCache().invalidate_tags("call:c1")
+        return first, await load("c1")
+
+    first, reloaded = asyncio.run(scenario())
+
+    assert calls == ["c1", "c1"]
+    assert (first["version"], reloaded["version"]) == (1, 2)
+    assert ResultCache().stats()["namespaces"]["call"] == {"hits": 1, "misses": 2}
+
+
+def test_disabled_cache_always_calls_through(monkeypatch):
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "false")
+    calls = []
+
+    @cached("calls")
+    async def load():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        return [await load() for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [1, 2, 3]
+    assert ResultCache().stats()["entries"] == 0
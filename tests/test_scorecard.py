@@ -0,0 +1,53 @@
+import copy
+import random
+
+from services.calls_service import deep_merge_scorecards
+from services.scorecard import CRITERIA, CRITERIA_PATHS, CompactScorecard, compact_overrides, apply_compact_overrides
+from tests.conftest import scorecard, score_overrides
+
+
+def test_compact_overrides_reads_criterion_scores_in_fixed_order():
+    compact = compact_overrides(score_overrides({"demeanor": 9, "call_closing": 5}))
+
+    assert compact.to_dict() == {name: {"demeanor": 9, "call_closing": 5}.get(name) for name in CRITERIA}
+    assert compact_overrides({}).scores == (None,) * len(CRITERIA)
+
+
+def test_compact_overrides_rejects_anything_but_criterion_scores():
+    closing = score_overrides({"call_closing": 5})
+    group, section, criterion, _ = CRITERIA_PATHS[CRITERIA.index("call_closing")]
+
+    assert compact_overrides({"criteria_9": {}}) is None
+    assert compact_overrides({group: {section: {criterion: {"score": 5, "reasoning": "ok"}}}}) is None
+    assert compact_overrides({group: {section: {"unknown": {"score": 5}}}}) is None
+    assert compact_overrides({group: {section: {criterion: {"score": "5"}}}}) is None
+    assert compact_overrides({group: {section: {criterion: {"score": True}}}}) is None
+    assert compact_overrides({group: {section: {criterion: {"score": None}}}}).scores == (None,) * len(CRITERIA)
+    assert compact_overrides(closing) is not None
+
+
+def test_compact_merge_matches_deep_merge_without_mutating_the_input():
+    rng = random.Random(7)
+    for _ in range(200):
+        ai_scorecard = scorecard({name: rng.randint(0, 10) for name in CRITERIA if rng.random() < 0.8})
+        overrides = score_overrides({name: rng.randint(0, 10) for name in CRITERIA if rng.random() < 0.4})
+        original = copy.deepcopy(ai_scorecard)
+
+        merged = apply_compact_overrides(ai_scorecard, compact_overrides(overrides))
+
+        assert merged == deep_merge_scorecards(ai_scorecard, overrides)
+        assert ai_scorecard == original
+
+
+def test_compact_merge_shares_untouched_branches():
+    ai_scorecard = scorecard({name: 8 for name in CRITERIA})
+    group, section, _, _ = CRITERIA_PATHS[CRITERIA.index("call_closing")]
+    other_group = next(path[0] for path in CRITERIA_PATHS if path[0] != group)
+
+    merged = apply_compact_overrides(ai_scorecard, CompactScorecard([None] * len(CRITERIA)))
+    assert merged == ai_scorecard
+    merged = apply_compact_overrides(ai_scorecard, compact_overrides(score_overrides({"call_closing": 5})))
+
+    assert merged[other_group] is ai_scorecard[other_group]
+    assert merged[group] is not ai_scorecard[group]
+    assert merged[group][section]["call_closing"] == {"score": 5, "reasoning": "call_closing reasoning"}
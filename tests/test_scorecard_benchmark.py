@@ -0,0 +1,71 @@
+"""
+Scorecard merge throughput, with pytest-benchmark:
+
+    python -m pytest tests/test_scorecard_benchmark.py --benchmark-only
+
+Each benchmark merges the same batch of calls, so the groups compare directly.
+"""
+import random
+
+import pytest
+
+from services.calls_service import apply_human_evaluation, deep_merge_scorecards
+from services.evaluation_import import parse_import
+from services.rep_stats_service import SCORECARD_CRITERIA
+from services.scorecard import CRITERIA, compact_overrides, apply_compact_overrides
+from tests.conftest import scorecard, score_overrides
+
+pytest.importorskip("pytest_benchmark")
+
+BATCH = 2000
+
+
+def _batch():
+    rng = random.Random(11)
+    cards = [scorecard({name: rng.randint(0, 10) for name in CRITERIA}) for _ in range(BATCH)]
+    overrides = [score_overrides({name: rng.randint(0, 10) for name in rng.sample(CRITERIA, 2)}) for _ in range(BATCH)]
+    return cards, overrides
+
+
+@pytest.mark.benchmark(group="merge")
+def test_compact_merge(benchmark):
+    cards, overrides = _batch()
+    compact = [compact_overrides(override) for override in overrides]
+
+    merged = benchmark(lambda: [apply_compact_overrides(card, override) for card, override in zip(cards, compact)])
+
+    assert merged[0] == deep_merge_scorecards(cards[0], overrides[0])
+
+
+@pytest.mark.benchmark(group="merge")
+def test_deep_merge(benchmark):
+    cards, overrides = _batch()
+
+    benchmark(lambda: [deep_merge_scorecards(card, override) for card, override in zip(cards, overrides)])
+
+
+@pytest.mark.benchmark(group="apply-evaluation")
+def test_apply_cached_evaluation_rows(benchmark):
+    cards, overrides = _batch()
+    # Rows as get_human_evaluations caches them: overrides parsed, compact form appended
+    rows = [
+        (i, f"c{i}", "QA", None, override, 40, "", compact_overrides(override))
+        for i, override in enumerate(overrides)
+    ]
+
+    benchmark(lambda: [
+        apply_human_evaluation({"call_id": f"c{i}", "scorecard": card}, row)
+        for i, (card, row) in enumerate(zip(cards, rows))
+    ])
+
+
+@pytest.mark.benchmark(group="import")
+def test_import_with_criterion_columns(benchmark):
+    rng = random.Random(5)
+    lines = ["call_id,evaluator_name," + ",".join(SCORECARD_CRITERIA)]
+    lines += [f"c{i},QA," + ",".join(str(rng.randint(0, 10)) for _ in SCORECARD_CRITERIA) for i in range(BATCH)]
+    body = "\n".join(lines) + "\n"
+
+    records, errors = benchmark(parse_import, body, "csv")
+
+    assert (len(records), errors) == (BATCH, [])
@@ -0,0 +1,66 @@
+"""
+Transcript search latency over a synthetic corpus, with pytest-benchmark:
+
+    python -m pytest tests/test_search_benchmark.py --benchmark-only
+
+Every call mentions "billing", so the common-word search has as many matches
+as there are calls; the target for both searches is tens of milliseconds.
+"""
+import asyncio
+
+import pytest
+
+from services.index_advisor import apply_index_migrations
+from services.search_service import refresh_search_index, search_calls
+from tests.conftest import SCHEMA
+
+pytest.importorskip("pytest_benchmark")
+
+CORPUS = 50000
+
+# Median search time the benchmarks must stay under, in seconds
+TARGET = 0.05
+
+
+@pytest.fixture
+def corpus(database, monkeypatch):
+    """CORPUS calls with short generated transcripts, the recommended indexes and the search documents."""
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "false")
+    database.execute(f"""
+        INSERT INTO public.{SCHEMA}.call_center_scores_sync
+            (call_id, member_id, rep_id, call_date, call_time, total_score, transcript, transcript_summary)
+        SELECT 'call-' || lpad(i::text, 6, '0'), 'member-' || (i %% 5000), 'rep-' || (i %% 40),
+               '2024-' || lpad((1 + i %% 12)::text, 2, '0') || '-' || lpad((1 + i %% 28)::text, 2, '0'),
+               lpad((i %% 24)::text, 2, '0') || ':00:00', 30 + i %% 20,
+               'Agent: Thank you for calling. Member: I have a billing question about invoice ' || i
+                   || (ARRAY[' and a refund', ' and my address', ' and a late fee', ' and roaming charges'])[1 + i %% 4]
+                   || CASE WHEN i %% 1000 = 0 THEN ' after a chargeback' ELSE '' END || '.',
+               'Billing call ' || i
+        FROM generate_series(1, %s) AS i
+    """, (CORPUS,))
+    apply_index_migrations()
+    asyncio.run(refresh_search_index())
+    database.execute(f"ANALYZE public.{SCHEMA}.call_center_scores_sync")
+    database.execute(f"ANALYZE public.{SCHEMA}.call_search_documents")
+    return database
+
+
+def _search(benchmark, q, **filters):
+    rows = benchmark(lambda: asyncio.run(search_calls(q, **filters)))
+    if benchmark.stats is not None:
+        assert benchmark.stats.stats.median < TARGET
+    return rows
+
+
+@pytest.mark.benchmark(group="search")
+def test_search_common_word(benchmark, corpus):
+    rows = _search(benchmark, "billing")
+
+    assert len(rows) == 20
+
+
+@pytest.mark.benchmark(group="search")
+def test_search_rare_phrase(benchmark, corpus):
+    rows = _search(benchmark, "refund chargeback", limit=100)
+
+    assert len(rows) == CORPUS // 1000
@@ -0,0 +1,94 @@
+import asyncio
+
+import psycopg2
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from psycopg2.errors import UndefinedTable
+
+from routers.calls import router
+from services.search_service import SearchIndexNotReady, build_search_index_if_missing, refresh_search_index, search_calls
+from tests.conftest import make_call
+
+
+def test_missing_documents_are_reported_not_built(fake_db):
+    def handler(sql, params):
+        if sql.startswith("PREPARE search_calls"):
+            raise UndefinedTable('relation "call_search_documents" does not exist')
+        return []
+
+    fake_db.handler = handler
+
+    with pytest.raises(SearchIndexNotReady):
+        asyncio.run(search_calls("billing"))
+
+    assert fake_db.executed("call_search_documents (") == []
+    assert fake_db.executed("INSERT INTO") == []
+
+
+def test_other_errors_are_raised_without_a_rebuild(fake_db):
+    def handler(sql, params):
+        if sql.startswith("EXECUTE search_calls"):
+            raise psycopg2.errors.QueryCanceled("canceling statement due to statement timeout")
+        return []
+
+    fake_db.handler = handler
+
+    with pytest.raises(psycopg2.errors.QueryCanceled):
+        asyncio.run(search_calls("billing"))
+
+    assert fake_db.executed("INSERT INTO") == []
+
+
+def test_search_answers_503_until_the_startup_build(database):
+    database.insert_calls(
+        make_call("c1", transcript="Member asked about a billing dispute on the last invoice."),
+        make_call("c2", transcript="Member wanted to change the mailing address."),
+    )
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    response = client.get("/api/calls/search", params={"q": "billing"})
+    assert response.status_code == 503
+    assert database.execute("SELECT to_regclass('public.telco_call_center_analytics.call_search_documents')") == [(None,)]
+
+    assert asyncio.run(build_search_index_if_missing()) is True
+    assert asyncio.run(build_search_index_if_missing()) is False
+    response = client.get("/api/calls/search", params={"q": "billing"})
+    assert [call["call_id"] for call in response.json()["calls"]] == ["c1"]
+
+
+def test_search_filters_match_list_calls(database):
+    database.insert_calls(
+        make_call("c1", call_date="2024-05-01", transcript="Member asked about a billing dispute on the last invoice."),
+        make_call("c2", call_date="2024-05-02", transcript="Member wanted to change the mailing address."),
+        make_call("c3", rep_id="rep-2", call_date="2024-05-03", transcript="Billing question about a refund."),
+        make_call("c4", call_date=None, transcript="Billing question without a date."),
+    )
+    asyncio.run(refresh_search_index())
+
+    rows = asyncio.run(search_calls("billing"))
+    assert sorted(row[0] for row in rows) == ["c1", "c3", "c4"]
+
+    rows = asyncio.run(search_calls("billing", call_center_rep_id="rep-2"))
+    assert [row[0] for row in rows] == ["c3"]
+    rows = asyncio.run(search_calls("billing", end_date="2024-05-02"))
+    assert [row[0] for row in rows] == ["c1"]
+
+
+def test_only_the_most_recent_matches_are_ranked(database, monkeypatch):
+    monkeypatch.setenv("SEARCH_MAX_CANDIDATES", "2")
+    database.insert_calls(
+        make_call("c1", call_date="2024-05-01", transcript="Billing billing billing, all about billing."),
+        make_call("c2", call_date="2024-05-02", transcript="A billing question."),
+        make_call("c3", call_date="2024-05-03", transcript="Another billing question."),
+    )
+    asyncio.run(refresh_search_index())
+
+    rows = asyncio.run(search_calls("billing", limit=1))
+
+    # c1 matches best but is not among the two most recent matches
+    assert [row[0] for row in rows] == ["c3"]
+    # The candidates never fall below the limit
+    assert [row[0] for row in asyncio.run(search_calls("billing", limit=3))] == ["c1", "c3", "c2"]
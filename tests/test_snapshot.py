@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from services import snapshot
+from services.columnar_index import ColumnarCallIndex
+from services.data_version_service import get_data_watermark
+from services.rep_directory_service import get_rep_directory, refresh_rep_directory
+from services.rep_stats_service import ensure_rep_stats_table, refresh_all_rep_stats
+from services.result_cache import ResultCache
+from tests.conftest import SCHEMA, make_call
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def snapshot_db(database, monkeypatch, tmp_path):
+    """Postgres with calls, rep stats and the rep directory, and a snapshot written at its watermark."""
+    monkeypatch.setenv("SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setenv("CALLS_COLUMNAR_INDEX", "on")
+    database.insert_calls(
+        make_call("c1", rep_id="rep-1", call_date="2024-05-01"),
+        make_call("c2", rep_id="rep-2", call_date="2024-05-02"),
+    )
+
+    async def prepare():
+        await ensure_rep_stats_table()
+        await refresh_all_rep_stats()
+        await refresh_rep_directory()
+
+    asyncio.run(prepare())
+    database.execute("SELECT pg_stat_force_next_flush()")
+    manifest = snapshot.export_snapshot(asyncio.run(get_data_watermark()))
+    assert manifest["tables"]["calls"] == 2
+
+    # Start as a fresh process would: nothing cached, index empty
+    ResultCache._instance = None
+    ColumnarCallIndex._instance = None
+    return database
+
+
+def test_current_snapshot_primes_the_caches_and_seeds_the_index(snapshot_db):
+    assert asyncio.run(snapshot.warm_start_if_current()) is True
+
+    # The directory is served from the primed cache, without its table
+    snapshot_db.execute(f"DROP TABLE public.{SCHEMA}.rep_directory")
+    assert [row[0] for row in asyncio.run(get_rep_directory())] == ["rep-1", "rep-2"]
+    assert ColumnarCallIndex().is_current(asyncio.run(get_data_watermark()))
+    assert [row[0] for row in ColumnarCallIndex().list_calls()] == ["c2", "c1"]
+
+
+def test_stale_snapshot_is_not_primed_and_is_rewritten(snapshot_db, monkeypatch):
+    exports = []
+    monkeypatch.setattr(snapshot, "schedule_export", exports.append)
+    snapshot_db.insert_evaluation("c1", 20)
+
+    assert asyncio.run(snapshot.warm_start_if_current()) is False
+
+    assert exports == [asyncio.run(get_data_watermark())]
+    assert ResultCache().stats()["entries"] == 1  # only the data version itself
+    assert ColumnarCallIndex().list_calls() is None
@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from services.static_assets import StaticAsset, StaticAssets, etag_matches, parse_accept_encoding
+
+CSS = b"body { color: #333; }\n" * 200
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """The app serving a frontend with one stylesheet."""
+    (tmp_path / "static").mkdir()
+    (tmp_path / "static" / "app.css").write_bytes(CSS)
+    (tmp_path / "index.html").write_text('<link rel="stylesheet" href="{{ asset:app.css }}">', encoding="utf-8")
+    monkeypatch.setattr(StaticAssets, "_instance", None)
+    StaticAssets().load(str(tmp_path))
+    return TestClient(app_module.app)
+
+
+def test_accept_encoding_q_values_are_honoured():
+    asset = StaticAsset(CSS, "text/css; charset=utf-8")
+    asset.variants.pop("br", None)
+
+    assert parse_accept_encoding("gzip;q=0.5, BR, identity; q=0, x;q=oops") == {
+        "gzip": 0.5, "br": 1.0, "identity": 0.0, "x": 0.0,
+    }
+    assert asset.select("gzip") == "gzip"
+    assert asset.select("gzip;q=0") == "identity"
+    assert asset.select("gzip;q=0.0, deflate") == "identity"
+    assert asset.select("gzip;q=0.001") == "gzip"
+    assert asset.select("*;q=0.1") == "gzip"
+    assert asset.select("identity;q=1, gzip;q=0.5") == "identity"
+    assert asset.select("*;q=0") == "identity"
+    assert asset.select("") == "identity"
+
+
+def test_each_encoding_has_its_own_strong_etag():
+    asset = StaticAsset(CSS, "text/css; charset=utf-8")
+
+    assert len(set(asset.etags.values())) == len(asset.variants)
+    assert all(not etag.startswith("W/") for etag in asset.etags.values())
+    assert asset.etags["gzip"] == asset.etags["identity"][:-1] + '-gzip"'
+
+
+def test_if_none_match_lists_wildcards_and_weak_tags():
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert not etag_matches('"a", "b-gzip"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+def test_static_asset_revalidates_per_encoding(client):
+    url = client.get("/").text.split('href="')[1].split('"')[0]
+
+    gzipped = client.get(url, headers={"Accept-Encoding": "gzip"})
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in plain.headers
+    assert gzipped.content == plain.content == CSS
+    assert gzipped.headers["etag"] != plain.headers["etag"]
+
+    # A gzip validator does not revalidate the identity bytes, and vice versa
+    revalidated = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": f'"x", {gzipped.headers["etag"]}'})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == gzipped.headers["etag"]
+    assert client.get(url, headers={"Accept-Encoding": "identity", "If-None-Match": gzipped.headers["etag"]}).status_code == 200
+    assert client.get(url, headers={"Accept-Encoding": "identity", "If-None-Match": "*"}).status_code == 304
+    assert client.get("/static/missing.css").status_code == 404
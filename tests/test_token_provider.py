@@ -0,0 +1,88 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.lakebase import Lakebase
+from services.token_provider import DatabricksTokenProvider, TokenProviderError
+from tests.conftest import send_json
+
+
+@pytest.fixture
+def oidc(stub_server, monkeypatch):
+    """Stub OIDC token endpoint issuing tok-1, tok-2, ... with a slow response."""
+    monkeypatch.delenv("DATABRICKS_TOKEN", raising=False)
+    monkeypatch.setenv("DATABRICKS_HOST", stub_server.url)
+    monkeypatch.setenv("DATABRICKS_CLIENT_ID", "client")
+    monkeypatch.setenv("DATABRICKS_CLIENT_SECRET", "secret")
+    state = {"issued": 0, "expires_in": 3600, "status": 200}
+
+    def issue(handler, body):
+        time.sleep(0.05)
+        if state["status"] != 200:
+            send_json(handler, {"error": "invalid_client"}, status=state["status"])
+            return
+        state["issued"] += 1
+        send_json(handler, {"access_token": f"tok-{state['issued']}", "expires_in": state["expires_in"]})
+
+    stub_server.routes[("POST", "/oidc/v1/token")] = issue
+    return state
+
+
+def test_concurrent_callers_share_one_token_request(oidc, stub_server):
+    barrier = threading.Barrier(20)
+
+    def get_token(_):
+        barrier.wait()
+        return DatabricksTokenProvider().get_token()
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        tokens = list(pool.map(get_token, range(20)))
+
+    assert tokens == ["tok-1"] * 20
+    assert oidc["issued"] == 1
+    assert DatabricksTokenProvider().issued_count == 1
+    _, _, headers, body = stub_server.requests[0]
+    assert headers["Authorization"].startswith("Basic ")
+    assert b"grant_type=client_credentials" in body
+
+
+def test_token_is_refreshed_before_it_expires(oidc, monkeypatch):
+    monkeypatch.setenv("TOKEN_REFRESH_MARGIN_SECONDS", "120")
+    oidc["expires_in"] = 100  # already inside the refresh margin
+
+    assert DatabricksTokenProvider().get_token() == "tok-1"
+    assert DatabricksTokenProvider().get_token() == "tok-2"
+
+    oidc["expires_in"] = 3600
+    assert DatabricksTokenProvider().get_token() == "tok-3"
+    assert DatabricksTokenProvider().get_token() == "tok-3"
+
+
+def test_invalidate_forces_a_new_token(oidc):
+    assert DatabricksTokenProvider().get_token() == "tok-1"
+
+    DatabricksTokenProvider().invalidate()
+
+    assert DatabricksTokenProvider().get_token() == "tok-2"
+
+
+def test_static_token_and_failures(oidc, monkeypatch):
+    oidc["status"] = 401
+    with pytest.raises(TokenProviderError):
+        DatabricksTokenProvider().get_token()
+
+    monkeypatch.setenv("DATABRICKS_TOKEN", "static")
+    assert DatabricksTokenProvider().get_token() == "static"
+    assert oidc["issued"] == 0
+
+
+def test_lakebase_keeps_the_service_principal_identity(oidc, monkeypatch):
+    monkeypatch.setenv("DATABRICKS_TOKEN", "agent-pat")
+
+    client = Lakebase()._get_workspace_client()
+
+    assert DatabricksTokenProvider().get_token() == "agent-pat"
+    assert client.config.token == "tok-1"
+    assert oidc["issued"] == 1